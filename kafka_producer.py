@@ -1,164 +1,333 @@
 #!/usr/bin/env python3
 """
-Kafka Producer for Testing Feedback Analysis
-Sends test feedback messages to Kafka for processing
+Kafka Load Generator for Feedback Analysis
+Sends CreateFeedbackAnalysisReq protobuf messages to feedback_raw on an open-loop
+schedule and measures end-to-end latency from the feedback_analyzed topic
+
+Usage:
+    python3 kafka_producer.py --rate 500 --duration 60
+    python3 kafka_producer.py --schedule 100:30,500:60,1000:30 --arrivals poisson
+    python3 kafka_producer.py --rate 200 --duration 30 --keys 12 --zipf 1.1 --duplicate-ratio 0.05
+    python3 kafka_producer.py --count 5 --no-measure
 """
 
+import argparse
 import json
+import os
+import random
+import sys
+import threading
 import time
 import uuid
-from datetime import datetime
-from kafka import KafkaProducer
-from kafka.errors import KafkaError
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Add the nlp_worker directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'proto', 'nlp_worker'))
+
+from kafka import KafkaConsumer, KafkaProducer
+from google.protobuf.timestamp_pb2 import Timestamp
+from proto.nlp_worker_reader import nlp_worker_reader_pb2
+from benchmarks.corpus import DEFAULT_CORPUS, generate_corpus, load_corpus
+
+
+SENT_AT_HEADER = "load-sent-at-ns"
+
+
+def parse_schedule(value: str) -> List[Tuple[float, float]]:
+    """Parse "rate:seconds,rate:seconds" into (messages per second, seconds) steps"""
+    steps = []
+    for step in value.split(","):
+        rate, _, seconds = step.partition(":")
+        steps.append((float(rate), float(seconds)))
+    return steps
+
+
+def send_times(schedule: List[Tuple[float, float]], arrivals: str, rng: random.Random) -> Iterator[float]:
+    """Intended send offsets in seconds from the start, independent of how fast sends complete"""
+    step_start = 0.0
+    for rate, seconds in schedule:
+        step_end = step_start + seconds
+        offset = step_start
+        while rate > 0:
+            offset += rng.expovariate(rate) if arrivals == "poisson" else 1.0 / rate
+            if offset >= step_end:
+                break
+            yield offset
+        step_start = step_end
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def at(pct: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))], 3)
 
+    return {"p50": at(50), "p90": at(90), "p99": at(99), "p999": at(99.9), "max": round(ordered[-1], 3)}
 
-class FeedbackProducer:
-    """Producer for sending feedback messages to Kafka"""
-    
-    def __init__(self, bootstrap_servers=['localhost:9092']):
+
+class LatencyTracker:
+    """Matches feedback_analyzed records to sent messages by key (the feedback ID)"""
+
+    def __init__(self, brokers: List[str], topic: str, run_id: str):
+        self.consumer = KafkaConsumer(
+            topic,
+            bootstrap_servers=brokers,
+            group_id=f"load-generator-{run_id}",
+            auto_offset_reset='latest',
+            enable_auto_commit=False,
+        )
+        self.pending: Dict[str, deque] = {}
+        self.latencies_ms: List[float] = []
+        self.unmatched = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="latency-tracker", daemon=True)
+
+    def start(self, timeout: float = 30.0):
+        """Join the group before sending, so no result is missed"""
+        deadline = time.monotonic() + timeout
+        while not self.consumer.assignment():
+            if time.monotonic() > deadline:
+                raise TimeoutError("no partitions assigned on the analyzed topic")
+            self.consumer.poll(timeout_ms=200)
+        self.consumer.seek_to_end()
+        self._thread.start()
+
+    def expect(self, feedback_id: str, intended_ns: int):
+        with self._lock:
+            self.pending.setdefault(feedback_id, deque()).append(intended_ns)
+
+    def outstanding(self) -> int:
+        with self._lock:
+            return sum(len(times) for times in self.pending.values())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.consumer.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            records = self.consumer.poll(timeout_ms=200)
+            now = time.time_ns()
+            for messages in records.values():
+                for message in messages:
+                    key = message.key.decode('utf-8') if message.key else None
+                    with self._lock:
+                        times = self.pending.get(key)
+                        if not times:
+                            self.unmatched += 1
+                            continue
+                        # Latency from the intended send time, so a producer falling behind is not hidden
+                        self.latencies_ms.append((now - times.popleft()) / 1e6)
+                        if not times:
+                            del self.pending[key]
+
+
+class LoadGenerator:
+    """Open-loop producer of CreateFeedbackAnalysisReq messages"""
+
+    def __init__(self, args, corpus, tracker: Optional[LatencyTracker]):
+        self.args = args
+        self.corpus = corpus
+        self.tracker = tracker
+        self.rng = random.Random(args.seed)
+        self.run_id = uuid.uuid4().hex[:8]
         self.producer = KafkaProducer(
-            bootstrap_servers=bootstrap_servers,
-            value_serializer=lambda x: json.dumps(x).encode('utf-8'),
-            key_serializer=lambda x: x.encode('utf-8') if x else None
+            bootstrap_servers=args.brokers,
+            acks=args.acks if args.acks == 'all' else int(args.acks),
+            linger_ms=args.linger_ms,
+            batch_size=args.batch_size,
+            compression_type=args.compression,
+            key_serializer=lambda x: x.encode('utf-8') if x else None,
         )
-        self.topic = 'feedback_raw'
-        
-    def send_feedback(self, feedback_data):
-        """Send a feedback message to Kafka"""
-        try:
-            # Generate unique ID if not provided
-            if 'id' not in feedback_data:
-                feedback_data['id'] = str(uuid.uuid4())
-            
-            # Add timestamp if not provided
-            if 'timestamp' not in feedback_data:
-                feedback_data['timestamp'] = datetime.now().isoformat()
-            
-            # Send to Kafka
-            future = self.producer.send(
-                self.topic,
-                key=feedback_data['id'],
-                value=feedback_data
-            )
-            
-            # Wait for send to complete
-            record_metadata = future.get(timeout=10)
-            
-            print(f"✅ Sent feedback {feedback_data['id']} to {self.topic}: {record_metadata}")
-            return True
-            
-        except KafkaError as e:
-            print(f"❌ Failed to send feedback: {e}")
-            return False
-    
-    def send_test_messages(self):
-        """Send predefined test messages"""
-        test_messages = [
-            {
-                "text": "This product is absolutely amazing! I love everything about it.",
-                "user_id": "user_001",
-                "metadata": {"category": "product_review", "rating": 5}
-            },
-            {
-                "text": "Terrible customer service. Waited for hours and got no help.",
-                "user_id": "user_002",
-                "metadata": {"category": "customer_service", "rating": 1}
-            },
-            {
-                "text": "The app works fine but could use some improvements in the UI.",
-                "user_id": "user_003",
-                "metadata": {"category": "app_feedback", "rating": 3}
-            },
-            {
-                "text": "Excellent quality and fast delivery. Highly recommended!",
-                "user_id": "user_004",
-                "metadata": {"category": "product_review", "rating": 5}
-            },
-            {
-                "text": "I'm not sure about this. It seems okay but nothing special.",
-                "user_id": "user_005",
-                "metadata": {"category": "general_feedback", "rating": 3}
-            }
-        ]
-        
-        print(f"📤 Sending {len(test_messages)} test messages...")
-        
-        for i, message in enumerate(test_messages, 1):
-            success = self.send_feedback(message)
-            if success:
-                print(f"  {i}. Sent: {message['text'][:50]}...")
-            time.sleep(1)  # Small delay between messages
-    
-    def send_custom_message(self):
-        """Send a custom message from user input"""
-        print("\n📝 Enter custom feedback message:")
-        text = input("Feedback text: ").strip()
-        if not text:
-            print("❌ No text provided")
-            return
-        
-        user_id = input("User ID (optional): ").strip() or f"user_{int(time.time())}"
-        category = input("Category (optional): ").strip() or "general_feedback"
-        rating = input("Rating 1-5 (optional): ").strip()
-        
-        try:
-            rating = int(rating) if rating else None
-        except ValueError:
-            rating = None
-        
-        message = {
-            "text": text,
-            "user_id": user_id,
-            "metadata": {
-                "category": category,
-                "rating": rating
-            }
-        }
-        
-        success = self.send_feedback(message)
-        if success:
-            print("✅ Custom message sent successfully!")
-    
+        self.keys = [f"key-{index}" for index in range(args.keys)]
+        # Cumulative zipf weights, key 0 is the hottest
+        self.key_weights = None
+        if args.keys and args.zipf > 0:
+            total = 0.0
+            self.key_weights = []
+            for rank in range(1, args.keys + 1):
+                total += 1.0 / rank ** args.zipf
+                self.key_weights.append(total)
+        self.recent = deque(maxlen=1000)
+        self.sent = 0
+        self.duplicates = 0
+        self.acked = 0
+        self.errors = 0
+        self.send_lag_ms: List[float] = []
+
+    def run(self, offsets: Iterator[float]) -> float:
+        """Send on schedule; returns the elapsed seconds"""
+        start_ns = time.time_ns()
+        start = time.perf_counter()
+        next_report = start + 1
+        for offset in offsets:
+            now = time.perf_counter()
+            delay = start + offset - now
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Behind schedule: send immediately, the lag is reported instead of dropping the send
+                self.send_lag_ms.append(-delay * 1000)
+            self._send(start_ns + int(offset * 1e9))
+
+            if now >= next_report:
+                self._report(now - start)
+                next_report = now + 1
+        self.producer.flush()
+        return time.perf_counter() - start
+
+    def _send(self, intended_ns: int):
+        if self.recent and self.rng.random() < self.args.duplicate_ratio:
+            # Redelivery of an earlier message: same feedback ID and text
+            feedback_id, source, text = self.rng.choice(self.recent)
+            self.duplicates += 1
+        else:
+            item = self.corpus[self.sent % len(self.corpus)]
+            feedback_id, source, text = f"load-{self.run_id}-{self.sent:09d}", item.feedback_source, item.text
+            self.recent.append((feedback_id, source, text))
+
+        created_at = Timestamp()
+        created_at.FromNanoseconds(intended_ns)
+        value = nlp_worker_reader_pb2.CreateFeedbackAnalysisReq(
+            feedback_id=feedback_id,
+            feedback_source=source,
+            text=text,
+            created_at=created_at,
+        ).SerializeToString()
+
+        if not self.keys:
+            key = feedback_id
+        elif self.key_weights is not None:
+            key = self.rng.choices(self.keys, cum_weights=self.key_weights)[0]
+        else:
+            key = self.rng.choice(self.keys)
+
+        if self.tracker is not None:
+            self.tracker.expect(feedback_id, intended_ns)
+        future = self.producer.send(
+            self.args.topic,
+            key=key,
+            value=value,
+            headers=[(SENT_AT_HEADER, str(time.time_ns()).encode('utf-8'))],
+        )
+        future.add_callback(self._on_ack)
+        future.add_errback(self._on_error)
+        self.sent += 1
+
+    def _on_ack(self, _metadata):
+        self.acked += 1
+
+    def _on_error(self, _exception):
+        self.errors += 1
+
+    def _report(self, elapsed: float):
+        line = f"⏱️  {elapsed:6.1f}s sent={self.sent} acked={self.acked} errors={self.errors}"
+        if self.tracker is not None:
+            line += f" analyzed={len(self.tracker.latencies_ms)}"
+        print(line, flush=True)
+
     def close(self):
-        """Close the producer"""
         self.producer.close()
 
 
 def main():
-    """Main function"""
-    print("🚀 Kafka Feedback Producer")
-    print("=" * 40)
-    
+    parser = argparse.ArgumentParser(description="Protobuf load generator for the feedback_raw topic")
+    parser.add_argument('--brokers', default='localhost:9092', help='Comma-separated bootstrap servers')
+    parser.add_argument('--topic', default='feedback_raw', help='Topic consumed by the NLP worker')
+    parser.add_argument('--analyzed-topic', default='feedback_analyzed', help='Topic the NLP worker publishes to')
+    parser.add_argument('--rate', type=float, default=100.0, help='Messages per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to send at --rate')
+    parser.add_argument('--schedule', help='Rate steps as rate:seconds,rate:seconds, overrides --rate/--duration')
+    parser.add_argument('--count', type=int, help='Send this many messages at --rate instead of for a duration')
+    parser.add_argument('--arrivals', choices=['uniform', 'poisson'], default='uniform',
+                        help='Evenly spaced sends or Poisson arrivals at the same mean rate')
+    parser.add_argument('--keys', type=int, default=0,
+                        help='Distinct message keys spreading the partitions, 0 keys by feedback ID')
+    parser.add_argument('--zipf', type=float, default=0.0, help='Zipf exponent of the key popularity, 0 for uniform')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.0, help='Share of messages resending an earlier one')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='Feedback texts in JSON lines')
+    parser.add_argument('--generated', type=int, default=0, help='Use a generated corpus of this many texts instead')
+    parser.add_argument('--seed', type=int, default=42, help='Seed of key, duplicate and arrival choices')
+    parser.add_argument('--acks', default='1', choices=['0', '1', 'all'], help='Producer acks')
+    parser.add_argument('--linger-ms', type=int, default=5, help='Producer batching delay')
+    parser.add_argument('--batch-size', type=int, default=65536, help='Producer batch size in bytes')
+    parser.add_argument('--compression', choices=['gzip', 'snappy', 'lz4', 'zstd'], help='Producer compression')
+    parser.add_argument('--no-measure', action='store_true', help='Do not consume the analyzed topic')
+    parser.add_argument('--drain-seconds', type=float, default=30.0, help='Max wait for outstanding results')
+    parser.add_argument('--json', action='store_true', help='Print a machine-readable summary')
+    args = parser.parse_args()
+    args.brokers = args.brokers.split(',')
+
+    if args.schedule:
+        schedule = parse_schedule(args.schedule)
+    elif args.count:
+        # Open-ended, the offsets are cut after --count messages below
+        schedule = [(args.rate, float('inf'))]
+    else:
+        schedule = [(args.rate, args.duration)]
+
+    corpus = generate_corpus(args.generated, args.seed) if args.generated else load_corpus(args.corpus)
+
+    tracker = None
+    generator = None
     try:
-        producer = FeedbackProducer()
-        
-        while True:
-            print("\n📤 Choose an option:")
-            print("1. Send test messages")
-            print("2. Send custom message")
-            print("3. Exit")
-            
-            choice = input("\nEnter your choice (1-3): ").strip()
-            
-            if choice == '1':
-                producer.send_test_messages()
-            elif choice == '2':
-                producer.send_custom_message()
-            elif choice == '3':
-                print("👋 Goodbye!")
-                break
-            else:
-                print("❌ Invalid choice. Please try again.")
-                
+        if not args.no_measure:
+            tracker = LatencyTracker(args.brokers, args.analyzed_topic, uuid.uuid4().hex[:8])
+            tracker.start()
+        generator = LoadGenerator(args, corpus, tracker)
+
+        if args.count:
+            print(f"🚀 Sending {args.count} messages to {args.topic} at {args.rate:g}/s")
+        else:
+            print(f"🚀 Sending to {args.topic}: {', '.join(f'{rate:g}/s for {seconds:g}s' for rate, seconds in schedule)}")
+        offsets = send_times(schedule, args.arrivals, random.Random(args.seed))
+        if args.count:
+            offsets = (offset for _, offset in zip(range(args.count), offsets))
+        elapsed = generator.run(offsets)
+
+        if tracker is not None:
+            deadline = time.monotonic() + args.drain_seconds
+            while tracker.outstanding() and time.monotonic() < deadline:
+                time.sleep(0.2)
+
+        summary = {
+            "sent": generator.sent,
+            "duplicates": generator.duplicates,
+            "acked": generator.acked,
+            "send_errors": generator.errors,
+            "elapsed_s": round(elapsed, 3),
+            "achieved_rate": round(generator.sent / elapsed, 1) if elapsed else 0.0,
+            "behind_schedule": len(generator.send_lag_ms),
+            "send_lag_ms": percentiles(generator.send_lag_ms),
+        }
+        if tracker is not None:
+            summary.update({
+                "analyzed": len(tracker.latencies_ms),
+                "missing": tracker.outstanding(),
+                "unmatched": tracker.unmatched,
+                "end_to_end_ms": percentiles(tracker.latencies_ms),
+            })
+
+        if args.json:
+            print(json.dumps(summary, indent=2))
+        else:
+            print("📊 Summary")
+            for key, value in summary.items():
+                print(f"  {key}: {value}")
+
     except KeyboardInterrupt:
         print("\n\n👋 Shutting down...")
-    except Exception as e:
-        print(f"❌ Error: {e}")
     finally:
-        if 'producer' in locals():
-            producer.close()
+        if generator is not None:
+            generator.close()
+        if tracker is not None:
+            tracker.stop()
 
 
 if __name__ == "__main__":
     main()
-
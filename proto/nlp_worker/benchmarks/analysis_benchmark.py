@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the analysis pipeline stages
+Runs FeedbackAnalysisService stages over the fixed and a generated corpus with the
+in-memory storage backend, reporting throughput, latency percentiles and allocations
+"""
+
+import argparse
+import gc
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.corpus import DEFAULT_CORPUS, corpus_digest, generate_corpus, load_corpus
+from config.config import load_config
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisRequest
+from internal.feedback_analysis.repository.feedback_analysis_repository import create_repository
+from internal.feedback_analysis.service.feedback_analysis_service import FeedbackAnalysisService
+from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
+
+
+RESULT_FORMAT_VERSION = 1
+
+STAGES = ("preprocess", "sentiment", "keywords", "analyze", "analyze_and_save")
+
+
+def create_service(config_path: str) -> FeedbackAnalysisService:
+    """Service with the in-memory repository, nothing talks to Mongo, Redis or Kafka"""
+    config = load_config(config_path)
+    config.storage.backend = "memory"
+    logger = logging.getLogger("benchmark")
+    return FeedbackAnalysisService(config, NlpWorkerMetrics(), logger, create_repository(config, logger))
+
+
+def stage_calls(service: FeedbackAnalysisService, requests: List[FeedbackAnalysisRequest]) -> Dict[str, List[Callable]]:
+    """One zero-argument call per request and stage, with the stage inputs prepared up front"""
+    cleaned = [service._preprocess_text(request.text) for request in requests]
+    return {
+        "preprocess": [lambda text=request.text: service._preprocess_text(text) for request in requests],
+        "sentiment": [lambda text=text: service._analyze_sentiment(text) for text in cleaned],
+        "keywords": [lambda text=text: service._extract_keywords(text) for text in cleaned],
+        "analyze": [
+            lambda r=request: service.analyze(r.feedback_id, r.feedback_source, r.text, r.created_at)
+            for request in requests
+        ],
+        "analyze_and_save": [
+            lambda r=request: service.analyze_feedback(r.feedback_id, r.feedback_source, r.text, r.created_at)
+            for request in requests
+        ],
+    }
+
+
+def measure(calls: List[Callable], repeat: int, warmup: int) -> dict:
+    """Time every call over repeat passes after warmup passes, then trace one pass for allocations
+
+    Throughput and the p50/p99 latency are also kept per pass, as the samples the
+    regression gate compares between runs.
+    """
+    for _ in range(warmup):
+        for call in calls:
+            call()
+
+    latencies: List[int] = []
+    throughputs: List[float] = []
+    pass_p50s: List[int] = []
+    pass_p99s: List[int] = []
+    clock = time.perf_counter_ns
+    for _ in range(repeat):
+        gc.collect()
+        pass_latencies = []
+        pass_start = clock()
+        for call in calls:
+            start = clock()
+            call()
+            pass_latencies.append(clock() - start)
+        throughputs.append(len(calls) / ((clock() - pass_start) / 1e9))
+        pass_latencies.sort()
+        pass_p50s.append(percentile(pass_latencies, 50))
+        pass_p99s.append(percentile(pass_latencies, 99))
+        latencies.extend(pass_latencies)
+
+    latencies.sort()
+    stats = {
+        "items": len(calls),
+        "repeat": repeat,
+        "throughput_per_s": round(median(throughputs), 1),
+        "throughputs": [round(value, 1) for value in throughputs],
+        "p50s_us": [round(value / 1000, 3) for value in pass_p50s],
+        "p99s_us": [round(value / 1000, 3) for value in pass_p99s],
+        "mean_us": round(sum(latencies) / len(latencies) / 1000, 3),
+        "p50_us": round(percentile(latencies, 50) / 1000, 3),
+        "p99_us": round(percentile(latencies, 99) / 1000, 3),
+        "max_us": round(latencies[-1] / 1000, 3),
+    }
+    stats.update(measure_allocations(calls))
+    return stats
+
+
+def measure_allocations(calls: List[Callable]) -> dict:
+    """Peak traced memory during one pass and memory still held after it, per item"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks()
+        for call in calls:
+            call()
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks() - blocks
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kib": round((peak - baseline) / 1024, 1),
+        "retained_bytes_per_item": round((current - baseline) / len(calls), 1),
+        "retained_blocks_per_item": round(blocks / len(calls), 2),
+    }
+
+
+def percentile(sorted_values: List[int], pct: float) -> int:
+    """Nearest-rank percentile of sorted values"""
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(0, min(len(sorted_values), rank) - 1)]
+
+
+def median(values: List[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def run(service: FeedbackAnalysisService, corpora: Dict[str, List[FeedbackAnalysisRequest]], stages: List[str],
+        repeat: int, warmup: int) -> List[dict]:
+    rows = []
+    for corpus_name, requests in corpora.items():
+        calls = stage_calls(service, requests)
+        for stage in stages:
+            row = {"corpus": corpus_name, "stage": stage}
+            row.update(measure(calls[stage], repeat, warmup))
+            rows.append(row)
+    return rows
+
+
+def environment() -> dict:
+    """Where the results were measured, so runs are only compared like for like"""
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        revision = None
+    return {
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def describe_corpora(corpora: Dict[str, List[FeedbackAnalysisRequest]]) -> dict:
+    return {
+        name: {
+            "items": len(requests),
+            "digest": corpus_digest(requests),
+            "mean_chars": round(sum(len(request.text) for request in requests) / len(requests), 1),
+        }
+        for name, requests in corpora.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis pipeline stage benchmark")
+    parser.add_argument("--config", default="config/config.yaml", help="Path to config file")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Fixed corpus in JSON lines")
+    parser.add_argument("--generated", type=int, default=1000, help="Items in the generated corpus, 0 to skip it")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the generated corpus")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes over each corpus")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed passes before timing")
+    parser.add_argument("--output", help="Write machine-readable results to this file")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    stages = [stage for stage in args.stages.split(",") if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    corpora = {"fixed": load_corpus(args.corpus)}
+    if args.generated:
+        corpora["generated"] = generate_corpus(args.generated, args.seed)
+
+    service = create_service(args.config)
+    rows = run(service, corpora, stages, args.repeat, args.warmup)
+
+    results = {
+        "benchmark": "analysis",
+        "format_version": RESULT_FORMAT_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "corpora": describe_corpora(corpora),
+        "results": rows,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'corpus':>9} {'stage':>16} {'items/s':>10} {'p50 µs':>9} {'p99 µs':>9} {'peak KiB':>9} {'B/item':>8}")
+    for row in rows:
+        print(f"{row['corpus']:>9} {row['stage']:>16} {row['throughput_per_s']:>10} {row['p50_us']:>9} "
+              f"{row['p99_us']:>9} {row['alloc_peak_kib']:>9} {row['retained_bytes_per_item']:>8}")
+
+
+if __name__ == "__main__":
+    main()
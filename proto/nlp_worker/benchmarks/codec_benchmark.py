@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the binary analysis record codec against the JSON path
+Reports payload size and encode/decode time per record
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from datetime import datetime
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from internal.feedback_analysis.models import codec
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+
+
+WORDS = ["product", "delivery", "support", "quality", "price", "app", "crash", "great", "slow", "refund",
+         "interface", "update", "battery", "screen", "service", "order", "package", "love", "terrible", "fast"]
+
+
+def make_result(text_length: int) -> FeedbackAnalysisResult:
+    rng = random.Random(text_length)
+    text = " ".join(rng.choice(WORDS) for _ in range(text_length // 6))
+    return FeedbackAnalysisResult(
+        feedback_id="3f1c2a9e-5b7d-4e8a-9c0f-1a2b3c4d5e6f",
+        feedback_source="app_store",
+        text=text,
+        created_at=datetime(2025, 1, 15, 12, 30, 45, 123456),
+        keywords=", ".join(rng.sample(WORDS, 10)),
+        sentiment="positive",
+        analyzed_at=datetime(2025, 1, 15, 12, 30, 46, 654321),
+    )
+
+
+def json_encode(result: FeedbackAnalysisResult) -> bytes:
+    return json.dumps(result.to_dict()).encode("utf-8")
+
+
+def json_decode(data: bytes) -> FeedbackAnalysisResult:
+    return FeedbackAnalysisResult.from_dict(json.loads(data))
+
+
+def bench(func, arg, number: int) -> float:
+    """Best-of-5 time per call in microseconds"""
+    timer = timeit.Timer(lambda: func(arg))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analysis record codec benchmark")
+    parser.add_argument("--number", type=int, default=20000, help="Calls per timing run")
+    parser.add_argument("--text-lengths", default="80,400,2000,5000", help="Comma-separated text lengths")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    rows = []
+    for length in (int(value) for value in args.text_lengths.split(",")):
+        result = make_result(length)
+        payloads = {
+            "json": (json_encode, json_decode, json_encode(result)),
+            "record": (codec.encode_result, codec.decode_result, codec.encode_result(result)),
+            "topic": (codec.encode_analyzed_message, codec.decode_analyzed_message, codec.encode_analyzed_message(result)),
+        }
+        for name, (encode, decode, payload) in payloads.items():
+            rows.append({
+                "text_length": length,
+                "format": name,
+                "bytes": len(payload),
+                "encode_us": round(bench(encode, result, args.number), 3),
+                "decode_us": round(bench(decode, payload, args.number), 3),
+            })
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    print(f"{'text':>6} {'format':>8} {'bytes':>7} {'encode µs':>10} {'decode µs':>10}")
+    for row in rows:
+        print(f"{row['text_length']:>6} {row['format']:>8} {row['bytes']:>7} {row['encode_us']:>10} {row['decode_us']:>10}")
+
+
+if __name__ == "__main__":
+    main()
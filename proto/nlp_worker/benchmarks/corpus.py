@@ -0,0 +1,90 @@
+"""
+Benchmark corpora of feedback requests
+A fixed corpus of hand-written feedback and a seeded generator with realistic lengths
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+from datetime import datetime
+from typing import List
+
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisRequest
+
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "requests.jsonl")
+
+CREATED_AT = datetime(2025, 1, 15, 12, 30, 45)
+
+SOURCES = [("app_store", 30), ("google_play", 25), ("website", 20), ("survey", 10), ("email", 8),
+           ("support_ticket", 5), ("twitter", 2)]
+
+POSITIVE = ["good", "great", "excellent", "amazing", "wonderful", "love", "like", "best", "perfect", "awesome"]
+NEGATIVE = ["bad", "terrible", "awful", "hate", "worst", "horrible", "dislike", "poor", "useless", "waste"]
+NEUTRAL = ["the", "app", "order", "delivery", "support", "price", "quality", "update", "screen", "account",
+           "payment", "refund", "package", "store", "website", "login", "search", "checkout", "product", "team",
+           "was", "is", "and", "but", "after", "when", "my", "it", "very", "again", "since", "version", "page",
+           "arrived", "works", "crashes", "slow", "fast", "shipping", "customer", "service", "notification",
+           "battery", "subscription", "size", "colour", "return", "week", "today", "still", "never", "always"]
+
+
+def load_corpus(path: str = DEFAULT_CORPUS) -> List[FeedbackAnalysisRequest]:
+    """Read feedback requests from JSON lines with feedback_id, feedback_source and text"""
+    requests = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            requests.append(FeedbackAnalysisRequest(
+                feedback_id=item["feedback_id"],
+                feedback_source=item.get("feedback_source", "unknown"),
+                text=item["text"],
+                created_at=CREATED_AT,
+            ))
+    return requests
+
+
+def generate_corpus(count: int, seed: int = 42) -> List[FeedbackAnalysisRequest]:
+    """Generate feedback with log-normal word counts, median about 18 words with a long tail
+
+    The same count and seed always produce the same corpus.
+    """
+    rng = random.Random(seed)
+    sources = [name for name, _ in SOURCES]
+    weights = [weight for _, weight in SOURCES]
+
+    requests = []
+    for index in range(count):
+        words = min(600, max(1, int(rng.lognormvariate(math.log(18), 0.9))))
+        requests.append(FeedbackAnalysisRequest(
+            feedback_id=f"generated-{seed}-{index:06d}",
+            feedback_source=rng.choices(sources, weights)[0],
+            text=_sentences(rng, words),
+            created_at=CREATED_AT,
+        ))
+    return requests
+
+
+def corpus_digest(requests: List[FeedbackAnalysisRequest]) -> str:
+    """Short hash of the texts, so results are only compared for identical corpora"""
+    digest = hashlib.sha256()
+    for request in requests:
+        digest.update(request.text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def _sentences(rng: random.Random, words: int) -> str:
+    # Mostly neutral words, one sentiment word in about every eight, sentences of 4-20 words
+    tone = rng.choice((POSITIVE, NEGATIVE, POSITIVE + NEGATIVE))
+    sentences = []
+    while words > 0:
+        length = min(words, rng.randint(4, 20))
+        sentence = [rng.choice(tone) if rng.random() < 0.125 else rng.choice(NEUTRAL) for _ in range(length)]
+        sentence[0] = sentence[0].capitalize()
+        sentences.append(" ".join(sentence) + rng.choice(".!?" if rng.random() < 0.2 else "."))
+        words -= length
+    return " ".join(sentences)
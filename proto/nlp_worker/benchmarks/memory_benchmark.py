@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Memory footprint benchmark of the NLP worker
+Measures RSS, PSS and USS per process after startup, model load, warmup and N messages
+in thread, process and shared-engine modes, attributes memory to the NLP components and
+tracks growth over the messages to catch leaks such as an ever-growing spaCy StringStore
+"""
+
+import argparse
+import gc
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import replace
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.analysis_benchmark import environment
+from benchmarks.corpus import DEFAULT_CORPUS, generate_corpus, load_corpus
+from config.config import load_config
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisRequest
+from internal.feedback_analysis.service.feedback_analysis_service import FeedbackAnalysisService
+from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
+
+
+RESULT_FORMAT_VERSION = 1
+
+# thread: one process with the analysis thread pool, as with grpc.processes 1
+# process: forked workers that each load their own models
+# shared: models loaded once, then workers forked and sharing them copy-on-write,
+#         as serve_multiprocess does for grpc.processes > 1
+MODES = ("thread", "process", "shared")
+
+
+def memory_usage(pid="self") -> Dict[str, Optional[float]]:
+    """RSS, PSS and USS of a process in MiB
+
+    USS is the memory only this process maps, what its exit would free. PSS splits shared
+    pages evenly between their users, so the PSS of all processes of a pod adds up to
+    the pod's resident memory. Both need /proc/<pid>/smaps_rollup (Linux 4.14+); where it
+    is missing only RSS is reported.
+    """
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                parts = value.split()
+                if len(parts) == 2 and parts[1] == "kB":
+                    fields[name] = int(parts[0])
+    except OSError:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    fields["Rss"] = int(line.split()[1])
+
+    def mib(kib: Optional[int]) -> Optional[float]:
+        # Kept to the KiB so the growth slopes are not dominated by rounding
+        return None if kib is None else round(kib / 1024, 3)
+
+    uss = None
+    if "Private_Clean" in fields:
+        uss = fields["Private_Clean"] + fields["Private_Dirty"]
+    return {"rss_mib": mib(fields.get("Rss")), "pss_mib": mib(fields.get("Pss")), "uss_mib": mib(uss)}
+
+
+def create_service(config) -> FeedbackAnalysisService:
+    """Service with its models and no storage, like the parent of serve_multiprocess"""
+    return FeedbackAnalysisService(config, NlpWorkerMetrics(), logging.getLogger("benchmark"), None)
+
+
+def vocabulary_size(service: FeedbackAnalysisService) -> Optional[int]:
+    """Strings interned by spaCy so far; the StringStore never evicts, so an open vocabulary grows it"""
+    if service.nlp is None:
+        return None
+    return len(service.nlp.vocab.strings)
+
+
+def message_stream(requests: List[FeedbackAnalysisRequest], start: int, count: int,
+                   open_vocabulary: bool) -> List[FeedbackAnalysisRequest]:
+    """Corpus items under unique IDs, optionally each with a token never seen before
+
+    Real feedback keeps bringing new strings (order numbers, names, typos), a corpus that
+    only cycles would hide growth that is proportional to the vocabulary.
+    """
+    items = []
+    for index in range(start, start + count):
+        request = requests[index % len(requests)]
+        text = f"{request.text} ref{index:06x}" if open_vocabulary else request.text
+        items.append(replace(request, feedback_id=f"memory-{index:08d}", text=text))
+    return items
+
+
+def run_worker(config, service: Optional[FeedbackAnalysisService], requests: List[FeedbackAnalysisRequest],
+               messages: int, checkpoints: int, open_vocabulary: bool) -> dict:
+    """Load the models unless given, warm up with one pass over the corpus, then analyze messages
+
+    Analysis runs on grpc.analysisWorkers threads, as it does behind the gRPC server.
+    """
+    phases = {}
+    if service is None:
+        phases["startup"] = memory_usage()
+        service = create_service(config)
+        phases["models"] = memory_usage()
+    else:
+        phases["forked"] = memory_usage()
+
+    def analyze(request: FeedbackAnalysisRequest):
+        service.analyze(request.feedback_id, request.feedback_source, request.text, request.created_at)
+
+    growth = []
+    with ThreadPoolExecutor(max_workers=config.grpc.analysisWorkers) as executor:
+        list(executor.map(analyze, requests))
+        gc.collect()
+        phases["warmup"] = memory_usage()
+
+        step = max(1, messages // checkpoints)
+        for done in range(step, messages + 1, step):
+            list(executor.map(analyze, message_stream(requests, done - step, step, open_vocabulary)))
+            gc.collect()
+            growth.append({"messages": done, "vocabulary": vocabulary_size(service), **memory_usage()})
+    phases["messages"] = {key: growth[-1][key] for key in ("rss_mib", "pss_mib", "uss_mib")}
+
+    return {"pid": os.getpid(), "phases": phases, "growth": growth, **growth_rates(growth)}
+
+
+def growth_rates(growth: List[dict]) -> dict:
+    """Least-squares slopes of USS (KiB) and vocabulary size per 1000 messages after warmup"""
+    def slope(field: str) -> Optional[float]:
+        points = [(point["messages"], point[field]) for point in growth if point.get(field) is not None]
+        if len(points) < 2:
+            return None
+        mean_x = sum(x for x, _ in points) / len(points)
+        mean_y = sum(y for _, y in points) / len(points)
+        denominator = sum((x - mean_x) ** 2 for x, _ in points)
+        return sum((x - mean_x) * (y - mean_y) for x, y in points) / denominator * 1000
+
+    memory = slope("uss_mib") if growth and growth[0]["uss_mib"] is not None else slope("rss_mib")
+    vocabulary = slope("vocabulary")
+    return {
+        "growth_kib_per_1k": None if memory is None else round(memory * 1024, 1),
+        "vocabulary_per_1k": None if vocabulary is None else round(vocabulary, 1),
+    }
+
+
+def _forked_worker(conn, config, service, requests, messages, checkpoints, open_vocabulary):
+    try:
+        conn.send(run_worker(config, service, requests, messages, checkpoints, open_vocabulary))
+    except Exception as e:
+        conn.send({"pid": os.getpid(), "error": f"{type(e).__name__}: {e}"})
+    # Stay alive until the parent has measured every process of the pod at once
+    conn.recv()
+
+
+def run_mode(mode: str, config_path: str, workers: int, corpus: str, generated: int, seed: int, messages: int,
+             checkpoints: int, open_vocabulary: bool) -> dict:
+    """Measure one mode; runs in a freshly spawned process so the modes do not share pages"""
+    logging.basicConfig(level=logging.WARNING)
+    config = load_config(config_path)
+    requests = generate_corpus(generated, seed) if generated else load_corpus(corpus)
+    parent = {"startup": memory_usage()}
+
+    if mode == "thread":
+        worker = run_worker(config, None, requests, messages, checkpoints, open_vocabulary)
+        return {"mode": mode, "workers": [worker], "parent": None, "pod": [memory_usage()]}
+
+    service = None
+    if mode == "shared":
+        service = create_service(config)
+        parent["models"] = memory_usage()
+
+    context = multiprocessing.get_context("fork")
+    connections, processes = [], []
+    for _ in range(workers):
+        receiver, sender = context.Pipe()
+        process = context.Process(target=_forked_worker, args=(
+            sender, config, service, requests, messages, checkpoints, open_vocabulary
+        ))
+        process.start()
+        connections.append(receiver)
+        processes.append(process)
+
+    results = [conn.recv() for conn in connections]
+    pod = [memory_usage()] + [memory_usage(result["pid"]) for result in results]
+    for conn, process in zip(connections, processes):
+        conn.send("exit")
+        process.join()
+    return {"mode": mode, "workers": results, "parent": parent, "pod": pod}
+
+
+# Loaded one at a time in a fresh process after the service imports, as the service loads them
+COMPONENTS = {
+    "spacy": "spaCy pipeline of nlp.model_name",
+    "stopwords": "NLTK stopwords corpus",
+    "wordnet": "NLTK WordNet, loaded by the first lemmatization",
+    "punkt": "NLTK punkt tokenizer, loaded by the first word_tokenize",
+    "textblob": "TextBlob with its sentiment lexicon",
+}
+
+
+def measure_component(name: str, config_path: str) -> dict:
+    config = load_config(config_path)
+    gc.collect()
+    before = memory_usage()
+    try:
+        if name == "spacy":
+            import spacy
+            spacy.load(config.nlp.model_name)
+        elif name == "stopwords":
+            from nltk.corpus import stopwords
+            stopwords.words("english")
+        elif name == "wordnet":
+            from nltk.stem import WordNetLemmatizer
+            WordNetLemmatizer().lemmatize("feedback")
+        elif name == "punkt":
+            from nltk.tokenize import word_tokenize
+            word_tokenize("The first call loads the tokenizer. Then it is cached.")
+        elif name == "textblob":
+            from textblob import TextBlob
+            TextBlob("great service").sentiment
+    except Exception as e:
+        # NLTK's LookupError message is a multi-line banner, keep its first line
+        message = next((line.strip() for line in str(e).splitlines() if line.strip(" *")), "")
+        return {"description": COMPONENTS[name], "error": f"{type(e).__name__}: {message}"}
+    gc.collect()
+    after = memory_usage()
+    field = "uss_mib" if after["uss_mib"] is not None else "rss_mib"
+    return {"description": COMPONENTS[name], "mib": round(after[field] - before[field], 1)}
+
+
+def in_fresh_process(func, *args):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(func, *args).result()
+
+
+def budget(result: dict, project_messages: int, headroom: float) -> dict:
+    """Pod and per-worker memory limits from the measured pod plus projected growth"""
+    workers = [worker for worker in result["workers"] if "error" not in worker]
+    field = "pss_mib" if result["pod"][0]["pss_mib"] is not None else "rss_mib"
+    pod_mib = sum(usage[field] for usage in result["pod"])
+    growth_mib = sum(max(0.0, worker["growth_kib_per_1k"] or 0.0) for worker in workers) / 1024 * project_messages / 1000
+    limit = (pod_mib + growth_mib) * (1 + headroom)
+    return {
+        "processes": len(result["pod"]),
+        "pod_mib": round(pod_mib, 1),
+        "worker_uss_mib": max((worker["phases"]["messages"]["uss_mib"] or 0.0) for worker in workers) if workers else None,
+        "worker_rss_mib": max(worker["phases"]["messages"]["rss_mib"] for worker in workers) if workers else None,
+        "projected_growth_mib": round(growth_mib, 1),
+        "pod_limit_mib": round(limit, 1),
+        "worker_limit_mib": round(limit / max(1, len(workers)), 1),
+    }
+
+
+def _format(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory footprint benchmark of the NLP worker")
+    parser.add_argument("--config", default="config/config.yaml", help="Path to config file")
+    parser.add_argument("--modes", default=",".join(MODES), help="Comma-separated modes to run")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Worker processes in the process and shared modes, default grpc.processes or 2")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Fixed corpus in JSON lines")
+    parser.add_argument("--generated", type=int, default=0, help="Use a generated corpus of this many items instead")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the generated corpus")
+    parser.add_argument("--messages", type=int, default=5000, help="Messages analyzed by every worker after warmup")
+    parser.add_argument("--checkpoints", type=int, default=10, help="Memory samples over the messages")
+    parser.add_argument("--closed-vocabulary", action="store_true",
+                        help="Only cycle the corpus instead of adding one unseen token per message")
+    parser.add_argument("--no-components", action="store_true", help="Skip the per-component attribution")
+    parser.add_argument("--leak-threshold", type=float, default=100.0,
+                        help="USS growth in KiB per 1000 messages reported as a suspected leak")
+    parser.add_argument("--project-messages", type=int, default=1_000_000,
+                        help="Messages per worker between restarts, for projecting growth into the budget")
+    parser.add_argument("--headroom", type=float, default=0.2, help="Headroom added to the budget as a fraction")
+    parser.add_argument("--output", help="Write machine-readable results to this file")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    modes = [mode for mode in args.modes.split(",") if mode]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    workers = args.workers or max(2, load_config(args.config).grpc.processes)
+
+    results = {
+        "benchmark": "memory",
+        "format_version": RESULT_FORMAT_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {
+            "workers": workers,
+            "messages": args.messages,
+            "open_vocabulary": not args.closed_vocabulary,
+            "project_messages": args.project_messages,
+            "headroom": args.headroom,
+        },
+        "components": {},
+        "modes": {},
+    }
+    if not args.no_components:
+        for name in COMPONENTS:
+            results["components"][name] = in_fresh_process(measure_component, name, args.config)
+    for mode in modes:
+        result = in_fresh_process(run_mode, mode, args.config, workers, args.corpus, args.generated, args.seed,
+                                  args.messages, args.checkpoints, not args.closed_vocabulary)
+        result["budget"] = budget(result, args.project_messages, args.headroom)
+        result["leak_suspected"] = any(
+            (worker.get("growth_kib_per_1k") or 0.0) > args.leak_threshold for worker in result["workers"]
+        )
+        results["modes"][mode] = result
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    if results["components"]:
+        print("Components (USS after loading each alone):")
+        for name, component in results["components"].items():
+            print(f"  {name:>10}: {component.get('mib', component.get('error'))}"
+                  f"{' MiB' if 'mib' in component else ''}")
+        print()
+
+    print(f"{'mode':>8} {'phase':>18} {'RSS MiB':>9} {'PSS MiB':>9} {'USS MiB':>9}")
+    for mode, result in results["modes"].items():
+        for phase, usage in (result["parent"] or {}).items():
+            print(f"{mode:>8} {'parent ' + phase:>18} {_format(usage['rss_mib']):>9} {_format(usage['pss_mib']):>9} "
+                  f"{_format(usage['uss_mib']):>9}")
+        for index, worker in enumerate(result["workers"]):
+            if "error" in worker:
+                print(f"{mode:>8} worker {index} failed: {worker['error']}")
+                continue
+            for phase, usage in worker["phases"].items():
+                print(f"{mode:>8} {f'worker {index} ' + phase:>18} {_format(usage['rss_mib']):>9} "
+                      f"{_format(usage['pss_mib']):>9} {_format(usage['uss_mib']):>9}")
+            print(f"{mode:>8} {f'worker {index} growth':>18} {worker['growth_kib_per_1k']} KiB and "
+                  f"{worker['vocabulary_per_1k']} spaCy strings per 1000 messages")
+    print()
+
+    print(f"{'mode':>8} {'procs':>6} {'pod MiB':>9} {'worker USS':>11} {'growth MiB':>11} {'pod limit':>10} "
+          f"{'per worker':>11}")
+    for mode, result in results["modes"].items():
+        plan = result["budget"]
+        leak = "  ⚠️  growth above --leak-threshold" if result["leak_suspected"] else ""
+        print(f"{mode:>8} {plan['processes']:>6} {plan['pod_mib']:>9} {_format(plan['worker_uss_mib']):>11} "
+              f"{plan['projected_growth_mib']:>11} {plan['pod_limit_mib']:>10} {plan['worker_limit_mib']:>11}{leak}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the Kafka consumer pipeline
+Runs the real KafkaConsumerService against the in-memory broker and repository, so
+consume, analyze, persist and publish are measured on one machine with no network
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kafka.structs import TopicPartition
+
+from benchmarks.analysis_benchmark import describe_corpora, environment, median, percentile
+from benchmarks.corpus import DEFAULT_CORPUS, generate_corpus, load_corpus
+from config.config import load_config
+from google.protobuf.timestamp_pb2 import Timestamp
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisRequest
+from internal.feedback_analysis.repository.feedback_analysis_repository import create_repository
+from internal.kafka.consumer import KafkaConsumerService, encode_key, protobuf_deserializer
+from internal.kafka.memory_transport import InMemoryBroker, InMemoryConsumer, InMemoryProducer
+from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
+from proto.nlp_worker_reader import nlp_worker_reader_pb2
+
+
+RESULT_FORMAT_VERSION = 1
+
+# A pass that makes no progress for this long is reported as stalled
+STALL_SECONDS = 30.0
+
+
+class Pipeline:
+    """Consumer services of one group sharing an in-memory broker and repository"""
+
+    def __init__(self, config, consumers: int, partitions: int, max_poll_records: int):
+        self.config = config
+        self.raw_topic = config.kafka.kafkaTopics.feedbackRaw.topicName
+        self.analyzed_topic = config.kafka.kafkaTopics.feedbackAnalyzed.topicName
+        self.partitions = partitions
+        self.broker = InMemoryBroker()
+        self.broker.create_topic(self.raw_topic, partitions)
+        self.broker.create_topic(self.analyzed_topic, partitions)
+
+        logger = logging.getLogger("benchmark")
+        metrics = NlpWorkerMetrics()
+        repository = create_repository(config, logger)
+        self.services = [
+            KafkaConsumerService(
+                config, metrics,
+                consumer=InMemoryConsumer(
+                    self.broker,
+                    group_id=config.kafka.groupID,
+                    auto_offset_reset="earliest",
+                    enable_auto_commit=False,
+                    max_poll_records=max_poll_records,
+                    value_deserializer=protobuf_deserializer,
+                ),
+                producer=InMemoryProducer(self.broker, key_serializer=encode_key),
+                repository=repository,
+            )
+            for _ in range(consumers)
+        ]
+        self.threads = [threading.Thread(target=service.start_consuming, daemon=True) for service in self.services]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        for service in self.services:
+            service.stop()
+        for thread in self.threads:
+            thread.join()
+
+    def produced(self, topic: str) -> int:
+        return sum(self.broker.end_offset(TopicPartition(topic, p)) for p in range(self.partitions))
+
+    def in_flight(self) -> int:
+        """Records fetched by the services and not yet processed"""
+        return sum(service.in_flight for service in self.services)
+
+
+def run_pass(pipeline: Pipeline, requests: List[FeedbackAnalysisRequest], messages: int, tag: str) -> dict:
+    """Publish a burst of messages to the raw topic and wait until every result is published"""
+    published_before = pipeline.produced(pipeline.analyzed_topic)
+    sent_at: Dict[bytes, int] = {}
+
+    start = time.perf_counter()
+    for index in range(messages):
+        request = requests[index % len(requests)]
+        feedback_id = f"{tag}-{index:06d}"
+        created_at = Timestamp()
+        created_at.GetCurrentTime()
+        value = nlp_worker_reader_pb2.CreateFeedbackAnalysisReq(
+            feedback_id=feedback_id,
+            feedback_source=request.feedback_source,
+            text=request.text,
+            created_at=created_at,
+        ).SerializeToString()
+        key = feedback_id.encode("utf-8")
+        sent_at[key] = pipeline.broker.append(pipeline.raw_topic, value, key).timestamp
+
+    # What the consumers fetched but have not processed yet, bounded by kafka.maxInFlightMessages
+    # per consumer; anything beyond must wait in the topic
+    max_in_flight = 0
+    target = published_before + messages
+    progress, progress_at = published_before, time.perf_counter()
+    while True:
+        published = pipeline.produced(pipeline.analyzed_topic)
+        if published >= target:
+            # Redelivered records publish twice, wait until every key has a result
+            answered = {record.key for record in pipeline.broker.records(pipeline.analyzed_topic) if record.key in sent_at}
+            if len(answered) == messages:
+                break
+            target = published + messages - len(answered)
+        max_in_flight = max(max_in_flight, pipeline.in_flight())
+        now = time.perf_counter()
+        if published != progress:
+            progress, progress_at = published, now
+        elif now - progress_at > STALL_SECONDS:
+            raise RuntimeError(f"pipeline stalled at {published - published_before}/{messages} results")
+        time.sleep(0.002)
+    elapsed = time.perf_counter() - start
+
+    results = [record for record in pipeline.broker.records(pipeline.analyzed_topic) if record.key in sent_at]
+    keys = Counter(record.key for record in results)
+    first_published: Dict[bytes, int] = {}
+    for record in results:
+        first_published[record.key] = min(record.timestamp, first_published.get(record.key, record.timestamp))
+    latencies_ms = sorted(timestamp - sent_at[key] for key, timestamp in first_published.items())
+    return {
+        "throughput": messages / elapsed,
+        "latencies_ms": latencies_ms,
+        "max_in_flight": max_in_flight,
+        "redelivered": sum(count - 1 for count in keys.values()),
+    }
+
+
+def measure(pipeline: Pipeline, requests: List[FeedbackAnalysisRequest], messages: int, repeat: int,
+            warmup: int, corpus_name: str, rebalance_interval: float) -> dict:
+    for index in range(warmup):
+        run_pass(pipeline, requests, messages, f"{corpus_name}-warmup{index}")
+
+    rebalancer = None
+    stop_rebalancing = threading.Event()
+    rebalances_before = pipeline.broker.rebalances(pipeline.config.kafka.groupID)
+    if rebalance_interval > 0:
+        def rebalance():
+            while not stop_rebalancing.wait(rebalance_interval):
+                pipeline.broker.rebalance(pipeline.config.kafka.groupID)
+        rebalancer = threading.Thread(target=rebalance, daemon=True)
+        rebalancer.start()
+
+    passes = []
+    try:
+        for index in range(repeat):
+            passes.append(run_pass(pipeline, requests, messages, f"{corpus_name}-pass{index}"))
+    finally:
+        stop_rebalancing.set()
+        if rebalancer is not None:
+            rebalancer.join()
+
+    latencies = sorted(latency for result in passes for latency in result["latencies_ms"])
+    throughputs = [result["throughput"] for result in passes]
+    return {
+        "items": messages,
+        "repeat": repeat,
+        "throughput_per_s": round(median(throughputs), 1),
+        "throughputs": [round(value, 1) for value in throughputs],
+        "p50s_us": [percentile(result["latencies_ms"], 50) * 1000 for result in passes],
+        "p99s_us": [percentile(result["latencies_ms"], 99) * 1000 for result in passes],
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1],
+        "max_in_flight": max(result["max_in_flight"] for result in passes),
+        "redelivered": sum(result["redelivered"] for result in passes),
+        "rebalances": pipeline.broker.rebalances(pipeline.config.kafka.groupID) - rebalances_before,
+    }
+
+
+def check_guarantees(results: dict, in_flight_limit: int) -> List[str]:
+    """Backpressure and commit guarantees of the consumer that a run must keep
+
+    Redeliveries are allowed: offsets are committed after processing, so records in
+    flight during a rebalance are processed again by the new owner.
+    """
+    violations = []
+    for row in results["results"]:
+        if row["max_in_flight"] > in_flight_limit:
+            violations.append(f"{row['corpus']}: {row['max_in_flight']} records in flight, limit {in_flight_limit}")
+    if results["uncommitted_after_close"]:
+        violations.append(f"{results['uncommitted_after_close']} processed records not committed on close")
+    if results["unpublished"]:
+        violations.append(f"{results['unpublished']} records never published")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kafka consumer pipeline benchmark with in-memory Kafka and storage")
+    parser.add_argument("--config", default="config/config.yaml", help="Path to config file")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Fixed corpus in JSON lines")
+    parser.add_argument("--generated", type=int, default=1000, help="Items in the generated corpus, 0 to skip it")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the generated corpus")
+    parser.add_argument("--messages", type=int, default=2000, help="Messages per pass, cycling through the corpus")
+    parser.add_argument("--partitions", type=int, default=6, help="Partitions of the raw and analyzed topics")
+    parser.add_argument("--consumers", type=int, default=1, help="Consumer services in the group")
+    parser.add_argument("--max-poll-records", type=int, default=500, help="Records per poll")
+    parser.add_argument("--max-in-flight", type=int, default=0,
+                        help="Unprocessed records per consumer before its partitions pause, default kafka.maxInFlightMessages")
+    parser.add_argument("--rebalance-interval", type=float, default=0.0,
+                        help="Force a group rebalance every this many seconds during timed passes, 0 for none")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes per corpus")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed passes before timing")
+    parser.add_argument("--output", help="Write machine-readable results to this file")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    config = load_config(args.config)
+    config.storage.backend = "memory"
+    # Short polls so stopping the services does not wait out the production timeout
+    config.kafka.pollTimeoutMs = 100
+    if args.max_in_flight:
+        config.kafka.maxInFlightMessages = args.max_in_flight
+
+    corpora = {"fixed": load_corpus(args.corpus)}
+    if args.generated:
+        corpora["generated"] = generate_corpus(args.generated, args.seed)
+
+    pipeline = Pipeline(config, args.consumers, args.partitions, args.max_poll_records)
+    pipeline.start()
+    rows = []
+    try:
+        for corpus_name, requests in corpora.items():
+            row = {"corpus": corpus_name, "stage": "pipeline"}
+            row.update(measure(pipeline, requests, args.messages, args.repeat, args.warmup, corpus_name,
+                               args.rebalance_interval))
+            rows.append(row)
+    finally:
+        pipeline.stop()
+
+    produced = pipeline.produced(pipeline.raw_topic)
+    results = {
+        "benchmark": "pipeline",
+        "format_version": RESULT_FORMAT_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "settings": {
+            "messages": args.messages,
+            "partitions": args.partitions,
+            "consumers": args.consumers,
+            "max_poll_records": args.max_poll_records,
+            "max_in_flight": config.kafka.maxInFlightMessages,
+            "rebalance_interval": args.rebalance_interval,
+        },
+        "corpora": describe_corpora(corpora),
+        "results": rows,
+        # Committed offsets after the consumers closed, anything left would be consumed again
+        "uncommitted_after_close": pipeline.broker.lag(config.kafka.groupID, pipeline.raw_topic),
+        "unpublished": produced - len({record.key for record in pipeline.broker.records(pipeline.analyzed_topic)}),
+    }
+    results["violations"] = check_guarantees(results, args.consumers * config.kafka.maxInFlightMessages)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"{'corpus':>9} {'msgs/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'in flight':>10} {'redelivered':>12} {'rebalances':>10}")
+        for row in rows:
+            print(f"{row['corpus']:>9} {row['throughput_per_s']:>10} {row['p50_ms']:>8} {row['p99_ms']:>8} "
+                  f"{row['max_in_flight']:>10} {row['redelivered']:>12} {row['rebalances']:>10}")
+        print(f"uncommitted after close: {results['uncommitted_after_close']}, unpublished: {results['unpublished']}")
+
+    for violation in results["violations"]:
+        print(f"❌ {violation}", file=sys.stderr)
+    if results["violations"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
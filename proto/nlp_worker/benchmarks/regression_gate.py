@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Performance regression gate over the benchmarks
+Stores baselines keyed by machine fingerprint and git revision, and compares new runs
+against them with 95% confidence intervals, exiting non-zero on a regression
+
+Usage:
+    python benchmarks/regression_gate.py save
+    python benchmarks/regression_gate.py check --threshold 0.05
+    python benchmarks/regression_gate.py compare baseline.json current.json
+    python benchmarks/regression_gate.py list
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_BASELINES = os.path.join(BENCHMARKS_DIR, "baselines")
+
+# Benchmark scripts taking --config, --repeat, --warmup and --output, whose results
+# rows carry per-pass values of the metrics below
+BENCHMARKS = {
+    "analysis": "analysis_benchmark.py",
+    "pipeline": "pipeline_benchmark.py",
+}
+
+ROW_KEY = ("corpus", "stage")
+
+# Result field with the per-pass values, label, and whether higher is better
+METRICS = (
+    ("throughputs", "items/s", True),
+    ("p50s_us", "p50 µs", False),
+    ("p99s_us", "p99 µs", False),
+)
+
+FINGERPRINT_FIELDS = ("implementation", "python", "machine", "processor", "cpu_count", "platform")
+
+# Two-sided 95% critical values of Student's t by degrees of freedom
+T_95 = {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+        10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980}
+
+
+def fingerprint(environment: dict) -> str:
+    """Short hash of the interpreter and hardware, runs are only compared on the same one"""
+    identity = json.dumps({field: environment.get(field) for field in FINGERPRINT_FIELDS}, sort_keys=True)
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:12]
+
+
+def run_benchmark(name: str, config: str, runs: int, repeat: int, warmup: int) -> dict:
+    """Run a benchmark in `runs` fresh processes and pool their results"""
+    script = os.path.join(BENCHMARKS_DIR, BENCHMARKS[name])
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for index in range(runs):
+            print(f"⏱️  {name} run {index + 1}/{runs}", file=sys.stderr, flush=True)
+            output = os.path.join(tmp, f"{index}.json")
+            subprocess.run(
+                [sys.executable, script, "--config", config, "--repeat", str(repeat), "--warmup", str(warmup),
+                 "--output", output],
+                check=True, stdout=subprocess.DEVNULL
+            )
+            with open(output) as f:
+                results.append(json.load(f))
+    return pool_runs(results)
+
+
+def pool_runs(results: List[dict]) -> dict:
+    """Merge repeated runs of one benchmark into one sample per run and metric
+
+    The sample is the median of the run's passes. Passes within a process share hash
+    seeds, allocator state and CPU placement, so they understate the noise between
+    processes; treating each process as one observation keeps the intervals honest.
+    """
+    first = results[0]
+    for other in results[1:]:
+        if other["corpora"] != first["corpora"]:
+            raise ValueError(f"{first['benchmark']} runs used different corpora")
+
+    rows: Dict[Tuple, dict] = {}
+    for result in results:
+        for row in result["results"]:
+            key = row_key(row)
+            if key not in rows:
+                rows[key] = {field: row[field] for field in ROW_KEY if field in row}
+                rows[key].update({field: [] for field, _, _ in METRICS})
+            for field, _, _ in METRICS:
+                if row.get(field):
+                    rows[key][field].append(median(row[field]))
+
+    return {
+        "benchmark": first["benchmark"],
+        "format_version": first["format_version"],
+        "runs": len(results),
+        "environment": first["environment"],
+        "corpora": first["corpora"],
+        "results": list(rows.values()),
+    }
+
+
+def row_key(row: dict) -> Tuple:
+    return tuple(row.get(field) for field in ROW_KEY)
+
+
+def collect(benchmarks: List[str], config: str, runs: int, repeat: int, warmup: int) -> dict:
+    pooled = {name: run_benchmark(name, config, runs, repeat, warmup) for name in benchmarks}
+    environment = next(iter(pooled.values()))["environment"]
+    return {
+        "revision": environment.get("git_revision"),
+        "fingerprint": fingerprint(environment),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment,
+        "benchmarks": pooled,
+    }
+
+
+def baseline_path(directory: str, machine: str, revision: str) -> str:
+    return os.path.join(directory, machine, f"{revision}.json")
+
+
+def save_baseline(directory: str, snapshot: dict, revision: Optional[str] = None) -> str:
+    revision = revision or snapshot["revision"] or "unknown"
+    path = baseline_path(directory, snapshot["fingerprint"], revision)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(snapshot, f, indent=2)
+    return path
+
+
+def find_baseline(directory: str, machine: str, revision: Optional[str] = None,
+                  exclude: Optional[str] = None) -> Optional[str]:
+    """Baseline of the given revision on this machine, or the newest one that is not `exclude`"""
+    if revision:
+        path = baseline_path(directory, machine, revision)
+        return path if os.path.exists(path) else None
+
+    folder = os.path.join(directory, machine)
+    if not os.path.isdir(folder):
+        return None
+    candidates = []
+    for name in os.listdir(folder):
+        if not name.endswith(".json") or name[:-len(".json")] == exclude:
+            continue
+        with open(os.path.join(folder, name)) as f:
+            candidates.append((json.load(f)["timestamp"], os.path.join(folder, name)))
+    return max(candidates)[1] if candidates else None
+
+
+def median(values: List[float]) -> float:
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    return ordered[middle] if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def mean(values: List[float]) -> float:
+    return sum(values) / len(values)
+
+
+def variance(values: List[float]) -> float:
+    average = mean(values)
+    return sum((value - average) ** 2 for value in values) / (len(values) - 1)
+
+
+def t_critical(df: float) -> float:
+    """95% critical value at the largest tabulated df not above df, which errs wide"""
+    return T_95[max(key for key in T_95 if key <= max(df, 1))]
+
+
+def relative_change(baseline: List[float], current: List[float]) -> Tuple[float, Optional[float], Optional[float]]:
+    """Change of the mean relative to the baseline mean with its Welch 95% confidence interval
+
+    The interval is None when either side has fewer than two samples.
+    """
+    base = mean(baseline)
+    change = (mean(current) - base) / base
+    if len(baseline) < 2 or len(current) < 2:
+        return change, None, None
+
+    var_base = variance(baseline) / len(baseline)
+    var_current = variance(current) / len(current)
+    error = math.sqrt(var_base + var_current)
+    if error == 0:
+        return change, change, change
+    df = (var_base + var_current) ** 2 / (
+        var_base ** 2 / (len(baseline) - 1) + var_current ** 2 / (len(current) - 1)
+    )
+    margin = t_critical(df) * error / base
+    return change, change - margin, change + margin
+
+
+def compare(baseline: dict, current: dict, threshold: float, latency_threshold: float) -> List[dict]:
+    """One comparison per benchmark, row and metric present in both snapshots
+
+    A metric regresses when it is worse than the threshold and the confidence interval
+    excludes no change, so noise alone does not fail the gate.
+    """
+    comparisons = []
+    for name, result in current["benchmarks"].items():
+        base_result = baseline["benchmarks"].get(name)
+        if base_result is None:
+            continue
+        if base_result["corpora"] != result["corpora"]:
+            comparisons.append({"benchmark": name, "key": (), "metric": "corpora", "status": "incomparable"})
+            continue
+
+        base_rows = {row_key(row): row for row in base_result["results"]}
+        for row in result["results"]:
+            base_row = base_rows.get(row_key(row))
+            if base_row is None:
+                continue
+            for field, label, higher_is_better in METRICS:
+                if not base_row.get(field) or not row.get(field):
+                    continue
+                change, low, high = relative_change(base_row[field], row[field])
+                worse = -change if higher_is_better else change
+                limit = threshold if higher_is_better else latency_threshold
+                significant = low is None or (high < 0 if higher_is_better else low > 0)
+                better_significant = low is not None and (low > 0 if higher_is_better else high < 0)
+                if worse > limit and significant:
+                    status = "regressed"
+                elif -worse > limit and better_significant:
+                    status = "improved"
+                else:
+                    status = "ok"
+                comparisons.append({
+                    "benchmark": name,
+                    "key": row_key(row),
+                    "metric": label,
+                    "baseline": mean(base_row[field]),
+                    "current": mean(row[field]),
+                    "change": change,
+                    "ci": None if low is None else (low, high),
+                    "status": status,
+                })
+    return comparisons
+
+
+def print_report(comparisons: List[dict], baseline: dict, current: dict):
+    print(f"📊 Baseline {baseline.get('revision')} ({baseline['timestamp']}) vs "
+          f"{current.get('revision')} ({current['timestamp']}), machine {current['fingerprint']}")
+    if baseline["fingerprint"] != current["fingerprint"]:
+        print("⚠️  The snapshots come from different machines, differences may not be regressions")
+
+    print(f"{'benchmark':>10} {'corpus':>9} {'stage':>16} {'metric':>8} {'baseline':>11} {'current':>11} "
+          f"{'change':>8} {'95% CI':>18}")
+    for item in comparisons:
+        if item["status"] == "incomparable":
+            print(f"{item['benchmark']:>10} ⚠️  corpora differ from the baseline, not compared")
+            continue
+        corpus, stage = (list(item["key"]) + [None, None])[:2]
+        ci = "n/a" if item["ci"] is None else f"[{item['ci'][0]:+.1%}, {item['ci'][1]:+.1%}]"
+        mark = {"regressed": "❌ regressed", "improved": "✅ improved"}.get(item["status"], "")
+        print(f"{item['benchmark']:>10} {str(corpus):>9} {str(stage):>16} {item['metric']:>8} "
+              f"{item['baseline']:>11.1f} {item['current']:>11.1f} {item['change']:>+8.1%} {ci:>18} {mark}")
+
+    regressed = [item for item in comparisons if item["status"] == "regressed"]
+    if regressed:
+        print(f"\n❌ {len(regressed)} regression(s):")
+        for item in regressed:
+            print(f"   {item['benchmark']} {'/'.join(str(part) for part in item['key'])} {item['metric']}: "
+                  f"{item['baseline']:.1f} -> {item['current']:.1f} ({item['change']:+.1%})")
+    else:
+        print("\n✅ No regressions")
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark regression gate")
+    parser.add_argument("--baselines", default=DEFAULT_BASELINES, help="Directory of stored baselines")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_run_arguments(command):
+        command.add_argument("--config", default="config/config.yaml", help="Path to config file")
+        command.add_argument("--benchmarks", default=",".join(BENCHMARKS), help="Comma-separated benchmarks")
+        command.add_argument("--runs", type=int, default=5, help="Benchmark processes per snapshot")
+        command.add_argument("--repeat", type=int, default=3, help="Timed passes per process")
+        command.add_argument("--warmup", type=int, default=1, help="Untimed passes per process")
+
+    def add_threshold_arguments(command):
+        command.add_argument("--threshold", type=float, default=0.05,
+                             help="Tolerated throughput drop as a fraction")
+        command.add_argument("--latency-threshold", type=float, default=0.10,
+                             help="Tolerated p50/p99 latency increase as a fraction")
+
+    save = commands.add_parser("save", help="Run the benchmarks and store a baseline for this revision")
+    add_run_arguments(save)
+    save.add_argument("--revision", help="Store under this name instead of the git revision")
+
+    check = commands.add_parser("check", help="Run the benchmarks and compare against a stored baseline")
+    add_run_arguments(check)
+    add_threshold_arguments(check)
+    check.add_argument("--against", help="Baseline revision, the newest baseline of another revision by default")
+    check.add_argument("--output", help="Also write the new snapshot to this file")
+
+    compare_files = commands.add_parser("compare", help="Compare two stored snapshots without running anything")
+    compare_files.add_argument("baseline")
+    compare_files.add_argument("current")
+    add_threshold_arguments(compare_files)
+
+    commands.add_parser("list", help="List stored baselines")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        if not os.path.isdir(args.baselines):
+            print("No baselines stored")
+            return
+        for machine in sorted(os.listdir(args.baselines)):
+            for name in sorted(os.listdir(os.path.join(args.baselines, machine))):
+                snapshot = load(os.path.join(args.baselines, machine, name))
+                print(f"{machine} {name[:-len('.json')]:>12} {snapshot['timestamp']} "
+                      f"{', '.join(snapshot['benchmarks'])}")
+        return
+
+    if args.command == "compare":
+        baseline, current = load(args.baseline), load(args.current)
+    else:
+        benchmarks = [name for name in args.benchmarks.split(",") if name]
+        unknown = set(benchmarks) - set(BENCHMARKS)
+        if unknown:
+            parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+        current = collect(benchmarks, args.config, args.runs, args.repeat, args.warmup)
+
+        if args.command == "save":
+            print(f"💾 Baseline stored in {save_baseline(args.baselines, current, args.revision)}")
+            return
+
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(current, f, indent=2)
+        path = find_baseline(args.baselines, current["fingerprint"], args.against, exclude=current["revision"])
+        if path is None:
+            print(f"⚠️  No baseline for machine {current['fingerprint']}"
+                  f"{f' and revision {args.against}' if args.against else ''}, run `save` first; not gating")
+            return
+        baseline = load(path)
+
+    comparisons = compare(baseline, current, args.threshold, args.latency_threshold)
+    print_report(comparisons, baseline, current)
+    if any(item["status"] == "regressed" for item in comparisons):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
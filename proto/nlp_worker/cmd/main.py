@@ -9,21 +9,24 @@ import argparse
 import sys
 import os
 import signal
-import threading
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 # Add the project root to Python path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.config import load_config
-from internal.server.grpc_server import serve
-from internal.server.health_server import start_health_server
+from internal.server.grpc_server import serve, serve_multiprocess
+from internal.server.health_server import HealthState, KafkaBrokerCheck, start_health_server
+from internal.server.profiling_server import start_profiling_server
 from internal.kafka.consumer import create_kafka_consumer_service
-from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
+from internal.logger.logger import configure_logging, shutdown_logging
+from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics, enable_multiprocess_metrics
+from internal.tracing.tracing import tracer
 
 
 def setup_logging():
-    """Setup logging configuration"""
+    """Setup bootstrap logging, replaced by configure_logging() once the config is loaded"""
     logging.basicConfig(
         level=logging.INFO,
         format='{"time": "%(asctime)s", "level": "%(levelname)s", "name": "%(name)s", "message": "%(message)s"}',
@@ -32,17 +35,32 @@ def setup_logging():
     return logging.getLogger(__name__)
 
 
-def start_kafka_consumer(config, metrics, logger):
+def start_kafka_consumer(config, metrics, logger, health=None, service=None):
     """Start Kafka consumer service"""
     try:
-        kafka_service = create_kafka_consumer_service(config, metrics)
+        kafka_service = create_kafka_consumer_service(config, metrics, service=service)
+        if health is not None:
+            health.set_condition("kafka_consumer", True, "started")
         logger.info("Starting Kafka consumer service...")
         kafka_service.start_consuming()
+        if health is not None:
+            health.set_condition("kafka_consumer", False, "stopped")
     except Exception as e:
+        if health is not None:
+            health.set_condition("kafka_consumer", False, f"failed: {e}")
         logger.error(f"Failed to start Kafka consumer: {e}")
         raise
 
 
+def run_kafka_worker(config, metrics, logger, service):
+    """Kafka consumer process supervised next to the gRPC workers, reusing the models loaded before the fork"""
+    tracer.configure(config.jaeger, logger)
+    try:
+        start_kafka_consumer(config, metrics, logger, service=service)
+    finally:
+        tracer.shutdown()
+
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description="NLP Worker Service")
@@ -56,35 +74,56 @@ def main():
     logger = setup_logging()
     logger.info("Starting NLP Worker Service...")
     
+    executor = None
     try:
         # Load configuration
         config = load_config(args.config)
+        configure_logging(config.logger)
         logger.info("Configuration loaded successfully")
         
+        multiprocess = config.grpc.processes > 1 and not args.kafka_only
+        if multiprocess:
+            enable_multiprocess_metrics(config.probes.prometheusMultiprocDir)
+        
         # Initialize metrics
         metrics = NlpWorkerMetrics()
         logger.info("Metrics initialized")
         
-        # Start health server
-        health_thread = threading.Thread(
-            target=start_health_server,
-            args=(config.probes.port, logger),
-            daemon=True
-        )
-        health_thread.start()
-        logger.info(f"Health server started on port {config.probes.port}")
+        # Not ready until the components started below have loaded their models
+        health = HealthState(config.probes.checkIntervalSeconds, logger)
+        if not args.kafka_only:
+            health.set_condition("models", False, "loading")
+        if not args.grpc_only:
+            health.add_check("kafka", KafkaBrokerCheck(config.kafka.brokers))
+            if not multiprocess:
+                health.set_condition("kafka_consumer", False, "starting")
+        
+        # Start the ops server: probes and Prometheus metrics
+        start_health_server(config, health, logger)
+        
+        if config.probes.pprofEnable and not multiprocess:
+            start_profiling_server(config.probes.pprof, logger)
+        
+        if multiprocess:
+            # The Kafka consumer becomes one more supervised process next to the gRPC workers
+            kafka_worker = None if args.grpc_only else partial(run_kafka_worker, config, metrics, logger)
+            serve_multiprocess(config, metrics, logger, kafka_worker, health)
+            return
+        
+        # Forked workers set up tracing themselves
+        tracer.configure(config.jaeger, logger)
         
         # Create thread pool for services
         executor = ThreadPoolExecutor(max_workers=2)
         
         if not args.kafka_only:
             # Start gRPC server
-            grpc_future = executor.submit(serve, config, metrics, logger)
+            grpc_future = executor.submit(serve, config, metrics, logger, health)
             logger.info("gRPC server started")
         
         if not args.grpc_only:
             # Start Kafka consumer
-            kafka_future = executor.submit(start_kafka_consumer, config, metrics, logger)
+            kafka_future = executor.submit(start_kafka_consumer, config, metrics, logger, health)
             logger.info("Kafka consumer started")
         
         # Wait for services to complete
@@ -105,8 +144,11 @@ def main():
         logger.error(f"Failed to start service: {e}")
         sys.exit(1)
     finally:
-        executor.shutdown(wait=True)
+        if executor is not None:
+            executor.shutdown(wait=True)
+        tracer.shutdown()
         logger.info("Service shutdown complete")
+        shutdown_logging()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Train a zstd dictionary for feedback text compression
+Samples stored feedback texts from MongoDB and writes the dictionary file
+referenced by storage.zstdDictionaryPath
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import load_config
+from internal.feedback_analysis.repository.feedback_analysis_repository import create_repository
+from internal.feedback_analysis.models.text_compression import train_zstd_dictionary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a zstd dictionary from stored feedback text")
+    parser.add_argument('--config', default='config/config.yaml', help='Path to config file')
+    parser.add_argument('--output', required=True, help='Path to write the dictionary to')
+    parser.add_argument('--samples', type=int, default=20000, help='Number of feedback texts to sample')
+    parser.add_argument('--size', type=int, default=16 * 1024, help='Dictionary size in bytes')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    logger = logging.getLogger(__name__)
+
+    config = load_config(args.config)
+    repository = create_repository(config, logger)
+    try:
+        texts = [result.get_text() for result in repository.get_analysis_history(limit=args.samples)]
+    finally:
+        repository.close_connection()
+
+    logger.info(f"Training {args.size} byte dictionary on {len(texts)} texts")
+    dictionary = train_zstd_dictionary(texts, args.size)
+
+    with open(args.output, "wb") as f:
+        f.write(dictionary)
+    logger.info(f"Dictionary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
 import yaml
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional
 
 
@@ -7,6 +7,19 @@ from typing import List, Optional
 class GrpcConfig:
     port: int
     development: bool
+    maxConcurrentRpcs: int = 256
+    analysisWorkers: int = 4
+    persistenceWorkers: int = 8
+    shutdownGraceSeconds: float = 5.0
+    maxBatchSize: int = 500
+    streamBatchSize: int = 32
+    streamBatchLatencyMs: int = 20
+    streamQueueDepth: int = 256
+    defaultPageSize: int = 100
+    maxPageSize: int = 1000
+    listChunkSize: int = 100
+    processes: int = 1
+    workerRestartDelaySeconds: float = 1.0
 
 
 @dataclass
@@ -18,13 +31,18 @@ class ProbesConfig:
     prometheusPath: str
     prometheusPort: int
     checkIntervalSeconds: int
+    prometheusMultiprocDir: str = "/tmp/nlp_worker_prometheus"
+    pprofEnable: bool = True
 
 
 @dataclass
 class LoggerConfig:
     level: str
     devMode: bool
-    encoder: str
+    encoder: str  # json | console
+    queueSize: int = 10000
+    samplingInitial: int = 100
+    samplingThereafter: int = 100
 
 
 @dataclass
@@ -55,6 +73,12 @@ class KafkaConfig:
     groupID: str
     initTopics: bool
     kafkaTopics: KafkaTopicsConfig
+    outputEncoding: str = "protobuf"
+    lagIntervalSeconds: float = 10.0
+    pollTimeoutMs: int = 1000
+    workers: int = 5
+    maxInFlightMessages: int = 100
+    commitIntervalMs: int = 1000
 
 
 @dataclass
@@ -63,6 +87,11 @@ class RedisConfig:
     password: str
     db: int
     poolSize: int
+    enable: bool = False
+    resultTtlSeconds: int = 3600
+    historyTtlSeconds: int = 30
+    statisticsTtlSeconds: int = 60
+    failureBackoffSeconds: float = 5.0
 
 
 @dataclass
@@ -79,6 +108,7 @@ class MongoConfig:
     password: str
     db: str
     collections: MongoCollectionsConfig
+    keywordRecentIds: int = 50
 
 
 @dataclass
@@ -87,6 +117,29 @@ class JaegerConfig:
     serviceName: str
     hostPort: str
     logSpans: bool
+    sampleRate: float = 1.0
+    exporter: str = "otlp"  # otlp | memory | none
+    propagators: List[str] = field(default_factory=lambda: ["tracecontext", "baggage"])
+
+
+@dataclass
+class StorageConfig:
+    backend: str = "mongo"  # mongo | memory | sqlite
+    sqlitePath: str = "nlp_worker.db"
+    textCompression: str = "none"  # none | zlib | zstd
+    compressionLevel: int = 3
+    zstdDictionaryPath: str = ""
+    minCompressSize: int = 256
+    dropTextFromOutput: bool = False
+
+
+@dataclass
+class AdmissionConfig:
+    enable: bool = True
+    maxQueuedItems: int = 512
+    ewmaAlpha: float = 0.2
+    initialServiceTimeMs: float = 20.0
+    readyQueueRatio: float = 0.8
 
 
 @dataclass
@@ -100,6 +153,8 @@ class Config:
     redis: RedisConfig
     mongo: MongoConfig
     jaeger: JaegerConfig
+    storage: StorageConfig = field(default_factory=StorageConfig)
+    admission: AdmissionConfig = field(default_factory=AdmissionConfig)
 
 
 def load_config(path="config/config.yaml") -> Config:
@@ -1,54 +1,324 @@
 import grpc
+import time
 from datetime import datetime
+from typing import FrozenSet, List, Optional
+from google.protobuf.field_mask_pb2 import FieldMask
 from google.protobuf.timestamp_pb2 import Timestamp
 
 from proto.nlp_worker_reader import nlp_worker_reader_pb2, nlp_worker_reader_pb2_grpc
 from config.config import Config
-from internal.feedback_analysis.service.feedback_analysis_service import FeedbackAnalysisService
+from internal.feedback_analysis.models import codec
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisRequest, FeedbackAnalysisResult, split_keywords
+from internal.feedback_analysis.service.async_feedback_analysis_service import AsyncFeedbackAnalysisService
+from internal.feedback_analysis.delivery.grpc.stream_batcher import StreamBatcher
 from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
+from internal.server.admission import AdmissionController, AdmissionRejected, AdmissionTicket, DeadlineExpired
+
+
+ANALYSIS_FIELDS = frozenset(field.name for field in nlp_worker_reader_pb2.FeedbackAnalysis.DESCRIPTOR.fields)
 
 
 class NlpWorkerGrpcService(nlp_worker_reader_pb2_grpc.NlpWorkerServiceServicer):
-    def __init__(self, logger, cfg: Config, service: FeedbackAnalysisService, metrics: NlpWorkerMetrics):
+    def __init__(self, logger, cfg: Config, service: AsyncFeedbackAnalysisService, metrics: NlpWorkerMetrics,
+                 admission: Optional[AdmissionController] = None):
         self.log = logger
         self.cfg = cfg
         self.service = service
         self.metrics = metrics
+        self.admission = admission
 
-    def CreateFeedbackAnalysis(self, request, context):
+    async def CreateFeedbackAnalysis(self, request, context):
         """Process feedback text and return sentiment analysis and keywords"""
         self.metrics.create_feedback_analysis_grpc_requests.inc()
+        start = time.perf_counter()
+        ticket = await self._admit(context, 1)
         
         try:
-            self.log.info(f"Processing feedback analysis for ID: {request.feedback_id}")
+            self.log.debug("Processing feedback analysis for ID: %s", request.feedback_id)
             
             # Convert protobuf timestamp to datetime
-            created_at = datetime.fromtimestamp(request.created_at.seconds + request.created_at.nanos / 1e9)
+            created_at = self._to_datetime(request.created_at)
             
             # Analyze the feedback text
-            analysis_result = self.service.analyze_feedback(
+            analysis_result = await self.service.analyze_feedback(
                 feedback_id=request.feedback_id,
                 feedback_source=request.feedback_source,
                 text=request.text,
-                created_at=created_at
+                created_at=created_at,
+                persist=not request.analyze_only,
+                ticket=ticket
             )
             
             # Create response
-            response = nlp_worker_reader_pb2.CreateFeedbackAnalysisRes(
-                feedback_id=analysis_result.feedback_id,
-                feedback_source=analysis_result.feedback_source,
-                text=analysis_result.text,
-                created_at=request.created_at,  # Keep original timestamp
-                keywords=analysis_result.keywords,
-                sentiment=analysis_result.sentiment
-            )
+            response = self._to_response(request, analysis_result)
             
             self.metrics.success_grpc_requests.inc()
-            self.log.info(f"Successfully analyzed feedback {request.feedback_id}")
+            self.log.debug("Successfully analyzed feedback %s", request.feedback_id)
             
             return response
             
+        except DeadlineExpired as e:
+            await context.abort(e.code, str(e))
+        except Exception as e:
+            self.log.error("Error processing feedback analysis: %s", e)
+            self.metrics.failed_grpc_requests.inc()
+            await context.abort(grpc.StatusCode.INTERNAL, f"Internal error: {str(e)}")
+        finally:
+            self._release(ticket)
+            # Analyze-only calls skip the write, keep them out of the regular latency distribution
+            if request.analyze_only:
+                self.metrics.analyze_only_duration.observe(time.perf_counter() - start)
+            else:
+                self.metrics.grpc_request_duration.labels("CreateFeedbackAnalysis").observe(time.perf_counter() - start)
+
+    async def BatchCreateFeedbackAnalysis(self, request, context):
+        """Analyze a batch of feedback, returning per-item results and errors"""
+        self.metrics.batch_create_feedback_analysis_grpc_requests.inc()
+        start = time.perf_counter()
+
+        batch_size = len(request.requests)
+        if batch_size > self.cfg.grpc.maxBatchSize:
+            self.metrics.failed_grpc_requests.inc()
+            await context.abort(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                f"Batch of {batch_size} exceeds the limit of {self.cfg.grpc.maxBatchSize}"
+            )
+
+        ticket = await self._admit(context, batch_size)
+        try:
+            self.log.debug("Processing batch feedback analysis of %d items", batch_size)
+            self.metrics.grpc_batch_size.observe(batch_size)
+
+            results, errors = await self.service.analyze_feedback_batch(self._to_requests(request.requests), ticket)
+
+            response = nlp_worker_reader_pb2.BatchCreateFeedbackAnalysisRes(
+                results=[
+                    self._to_response(item, result)
+                    for item, result in zip(request.requests, results) if result is not None
+                ],
+                errors=[
+                    nlp_worker_reader_pb2.FeedbackAnalysisError(
+                        index=error.index,
+                        feedback_id=error.feedback_id,
+                        message=error.message
+                    )
+                    for error in errors
+                ]
+            )
+
+            self.metrics.success_grpc_requests.inc()
+            self.log.debug("Batch analyzed: %d succeeded, %d failed", len(response.results), len(response.errors))
+
+            return response
+
+        except DeadlineExpired as e:
+            await context.abort(e.code, str(e))
+        except Exception as e:
+            self.log.error("Error processing batch feedback analysis: %s", e)
+            self.metrics.failed_grpc_requests.inc()
+            await context.abort(grpc.StatusCode.INTERNAL, f"Internal error: {str(e)}")
+        finally:
+            self._release(ticket)
+            self.metrics.grpc_request_duration.labels("BatchCreateFeedbackAnalysis").observe(time.perf_counter() - start)
+
+    async def StreamFeedbackAnalysis(self, request_iterator, context):
+        """Analyze a stream of feedback in server-side micro-batches"""
+        self.metrics.stream_feedback_analysis_grpc_requests.inc()
+        self.log.info("Feedback analysis stream opened")
+
+        batcher = StreamBatcher(
+            request_iterator,
+            max_batch_size=self.cfg.grpc.streamBatchSize,
+            max_latency_ms=self.cfg.grpc.streamBatchLatencyMs,
+            queue_depth=self.cfg.grpc.streamQueueDepth
+        )
+
+        processed = 0
+        try:
+            async for batch in batcher.batches():
+                self.metrics.grpc_stream_batch_size.observe(len(batch))
+                self.metrics.grpc_stream_queue_depth.observe(batcher.depth)
+
+                # Every micro-batch is admitted on its own, a shed batch fails only its items
+                try:
+                    ticket = self._try_admit(context, len(batch))
+                except AdmissionRejected as e:
+                    for item in batch:
+                        yield self._to_error_response(item, str(e))
+                    processed += len(batch)
+                    continue
+
+                try:
+                    results, errors = await self.service.analyze_feedback_batch(self._to_requests(batch), ticket)
+                finally:
+                    self._release(ticket)
+                messages = {error.index: error.message for error in errors}
+
+                for index, (item, result) in enumerate(zip(batch, results)):
+                    if result is None:
+                        yield self._to_error_response(item, messages.get(index, "analysis failed"))
+                    else:
+                        yield self._to_response(item, result)
+                processed += len(batch)
+
+        except DeadlineExpired as e:
+            await context.abort(e.code, str(e))
         except Exception as e:
-            self.log.error(f"Error processing feedback analysis: {str(e)}")
+            self.log.error("Error processing feedback analysis stream: %s", e)
             self.metrics.failed_grpc_requests.inc()
-            context.abort(grpc.StatusCode.INTERNAL, f"Internal error: {str(e)}")
+            await context.abort(grpc.StatusCode.INTERNAL, f"Internal error: {str(e)}")
+
+        if batcher.error is not None:
+            self.log.warning("Feedback analysis stream cancelled after %d items: %s", processed, batcher.error)
+        else:
+            self.metrics.success_grpc_requests.inc()
+            self.log.info("Feedback analysis stream closed after %d items", processed)
+
+    async def GetFeedbackAnalysis(self, request, context):
+        """Return a stored analysis result by feedback ID"""
+        start = time.perf_counter()
+        try:
+            fields = await self._read_fields(request.read_mask, context)
+            result = await self.service.get_analysis_result(request.feedback_id)
+            if result is None:
+                await context.abort(grpc.StatusCode.NOT_FOUND, f"Analysis for feedback {request.feedback_id} not found")
+
+            return nlp_worker_reader_pb2.GetFeedbackAnalysisRes(analysis=self._to_analysis(result, fields))
+        finally:
+            self.metrics.grpc_request_duration.labels("GetFeedbackAnalysis").observe(time.perf_counter() - start)
+
+    async def ListFeedbackAnalyses(self, request, context):
+        """Stream a page of analysis results newest first, resumable from any chunk's token"""
+        start = time.perf_counter()
+        try:
+            fields = await self._read_fields(request.read_mask, context)
+            page_size = request.page_size or self.cfg.grpc.defaultPageSize
+            if page_size < 0 or page_size > self.cfg.grpc.maxPageSize:
+                await context.abort(
+                    grpc.StatusCode.INVALID_ARGUMENT,
+                    f"page_size must be between 1 and {self.cfg.grpc.maxPageSize}"
+                )
+
+            after = None
+            if request.page_token:
+                try:
+                    after = codec.decode_page_token(request.page_token)
+                except codec.CodecError as e:
+                    await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+            feedback_source = request.feedback_source or None
+            remaining = page_size
+            while remaining > 0:
+                chunk_size = min(remaining, self.cfg.grpc.listChunkSize)
+                results = await self.service.list_analyses(feedback_source, after, chunk_size)
+                remaining -= len(results)
+
+                next_page_token = ""
+                if len(results) == chunk_size:
+                    last = results[-1]
+                    after = (last.created_at, last.feedback_id)
+                    next_page_token = codec.encode_page_token(*after)
+
+                yield nlp_worker_reader_pb2.ListFeedbackAnalysesRes(
+                    analyses=[self._to_analysis(result, fields) for result in results],
+                    next_page_token=next_page_token
+                )
+                if not next_page_token:
+                    break
+        finally:
+            self.metrics.grpc_request_duration.labels("ListFeedbackAnalyses").observe(time.perf_counter() - start)
+
+    async def GetSentimentStatistics(self, request, context):
+        """Return sentiment counts and percentages, optionally for one feedback source"""
+        start = time.perf_counter()
+        try:
+            stats = await self.service.get_sentiment_statistics(request.feedback_source or None)
+            return nlp_worker_reader_pb2.GetSentimentStatisticsRes(
+                total_feedback=stats.get("total", 0),
+                positive_count=stats.get("positive", 0),
+                negative_count=stats.get("negative", 0),
+                neutral_count=stats.get("neutral", 0),
+                positive_percentage=stats.get("positive_percentage", 0.0),
+                negative_percentage=stats.get("negative_percentage", 0.0),
+                neutral_percentage=stats.get("neutral_percentage", 0.0),
+                feedback_source=request.feedback_source
+            )
+        finally:
+            self.metrics.grpc_request_duration.labels("GetSentimentStatistics").observe(time.perf_counter() - start)
+
+    async def _admit(self, context, cost: int) -> Optional[AdmissionTicket]:
+        # Shed before any work is queued
+        try:
+            return self._try_admit(context, cost)
+        except AdmissionRejected as e:
+            await context.abort(e.code, str(e))
+
+    def _try_admit(self, context, cost: int) -> Optional[AdmissionTicket]:
+        # Raises AdmissionRejected, streams answer a shed micro-batch per item instead of aborting
+        if self.admission is None:
+            return None
+        return self.admission.admit(context.time_remaining(), cost)
+
+    def _release(self, ticket: Optional[AdmissionTicket]):
+        if ticket is not None:
+            self.admission.release(ticket)
+
+    async def _read_fields(self, read_mask: FieldMask, context) -> FrozenSet[str]:
+        if not read_mask.paths:
+            return ANALYSIS_FIELDS
+        if not read_mask.IsValidForDescriptor(nlp_worker_reader_pb2.FeedbackAnalysis.DESCRIPTOR):
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, f"Invalid read_mask: {', '.join(read_mask.paths)}")
+        return frozenset(read_mask.paths)
+
+    def _to_analysis(self, result: FeedbackAnalysisResult, fields: FrozenSet[str]):
+        # Only masked fields are read, so compressed text is not decompressed unless requested
+        analysis = nlp_worker_reader_pb2.FeedbackAnalysis()
+        if "feedback_id" in fields:
+            analysis.feedback_id = result.feedback_id
+        if "feedback_source" in fields:
+            analysis.feedback_source = result.feedback_source
+        if "text" in fields and not self.cfg.storage.dropTextFromOutput:
+            analysis.text = result.get_text() or ""
+        if "created_at" in fields:
+            analysis.created_at.FromDatetime(result.created_at)
+        if "keywords" in fields:
+            analysis.keywords = ", ".join(split_keywords(result.keywords))
+        if "sentiment" in fields:
+            analysis.sentiment = result.sentiment
+        if "analyzed_at" in fields:
+            analysis.analyzed_at.FromDatetime(result.analyzed_at)
+        return analysis
+
+    def _to_response(self, request, analysis_result: FeedbackAnalysisResult):
+        return nlp_worker_reader_pb2.CreateFeedbackAnalysisRes(
+            feedback_id=analysis_result.feedback_id,
+            feedback_source=analysis_result.feedback_source,
+            text="" if self.cfg.storage.dropTextFromOutput else analysis_result.get_text(),
+            created_at=request.created_at,  # Keep original timestamp
+            keywords=analysis_result.keywords,
+            sentiment=analysis_result.sentiment
+        )
+
+    def _to_error_response(self, item, message: str):
+        return nlp_worker_reader_pb2.CreateFeedbackAnalysisRes(
+            feedback_id=item.feedback_id,
+            feedback_source=item.feedback_source,
+            created_at=item.created_at,
+            error=message
+        )
+
+    def _to_requests(self, items) -> List[FeedbackAnalysisRequest]:
+        return [
+            FeedbackAnalysisRequest(
+                feedback_id=item.feedback_id,
+                feedback_source=item.feedback_source,
+                text=item.text,
+                created_at=self._to_datetime(item.created_at),
+                persist=not item.analyze_only
+            )
+            for item in items
+        ]
+
+    @staticmethod
+    def _to_datetime(timestamp: Timestamp) -> datetime:
+        return datetime.fromtimestamp(timestamp.seconds + timestamp.nanos / 1e9)
@@ -0,0 +1,74 @@
+import asyncio
+from typing import AsyncIterator, List
+
+
+_END_OF_STREAM = object()
+
+
+class StreamBatcher:
+    """Groups a client request stream into micro-batches bounded by size and latency
+
+    A reader task moves requests into a bounded queue. When analysis falls behind
+    the queue fills up, the reader stops pulling from the stream and gRPC flow control
+    pushes back on the client instead of buffering without limit.
+    """
+
+    def __init__(self, request_iterator, max_batch_size: int, max_latency_ms: int, queue_depth: int):
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_depth)
+        self._error = None
+        self._reader = asyncio.ensure_future(self._read(request_iterator))
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def error(self):
+        """Exception that ended the request stream early, if any"""
+        return self._error
+
+    async def _read(self, request_iterator):
+        try:
+            async for request in request_iterator:
+                await self._queue.put(request)
+        except Exception as e:
+            # Raised when the client cancels or the connection drops mid-stream
+            self._error = e
+        await self._queue.put(_END_OF_STREAM)
+
+    async def batches(self) -> AsyncIterator[List]:
+        """Yield batches until the client half-closes the stream"""
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                first = await self._queue.get()
+                if first is _END_OF_STREAM:
+                    return
+
+                batch = [first]
+                deadline = loop.time() + self.max_latency
+                ended = False
+                while len(batch) < self.max_batch_size:
+                    if self._queue.empty():
+                        timeout = deadline - loop.time()
+                        if timeout <= 0:
+                            break
+                        try:
+                            request = await asyncio.wait_for(self._queue.get(), timeout)
+                        except asyncio.TimeoutError:
+                            break
+                    else:
+                        request = self._queue.get_nowait()
+                    if request is _END_OF_STREAM:
+                        ended = True
+                        break
+                    batch.append(request)
+
+                yield batch
+                if ended:
+                    return
+        finally:
+            # The handler is done (or cancelled), stop reading the stream
+            self._reader.cancel()
@@ -0,0 +1,159 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from google.protobuf.timestamp_pb2 import Timestamp
+
+from proto.nlp_worker_records import nlp_worker_records_pb2
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult, split_keywords
+from internal.feedback_analysis.models.text_compression import CompressedText, TextCompressor
+
+
+# Leading byte of every cache value; bump when the record layout changes incompatibly
+RECORD_FORMAT_VERSION = 1
+
+PROTOBUF_CONTENT_TYPE = "application/x-protobuf"
+JSON_CONTENT_TYPE = "application/json"
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class CodecError(ValueError):
+    """Raised when a payload cannot be decoded"""
+
+
+def _to_timestamp(value: datetime) -> Timestamp:
+    # Naive datetimes are UTC throughout the worker
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    seconds, micros = divmod((value - _EPOCH) // _MICROSECOND, 1_000_000)
+    return Timestamp(seconds=seconds, nanos=micros * 1000)
+
+
+def _from_timestamp(ts: Timestamp) -> datetime:
+    return _EPOCH + timedelta(0, ts.seconds, ts.nanos // 1000)
+
+
+def result_to_record(result: FeedbackAnalysisResult, compressor: Optional[TextCompressor] = None,
+                     include_text: bool = True):
+    """Build a FeedbackAnalysisRecord from the domain model"""
+    text, compressed = None, None
+    if include_text:
+        if result.compressed_text is not None and compressor is not None:
+            # Already compressed in storage, reuse the blob without touching the text
+            compressed = result.compressed_text.data
+        else:
+            text = result.get_text()
+            compressed = compressor.compress(text) if compressor is not None else None
+            if compressed is not None:
+                text = None
+
+    # Passing everything to the constructor keeps field assignment in C
+    return nlp_worker_records_pb2.FeedbackAnalysisRecord(
+        FeedbackID=result.feedback_id,
+        FeedbackSource=result.feedback_source,
+        Text=text,
+        FeedbackTimestamp=_to_timestamp(result.created_at),
+        Keywords=split_keywords(result.keywords),
+        Sentiment=result.sentiment,
+        AnalyzedAt=_to_timestamp(result.analyzed_at),
+        CompressedText=compressed,
+    )
+
+
+def record_to_result(record, compressor: Optional[TextCompressor] = None) -> FeedbackAnalysisResult:
+    """Build the domain model from a FeedbackAnalysisRecord
+
+    Records with compressed text need the compressor of the storage that wrote them, a bare
+    one cannot read blobs written with a zstd dictionary.
+    """
+    compressed_text = None
+    if record.CompressedText:
+        if compressor is None:
+            raise CodecError("record has compressed text but no compressor was given")
+        compressed_text = CompressedText(record.CompressedText, compressor)
+
+    return FeedbackAnalysisResult(
+        feedback_id=record.FeedbackID,
+        feedback_source=record.FeedbackSource,
+        text=None if compressed_text is not None else record.Text,
+        created_at=_from_timestamp(record.FeedbackTimestamp),
+        # Keywords travel as a list but the service contract is a comma-joined string
+        keywords=", ".join(record.Keywords),
+        sentiment=record.Sentiment,
+        analyzed_at=_from_timestamp(record.AnalyzedAt),
+        compressed_text=compressed_text,
+    )
+
+
+def encode_result(result: FeedbackAnalysisResult, compressor: Optional[TextCompressor] = None) -> bytes:
+    """Encode a single result as a versioned binary record"""
+    return bytes([RECORD_FORMAT_VERSION]) + result_to_record(result, compressor).SerializeToString()
+
+
+def decode_result(data: bytes, compressor: Optional[TextCompressor] = None) -> FeedbackAnalysisResult:
+    """Decode a value produced by encode_result; compressed text stays compressed until read"""
+    record = nlp_worker_records_pb2.FeedbackAnalysisRecord.FromString(_strip_version(data))
+    return record_to_result(record, compressor)
+
+
+def encode_results(results: List[FeedbackAnalysisResult], compressor: Optional[TextCompressor] = None) -> bytes:
+    """Encode a list of results as a versioned binary record list"""
+    records = nlp_worker_records_pb2.FeedbackAnalysisRecordList(
+        Records=[result_to_record(result, compressor) for result in results]
+    )
+    return bytes([RECORD_FORMAT_VERSION]) + records.SerializeToString()
+
+
+def decode_results(data: bytes, compressor: Optional[TextCompressor] = None) -> List[FeedbackAnalysisResult]:
+    """Decode a value produced by encode_results"""
+    records = nlp_worker_records_pb2.FeedbackAnalysisRecordList.FromString(_strip_version(data))
+    return [record_to_result(record, compressor) for record in records.Records]
+
+
+def encode_analyzed_message(result: FeedbackAnalysisResult, include_text: bool = True) -> bytes:
+    """Encode a result for the feedback_analyzed topic as kafkaMessages.FeedbackCreated"""
+    record = result_to_record(result, include_text=include_text)
+    return nlp_worker_records_pb2.FeedbackAnalysisRecordCreated(Feedback=record).SerializeToString()
+
+
+def decode_analyzed_message(data: bytes) -> FeedbackAnalysisResult:
+    """Decode a feedback_analyzed topic payload produced by encode_analyzed_message"""
+    return record_to_result(nlp_worker_records_pb2.FeedbackAnalysisRecordCreated.FromString(data).Feedback)
+
+
+def encode_analyzed_json(result: FeedbackAnalysisResult, include_text: bool = True) -> bytes:
+    """Legacy JSON payload for the feedback_analyzed topic"""
+    return json.dumps({
+        'feedback_id': result.feedback_id,
+        'feedback_source': result.feedback_source,
+        'text': result.get_text() if include_text else '',
+        'sentiment': result.sentiment,
+        'keywords': result.keywords,
+        'created_at': result.created_at.isoformat(),
+    }).encode('utf-8')
+
+
+def encode_page_token(created_at: datetime, feedback_id: str) -> str:
+    """Opaque keyset cursor pointing after the given (created_at, feedback_id)"""
+    cursor = json.dumps([created_at.isoformat(), feedback_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(cursor.encode("utf-8")).decode("ascii")
+
+
+def decode_page_token(token: str) -> Tuple[datetime, str]:
+    """Decode a token produced by encode_page_token"""
+    try:
+        created_at, feedback_id = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return datetime.fromisoformat(created_at), feedback_id
+    except Exception as e:
+        raise CodecError(f"invalid page token: {e}") from e
+
+
+def _strip_version(data: bytes) -> memoryview:
+    if not data:
+        raise CodecError("empty payload")
+    if data[0] != RECORD_FORMAT_VERSION:
+        raise CodecError(f"unsupported record format version {data[0]}")
+    return memoryview(data)[1:]
@@ -1,6 +1,21 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Union
+
+from internal.feedback_analysis.models.text_compression import CompressedText
+
+
+def split_keywords(keywords: Union[str, List[str], None]) -> List[str]:
+    """Normalize keywords stored as a list, a comma-joined string or a list wrapping one"""
+    if not keywords:
+        return []
+    if isinstance(keywords, str):
+        parts = keywords.split(",")
+    else:
+        parts = [part for item in keywords for part in item.split(",")]
+
+    # dict.fromkeys keeps the first occurrence order while dropping duplicates
+    return list(dict.fromkeys(filter(None, map(str.strip, parts))))
 
 
 @dataclass
@@ -8,18 +23,34 @@ class FeedbackAnalysisResult:
     """Model representing the result of feedback analysis"""
     feedback_id: str
     feedback_source: str
-    text: str
+    # None when loaded from compressed storage, read it with get_text()
+    text: Optional[str]
     created_at: datetime
-    keywords: List[str]
+    # Comma-joined, as the service extracts them; see __post_init__
+    keywords: str
     sentiment: str
     analyzed_at: datetime
+    # Set instead of text when loaded from compressed storage, compared by its bytes
+    compressed_text: Optional[CompressedText] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        # Mongo documents and Kafka messages carry keywords as a list, normalize them so every
+        # backend and the cache return the same shape
+        if not isinstance(self.keywords, str):
+            self.keywords = ", ".join(split_keywords(self.keywords))
+
+    def get_text(self) -> Optional[str]:
+        """Get the feedback text, decompressing stored text only when it is read"""
+        if self.text is None and self.compressed_text is not None:
+            return self.compressed_text.decompress()
+        return self.text
     
     def to_dict(self) -> dict:
         """Convert to dictionary for storage"""
         return {
             "feedback_id": self.feedback_id,
             "feedback_source": self.feedback_source,
-            "text": self.text,
+            "text": self.get_text(),
             "created_at": self.created_at.isoformat(),
             "keywords": self.keywords,
             "sentiment": self.sentiment,
@@ -47,6 +78,8 @@ class FeedbackAnalysisRequest:
     feedback_source: str
     text: str
     created_at: datetime
+    # False for analyze-only requests that must not be stored
+    persist: bool = True
     
     def to_dict(self) -> dict:
         """Convert to dictionary"""
@@ -58,6 +91,14 @@ class FeedbackAnalysisRequest:
         }
 
 
+@dataclass
+class FeedbackAnalysisBatchError:
+    """Failure of a single item in a batch analysis request"""
+    index: int
+    feedback_id: str
+    message: str
+
+
 @dataclass
 class SentimentStatistics:
     """Model representing sentiment statistics"""
@@ -0,0 +1,132 @@
+import logging
+import threading
+import zlib
+from typing import Iterable, Optional
+
+
+# Leading byte of every compressed blob, so readers do not depend on the current config
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+_CODEC_IDS = {"zlib": CODEC_ZLIB, "zstd": CODEC_ZSTD}
+
+
+class TextCompressor:
+    """Compresses feedback text for storage; blobs are self-describing by codec byte
+
+    zstd objects are not thread-safe, so compressor and decompressor instances are kept per thread.
+    """
+
+    def __init__(self, codec: str = "none", level: int = 3, dictionary: Optional[bytes] = None,
+                 min_size: int = 256):
+        self.codec = codec
+        self.codec_id = _CODEC_IDS.get(codec)
+        self.level = level
+        self.min_size = min_size
+        self._dictionary_data = dictionary
+        self._zstd_dictionary = None
+        self._local = threading.local()
+
+        if codec == "zstd":
+            import zstandard
+            self._zstandard = zstandard
+            if dictionary:
+                self._zstd_dictionary = zstandard.ZstdCompressionDict(dictionary)
+
+    @classmethod
+    def from_config(cls, config, logger: Optional[logging.Logger] = None) -> 'TextCompressor':
+        """Create a compressor from StorageConfig, falling back to zlib when zstandard is missing
+
+        The zstd dictionary is loaded whenever it is configured, not only when zstd is the
+        write codec, so blobs written with it stay readable after the codec is switched.
+        """
+        codec = config.textCompression
+        dictionary = None
+        if config.zstdDictionaryPath:
+            with open(config.zstdDictionaryPath, "rb") as f:
+                dictionary = f.read()
+        if codec == "zstd":
+            try:
+                return cls(codec, config.compressionLevel, dictionary, config.minCompressSize)
+            except ImportError as e:
+                if logger:
+                    logger.warning(f"zstandard not available, compressing text with zlib: {e}")
+                codec = "zlib"
+        return cls(codec, config.compressionLevel, dictionary, config.minCompressSize)
+
+    @property
+    def enabled(self) -> bool:
+        return self.codec_id is not None
+
+    def compress(self, text: str) -> Optional[bytes]:
+        """Compress text, returning None when compression is disabled or not worthwhile"""
+        if not self.enabled or text is None:
+            return None
+        data = text.encode("utf-8")
+        if len(data) < self.min_size:
+            return None
+
+        if self.codec_id == CODEC_ZSTD:
+            payload = self._zstd_compressor().compress(data)
+        else:
+            payload = zlib.compress(data, self.level)
+
+        if len(payload) + 1 >= len(data):
+            return None
+        return bytes([self.codec_id]) + payload
+
+    def decompress(self, blob: bytes) -> str:
+        """Decompress a blob produced by compress"""
+        codec_id, payload = blob[0], memoryview(blob)[1:]
+        if codec_id == CODEC_ZLIB:
+            return zlib.decompress(payload).decode("utf-8")
+        if codec_id == CODEC_ZSTD:
+            return self._zstd_decompressor().decompress(payload).decode("utf-8")
+        raise ValueError(f"unknown text codec {codec_id}")
+
+    def _zstd_compressor(self):
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = self._zstandard.ZstdCompressor(level=self.level, dict_data=self._zstd_dictionary)
+            self._local.compressor = compressor
+        return compressor
+
+    def _zstd_decompressor(self):
+        decompressor = getattr(self._local, "decompressor", None)
+        if decompressor is None:
+            if not hasattr(self, "_zstandard"):
+                import zstandard
+                self._zstandard = zstandard
+            if self._zstd_dictionary is None and self._dictionary_data:
+                # Reading zstd blobs while writing with another codec
+                self._zstd_dictionary = self._zstandard.ZstdCompressionDict(self._dictionary_data)
+            decompressor = self._zstandard.ZstdDecompressor(dict_data=self._zstd_dictionary)
+            self._local.decompressor = decompressor
+        return decompressor
+
+
+class CompressedText:
+    """Compressed text blob that is only decompressed when read"""
+
+    __slots__ = ("data", "compressor")
+
+    def __init__(self, data: bytes, compressor: TextCompressor):
+        self.data = data
+        self.compressor = compressor
+
+    def decompress(self) -> str:
+        return self.compressor.decompress(self.data)
+
+    def __eq__(self, other) -> bool:
+        # Compare the stored bytes, results compare equal without decompressing
+        return isinstance(other, CompressedText) and self.data == other.data
+
+    __hash__ = None
+
+
+def train_zstd_dictionary(texts: Iterable[str], dict_size: int = 16 * 1024) -> bytes:
+    """Train a zstd dictionary from sample feedback texts"""
+    import zstandard
+
+    samples = [text.encode("utf-8") for text in texts if text]
+    return zstandard.train_dictionary(dict_size, samples).as_bytes()
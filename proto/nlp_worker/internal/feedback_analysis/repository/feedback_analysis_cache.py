@@ -0,0 +1,316 @@
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Tuple
+
+from internal.feedback_analysis.models import codec
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.models.text_compression import TextCompressor
+from internal.feedback_analysis.repository.feedback_analysis_repository import FeedbackAnalysisRepository
+from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
+from config.config import Config, RedisConfig
+
+
+class CacheClient(ABC):
+    """Minimal byte-oriented key/value cache used by the repository cache layer"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def set_many(self, items: Dict[str, bytes], ttl_seconds: int) -> None:
+        for key, value in items.items():
+            self.set(key, value, ttl_seconds)
+
+    def delete_many(self, keys: List[str]) -> None:
+        for key in keys:
+            self.delete(key)
+
+    def close(self) -> None:
+        pass
+
+
+class RedisCacheClient(CacheClient):
+    """Redis cache client backed by a bounded connection pool"""
+
+    def __init__(self, config: RedisConfig):
+        import redis
+
+        host, _, port = config.addr.partition(":")
+        self.pool = redis.BlockingConnectionPool(
+            host=host or "localhost",
+            port=int(port or 6379),
+            db=config.db,
+            password=config.password or None,
+            max_connections=config.poolSize,
+            timeout=1,
+            socket_timeout=0.5,
+            socket_connect_timeout=0.5,
+        )
+        self.client = redis.Redis(connection_pool=self.pool)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        self.client.set(key, value, ex=ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        self.client.delete(key)
+
+    def delete_many(self, keys: List[str]) -> None:
+        self.client.delete(*keys)
+
+    def set_many(self, items: Dict[str, bytes], ttl_seconds: int) -> None:
+        # One round trip for the whole batch
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipeline.set(key, value, ex=ttl_seconds)
+        pipeline.execute()
+
+    def close(self) -> None:
+        self.pool.disconnect()
+
+
+class InMemoryCacheClient(CacheClient):
+    """Process-local cache with TTL semantics, a drop-in stand-in for Redis in tests"""
+
+    def __init__(self):
+        self._items: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl_seconds: int) -> None:
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+
+def _encode_statistics(stats: dict) -> bytes:
+    return json.dumps(stats, separators=(",", ":")).encode("utf-8")
+
+
+def _decode_statistics(data: bytes) -> dict:
+    return json.loads(data)
+
+
+class CachedFeedbackAnalysisRepository:
+    """Read-through/write-through cache in front of FeedbackAnalysisRepository
+
+    Cache failures are logged and treated as misses. After a failure the cache is bypassed
+    for redis.failureBackoffSeconds, so an unreachable Redis costs one timeout per backoff
+    period rather than one per call. Statistics are dropped when results are saved; history
+    listings are not, they expire after redis.historyTtlSeconds.
+    """
+
+    RESULT = "result"
+    HISTORY = "history"
+    STATISTICS = "statistics"
+
+    def __init__(self, repository: FeedbackAnalysisRepository, cache: CacheClient, config: Config,
+                 metrics: NlpWorkerMetrics, logger: logging.Logger):
+        self.repository = repository
+        self.cache = cache
+        self.config = config
+        self.metrics = metrics
+        self.logger = logger
+        self.key_prefix = config.serviceName
+        self.text_compressor = TextCompressor.from_config(config.storage, logger)
+        self.ttls = {
+            self.RESULT: config.redis.resultTtlSeconds,
+            self.HISTORY: config.redis.historyTtlSeconds,
+            self.STATISTICS: config.redis.statisticsTtlSeconds,
+        }
+        self.failure_backoff = config.redis.failureBackoffSeconds
+        self._bypass_until = 0.0
+
+    def __getattr__(self, name):
+        # Methods without caching (keyword index, deletes) go straight to the repository
+        return getattr(self.repository, name)
+
+    def save_analysis_result(self, result: FeedbackAnalysisResult) -> bool:
+        """Save to the repository and write the fresh result through to the cache"""
+        saved = self.repository.save_analysis_result(result)
+        if saved:
+            self._put(self.RESULT, result.feedback_id, codec.encode_result(result, self.text_compressor))
+            self._delete_statistics([result])
+        return saved
+
+    def save_analysis_results(self, results: List[FeedbackAnalysisResult]) -> List[str]:
+        """Save a batch to the repository and write the stored results through to the cache"""
+        failed_ids = self.repository.save_analysis_results(results)
+        failed = set(failed_ids)
+        stored = [result for result in results if result.feedback_id not in failed]
+        self._put_many(self.RESULT, {
+            result.feedback_id: codec.encode_result(result, self.text_compressor) for result in stored
+        })
+        self._delete_statistics(stored)
+        return failed_ids
+
+    def get_analysis_result(self, feedback_id: str) -> Optional[FeedbackAnalysisResult]:
+        """Get analysis result by feedback ID, reading through the cache"""
+        cached = self._get(self.RESULT, feedback_id, self._decode_result)
+        if cached is not None:
+            return cached
+
+        result = self.repository.get_analysis_result(feedback_id)
+        if result is not None:
+            self._put(self.RESULT, feedback_id, codec.encode_result(result, self.text_compressor))
+        return result
+
+    def get_analysis_history(self, feedback_source: Optional[str] = None, limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """Get analysis history, cached briefly per source and limit"""
+        key = f"{feedback_source or '*'}:{limit}"
+        cached = self._get(self.HISTORY, key, self._decode_results)
+        if cached is not None:
+            return cached
+
+        results = self.repository.get_analysis_history(feedback_source, limit)
+        self._put(self.HISTORY, key, codec.encode_results(results, self.text_compressor))
+        return results
+
+    def get_sentiment_statistics(self, feedback_source: Optional[str] = None) -> dict:
+        """Get sentiment statistics, cached briefly per source"""
+        key = feedback_source or "*"
+        cached = self._get(self.STATISTICS, key, _decode_statistics)
+        if cached is not None:
+            return cached
+
+        stats = self.repository.get_sentiment_statistics(feedback_source)
+        self._put(self.STATISTICS, key, _encode_statistics(stats))
+        return stats
+
+    def delete_analysis_result(self, feedback_id: str) -> bool:
+        """Delete analysis result and evict it from the cache"""
+        self._delete(self.RESULT, feedback_id)
+        return self.repository.delete_analysis_result(feedback_id)
+
+    def ping(self) -> bool:
+        # The cache is optional, only the underlying store decides reachability
+        return self.repository.ping()
+
+    def close_connection(self):
+        """Close the cache client and the underlying repository"""
+        self.cache.close()
+        self.repository.close_connection()
+
+    def _decode_result(self, data: bytes) -> FeedbackAnalysisResult:
+        return codec.decode_result(data, self.text_compressor)
+
+    def _decode_results(self, data: bytes) -> List[FeedbackAnalysisResult]:
+        return codec.decode_results(data, self.text_compressor)
+
+    def _key(self, key_class: str, key: str) -> str:
+        return f"{self.key_prefix}:{key_class}:{key}"
+
+    def _available(self) -> bool:
+        return time.monotonic() >= self._bypass_until
+
+    def _failed(self, operation: str, key_class: str, error: Exception) -> None:
+        self._bypass_until = time.monotonic() + self.failure_backoff
+        self.logger.warning(f"Cache {operation} failed for {key_class}, bypassing the cache for "
+                            f"{self.failure_backoff}s: {error}")
+        self.metrics.cache_errors.labels(key_class).inc()
+
+    def _get(self, key_class: str, key: str, decode: Callable[[bytes], object]):
+        if not self._available():
+            self.metrics.cache_misses.labels(key_class).inc()
+            return None
+
+        start = time.perf_counter()
+        try:
+            data = self.cache.get(self._key(key_class, key))
+        except Exception as e:
+            self._failed("get", key_class, e)
+            return None
+        finally:
+            self.metrics.cache_operation_duration.labels("get").observe(time.perf_counter() - start)
+
+        value = None
+        if data is not None:
+            try:
+                value = decode(data)
+            except Exception as e:
+                # Entries written by an older format version are simply refreshed
+                self.logger.debug(f"Discarding undecodable {key_class} cache entry: {e}")
+
+        if value is None:
+            self.metrics.cache_misses.labels(key_class).inc()
+        else:
+            self.metrics.cache_hits.labels(key_class).inc()
+        return value
+
+    def _put(self, key_class: str, key: str, data: bytes) -> None:
+        if not self._available():
+            return
+        start = time.perf_counter()
+        try:
+            self.cache.set(self._key(key_class, key), data, self.ttls[key_class])
+        except Exception as e:
+            self._failed("set", key_class, e)
+        finally:
+            self.metrics.cache_operation_duration.labels("set").observe(time.perf_counter() - start)
+
+    def _put_many(self, key_class: str, items: Dict[str, bytes]) -> None:
+        if not items or not self._available():
+            return
+        start = time.perf_counter()
+        try:
+            self.cache.set_many({self._key(key_class, key): data for key, data in items.items()}, self.ttls[key_class])
+        except Exception as e:
+            self._failed("set", key_class, e)
+        finally:
+            self.metrics.cache_operation_duration.labels("set_many").observe(time.perf_counter() - start)
+
+    def _delete(self, key_class: str, key: str) -> None:
+        # Tried even while bypassing, a missed eviction would serve a deleted result for its whole TTL
+        self._delete_many(key_class, [key])
+
+    def _delete_many(self, key_class: str, keys: List[str]) -> None:
+        try:
+            self.cache.delete_many([self._key(key_class, key) for key in keys])
+        except Exception as e:
+            self._failed("delete", key_class, e)
+
+    def _delete_statistics(self, results: List[FeedbackAnalysisResult]) -> None:
+        """Drop the statistics the saved results change: their sources and the all-sources entry"""
+        if results and self._available():
+            sources = {result.feedback_source for result in results}
+            self._delete_many(self.STATISTICS, sorted(sources) + ["*"])
+
+
+def create_cached_repository(config: Config, metrics: NlpWorkerMetrics, logger: logging.Logger,
+                             repository: FeedbackAnalysisRepository, cache: Optional[CacheClient] = None):
+    """Wrap the repository with the Redis cache when it is enabled in config"""
+    if cache is None:
+        if not config.redis.enable:
+            return repository
+        try:
+            cache = RedisCacheClient(config.redis)
+        except ImportError as e:
+            logger.warning(f"redis package not available, analysis cache disabled: {e}")
+            return repository
+    return CachedFeedbackAnalysisRepository(repository, cache, config, metrics, logger)
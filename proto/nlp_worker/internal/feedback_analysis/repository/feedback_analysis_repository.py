@@ -1,175 +1,133 @@
 import logging
-from typing import List, Optional
-from datetime import datetime
-import pymongo
-from pymongo import MongoClient
-from pymongo.collection import Collection
-from pymongo.database import Database
-
-from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult, split_keywords
+from internal.feedback_analysis.models.text_compression import TextCompressor
 from config.config import Config
 
 
-class FeedbackAnalysisRepository:
-    """Repository for storing and retrieving feedback analysis results"""
-    
+# Placeholder values the service returns instead of real keywords
+NON_INDEXED_KEYWORDS = {"no_keywords", "extraction_error"}
+
+SENTIMENTS = ("positive", "negative", "neutral")
+
+
+class FeedbackAnalysisRepository(ABC):
+    """Storage interface for feedback analysis results
+
+    Backends share the query semantics below: results are upserted by feedback ID,
+    history is newest first by created_at, and the keyword index only counts a
+    feedback the first time it is stored.
+    """
+
     def __init__(self, config: Config, logger: logging.Logger):
         self.config = config
         self.logger = logger
-        self.client: Optional[MongoClient] = None
-        self.db: Optional[Database] = None
-        self.collection: Optional[Collection] = None
-        
-        self._initialize_connection()
-    
-    def _initialize_connection(self):
-        """Initialize MongoDB connection"""
-        try:
-            # Create MongoDB client
-            if self.config.mongo.user and self.config.mongo.password:
-                connection_string = f"mongodb://{self.config.mongo.user}:{self.config.mongo.password}@{self.config.mongo.uri.replace('mongodb://', '')}"
-            else:
-                connection_string = self.config.mongo.uri
-            
-            self.client = MongoClient(connection_string)
-            self.db = self.client[self.config.mongo.db]
-            self.collection = self.db[self.config.mongo.collections.feedback_analysis]
-            
-            # Create indexes for better performance
-            self.collection.create_index([("feedback_id", pymongo.ASCENDING)], unique=True)
-            self.collection.create_index([("feedback_source", pymongo.ASCENDING)])
-            self.collection.create_index([("sentiment", pymongo.ASCENDING)])
-            self.collection.create_index([("created_at", pymongo.DESCENDING)])
-            
-            self.logger.info("MongoDB connection established successfully")
-            
-        except Exception as e:
-            self.logger.error(f"Failed to connect to MongoDB: {e}")
-            raise
-    
+        self.text_compressor = TextCompressor.from_config(config.storage, logger)
+
+    @abstractmethod
     def save_analysis_result(self, result: FeedbackAnalysisResult) -> bool:
-        """Save feedback analysis result to database"""
-        try:
-            # Convert to dictionary
-            result_dict = result.to_dict()
-
-            # Ensure _id is used as primary key (string UUID)
-            if isinstance(result_dict.get("keywords"), str):
-                result_dict["keywords"] = [result_dict["keywords"]]
-            elif result_dict.get("keywords") is None:
-                result_dict["keywords"] = []
-
-            # Используем _id
-            result_dict["_id"] = result.feedback_id
-            result_dict.pop("feedback_id", None)
-
-            self.collection.update_one(
-                {"_id": result_dict["_id"]},
-                {"$set": result_dict},
-                upsert=True
-            )
-
-            self.logger.debug(f"Saved analysis result for feedback {result_dict['_id']}")
-            return True
-
-        except Exception as e:
-            self.logger.error(f"Failed to save analysis result: {e}")
-            return False
-    
+        """Save feedback analysis result"""
+
+    @abstractmethod
+    def save_analysis_results(self, results: List[FeedbackAnalysisResult]) -> List[str]:
+        """Save a batch of results in one round trip, returning the feedback IDs that failed"""
+
+    @abstractmethod
     def get_analysis_result(self, feedback_id: str) -> Optional[FeedbackAnalysisResult]:
         """Get analysis result by feedback ID"""
-        try:
-            result_dict = self.collection.find_one({"_id": feedback_id})
 
-            if result_dict:
-                # Restore feedback_id for domain model
-                result_dict["feedback_id"] = result_dict["_id"]
-                return FeedbackAnalysisResult.from_dict(result_dict)
+    @abstractmethod
+    def get_analysis_history(self, feedback_source: Optional[str] = None, limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """Get analysis history with optional filtering, newest first"""
 
-            return None
+    @abstractmethod
+    def list_analyses(self, feedback_source: Optional[str] = None, after: Optional[Tuple[datetime, str]] = None,
+                      limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """List results newest first by (created_at, feedback_id), starting after the given keyset position"""
 
-        except Exception as e:
-            self.logger.error(f"Failed to get analysis result: {e}")
-            return None
-    
-    def get_analysis_history(self, feedback_source: Optional[str] = None, limit: int = 100) -> List[FeedbackAnalysisResult]:
-        """Get analysis history with optional filtering"""
-        try:
-            # Build query
-            query = {}
-            if feedback_source:
-                query["feedback_source"] = feedback_source
-            
-            # Execute query
-            cursor = self.collection.find(query).sort("created_at", -1).limit(limit)
-            
-            results = []
-            for result_dict in cursor:
-                results.append(FeedbackAnalysisResult.from_dict(result_dict))
-            
-            return results
-            
-        except Exception as e:
-            self.logger.error(f"Failed to get analysis history: {e}")
-            return []
-    
+    @abstractmethod
     def get_sentiment_statistics(self, feedback_source: Optional[str] = None) -> dict:
-        """Get sentiment statistics using MongoDB aggregation"""
-        try:
-            # Build match stage
-            match_stage = {}
-            if feedback_source:
-                match_stage["feedback_source"] = feedback_source
-            
-            # Aggregation pipeline
-            pipeline = [
-                {"$match": match_stage} if match_stage else {"$match": {}},
-                {
-                    "$group": {
-                        "_id": "$sentiment",
-                        "count": {"$sum": 1}
-                    }
-                }
-            ]
-            
-            # Execute aggregation
-            sentiment_counts = list(self.collection.aggregate(pipeline))
-            
-            # Process results
-            stats = {"positive": 0, "negative": 0, "neutral": 0}
-            total = 0
-            
-            for item in sentiment_counts:
-                sentiment = item["_id"]
-                count = item["count"]
-                stats[sentiment] = count
-                total += count
-            
-            # Calculate percentages
-            if total > 0:
-                stats["total"] = total
-                stats["positive_percentage"] = (stats["positive"] / total) * 100
-                stats["negative_percentage"] = (stats["negative"] / total) * 100
-                stats["neutral_percentage"] = (stats["neutral"] / total) * 100
-            
-            return stats
-            
-        except Exception as e:
-            self.logger.error(f"Failed to get sentiment statistics: {e}")
-            return {"positive": 0, "negative": 0, "neutral": 0, "total": 0}
-    
+        """Get sentiment counts and percentages"""
+
+    @abstractmethod
+    def get_top_keywords(self, since: datetime, until: Optional[datetime] = None,
+                         feedback_source: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """Get the most frequent keywords for feedback created between since and until at day granularity
+
+        Both bounds are widened to whole days: since down to the start of its day and until
+        up to the next day boundary, so the day containing until is counted.
+        """
+
+    @abstractmethod
+    def get_feedback_by_keyword(self, keyword: str, feedback_source: Optional[str] = None,
+                                limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """Get the most recent feedback containing the keyword"""
+
+    @abstractmethod
     def delete_analysis_result(self, feedback_id: str) -> bool:
         """Delete analysis result by feedback ID"""
-        try:
-            result = self.collection.delete_one({"feedback_id": feedback_id})
-            return result.deleted_count > 0
-            
-        except Exception as e:
-            self.logger.error(f"Failed to delete analysis result: {e}")
-            return False
-    
+
+    def ping(self) -> bool:
+        """Check that the backend is reachable; in-process backends always are"""
+        return True
+
     def close_connection(self):
-        """Close MongoDB connection"""
-        if self.client:
-            self.client.close()
-            self.logger.info("MongoDB connection closed")
+        """Release backend resources"""
+
+    @staticmethod
+    def _day_bucket(value: datetime) -> datetime:
+        """Truncate a timestamp to the start of its day"""
+        return datetime(value.year, value.month, value.day)
+
+    @classmethod
+    def _day_ceiling(cls, value: datetime) -> datetime:
+        """Round a timestamp up to the next day boundary, unless it already is one"""
+        day = cls._day_bucket(value)
+        return day if day == value else day + timedelta(days=1)
+
+    def _keyword_buckets(self, results: List[FeedbackAnalysisResult]) -> Dict[Tuple[str, str, datetime], List[str]]:
+        """Group feedback IDs by keyword/source/day for the inverted keyword index"""
+        buckets: Dict[Tuple[str, str, datetime], List[str]] = {}
+        for result in results:
+            day = self._day_bucket(result.created_at)
+            for keyword in split_keywords(result.keywords):
+                keyword = keyword.lower()
+                if keyword in NON_INDEXED_KEYWORDS:
+                    continue
+                buckets.setdefault((keyword, result.feedback_source, day), []).append(result.feedback_id)
+        return buckets
+
+    @staticmethod
+    def _build_statistics(counts: Dict[str, int]) -> dict:
+        """Turn per-sentiment counts into the statistics dict returned by all backends"""
+        stats = {sentiment: 0 for sentiment in SENTIMENTS}
+        stats.update(counts)
+        total = sum(counts.values())
+
+        if total > 0:
+            stats["total"] = total
+            stats["positive_percentage"] = (stats["positive"] / total) * 100
+            stats["negative_percentage"] = (stats["negative"] / total) * 100
+            stats["neutral_percentage"] = (stats["neutral"] / total) * 100
+
+        return stats
+
+
+def create_repository(config: Config, logger: logging.Logger) -> FeedbackAnalysisRepository:
+    """Create the repository backend selected by storage.backend"""
+    backend = config.storage.backend
+
+    if backend == "mongo":
+        from internal.feedback_analysis.repository.mongo_repository import MongoFeedbackAnalysisRepository
+        return MongoFeedbackAnalysisRepository(config, logger)
+    if backend == "memory":
+        from internal.feedback_analysis.repository.memory_repository import InMemoryFeedbackAnalysisRepository
+        return InMemoryFeedbackAnalysisRepository(config, logger)
+    if backend == "sqlite":
+        from internal.feedback_analysis.repository.sqlite_repository import SqliteFeedbackAnalysisRepository
+        return SqliteFeedbackAnalysisRepository(config, logger)
+
+    raise ValueError(f"Unknown storage backend: {backend}")
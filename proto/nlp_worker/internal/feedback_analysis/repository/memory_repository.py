@@ -0,0 +1,150 @@
+import dataclasses
+import logging
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.repository.feedback_analysis_repository import FeedbackAnalysisRepository
+from config.config import Config
+
+
+class _KeywordBucket:
+    __slots__ = ("count", "recent_feedback_ids")
+
+    def __init__(self, recent_limit: int):
+        self.count = 0
+        self.recent_feedback_ids: Deque[str] = deque(maxlen=recent_limit)
+
+
+class InMemoryFeedbackAnalysisRepository(FeedbackAnalysisRepository):
+    """Process-local repository with the same query semantics as the Mongo backend
+
+    Intended for benchmarks, load tests and tests that must run without services.
+    """
+
+    def __init__(self, config: Config, logger: logging.Logger):
+        super().__init__(config, logger)
+        self._results: Dict[str, FeedbackAnalysisResult] = {}
+        self._keywords: Dict[Tuple[str, str, datetime], _KeywordBucket] = {}
+        self._lock = threading.RLock()
+
+    def save_analysis_result(self, result: FeedbackAnalysisResult) -> bool:
+        """Save feedback analysis result in memory"""
+        # Store a copy so later mutation by the caller does not leak into storage
+        stored = dataclasses.replace(result)
+        with self._lock:
+            is_new = result.feedback_id not in self._results
+            self._results[result.feedback_id] = stored
+            if is_new:
+                self._index_keywords([result])
+        return True
+
+    def save_analysis_results(self, results: List[FeedbackAnalysisResult]) -> List[str]:
+        """Save a batch of results in memory"""
+        with self._lock:
+            new_results = []
+            for result in results:
+                if result.feedback_id not in self._results:
+                    new_results.append(result)
+                self._results[result.feedback_id] = dataclasses.replace(result)
+            self._index_keywords(new_results)
+        return []
+
+    def get_analysis_result(self, feedback_id: str) -> Optional[FeedbackAnalysisResult]:
+        """Get analysis result by feedback ID"""
+        with self._lock:
+            result = self._results.get(feedback_id)
+        return dataclasses.replace(result) if result is not None else None
+
+    def get_analysis_history(self, feedback_source: Optional[str] = None, limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """Get analysis history with optional filtering, newest first"""
+        with self._lock:
+            results = [
+                result for result in self._results.values()
+                if not feedback_source or result.feedback_source == feedback_source
+            ]
+        results.sort(key=lambda result: result.created_at, reverse=True)
+        return [dataclasses.replace(result) for result in results[:limit]]
+
+    def list_analyses(self, feedback_source: Optional[str] = None, after: Optional[Tuple[datetime, str]] = None,
+                      limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """List results newest first by (created_at, feedback_id), starting after the given keyset position"""
+        with self._lock:
+            results = [
+                result for result in self._results.values()
+                if (not feedback_source or result.feedback_source == feedback_source)
+                and (after is None or (result.created_at, result.feedback_id) < after)
+            ]
+        results.sort(key=lambda result: (result.created_at, result.feedback_id), reverse=True)
+        return [dataclasses.replace(result) for result in results[:limit]]
+
+    def get_sentiment_statistics(self, feedback_source: Optional[str] = None) -> dict:
+        """Get sentiment statistics"""
+        with self._lock:
+            counts = Counter(
+                result.sentiment for result in self._results.values()
+                if not feedback_source or result.feedback_source == feedback_source
+            )
+        return self._build_statistics(dict(counts))
+
+    def get_top_keywords(self, since: datetime, until: Optional[datetime] = None,
+                         feedback_source: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """Get the most frequent keywords for feedback created between since and until at day granularity
+
+        Both bounds are widened to whole days: since down to the start of its day and until
+        up to the next day boundary, so the day containing until is counted.
+        """
+        start = self._day_bucket(since)
+        end = self._day_ceiling(until) if until else None
+        counts: Counter = Counter()
+        with self._lock:
+            for (keyword, source, day), bucket in self._keywords.items():
+                if day < start or (end and day >= end):
+                    continue
+                if feedback_source and source != feedback_source:
+                    continue
+                counts[keyword] += bucket.count
+
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        return [{"keyword": keyword, "count": count} for keyword, count in ranked[:limit]]
+
+    def get_feedback_by_keyword(self, keyword: str, feedback_source: Optional[str] = None,
+                                limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """Get the most recent feedback containing the keyword using the inverted index"""
+        keyword = keyword.strip().lower()
+        with self._lock:
+            buckets = sorted(
+                ((day, bucket) for (kw, source, day), bucket in self._keywords.items()
+                 if kw == keyword and (not feedback_source or source == feedback_source)),
+                key=lambda item: item[0],
+                reverse=True,
+            )
+
+            feedback_ids: List[str] = []
+            for _, bucket in buckets:
+                for feedback_id in reversed(bucket.recent_feedback_ids):
+                    if feedback_id not in feedback_ids:
+                        feedback_ids.append(feedback_id)
+                if len(feedback_ids) >= limit:
+                    break
+
+            results = [self._results[feedback_id] for feedback_id in feedback_ids[:limit] if feedback_id in self._results]
+
+        results.sort(key=lambda result: result.created_at, reverse=True)
+        return [dataclasses.replace(result) for result in results]
+
+    def delete_analysis_result(self, feedback_id: str) -> bool:
+        """Delete analysis result by feedback ID"""
+        with self._lock:
+            return self._results.pop(feedback_id, None) is not None
+
+    def _index_keywords(self, results: List[FeedbackAnalysisResult]):
+        recent_limit = self.config.mongo.keywordRecentIds
+        for key, feedback_ids in self._keyword_buckets(results).items():
+            bucket = self._keywords.get(key)
+            if bucket is None:
+                bucket = self._keywords[key] = _KeywordBucket(recent_limit)
+            bucket.count += len(feedback_ids)
+            bucket.recent_feedback_ids.extend(feedback_ids)
@@ -0,0 +1,374 @@
+import logging
+from typing import List, Optional, Tuple
+from datetime import datetime
+import pymongo
+from pymongo import MongoClient, UpdateOne
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError
+from bson.binary import Binary
+
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult, split_keywords
+from internal.feedback_analysis.models.text_compression import CompressedText
+from internal.feedback_analysis.repository.feedback_analysis_repository import FeedbackAnalysisRepository
+from config.config import Config
+
+
+class MongoFeedbackAnalysisRepository(FeedbackAnalysisRepository):
+    """MongoDB repository for storing and retrieving feedback analysis results"""
+    
+    def __init__(self, config: Config, logger: logging.Logger):
+        super().__init__(config, logger)
+        self.client: Optional[MongoClient] = None
+        self.db: Optional[Database] = None
+        self.collection: Optional[Collection] = None
+        self.keywords_collection: Optional[Collection] = None
+        
+        self._initialize_connection()
+    
+    def _initialize_connection(self):
+        """Initialize MongoDB connection"""
+        try:
+            # Create MongoDB client
+            if self.config.mongo.user and self.config.mongo.password:
+                connection_string = f"mongodb://{self.config.mongo.user}:{self.config.mongo.password}@{self.config.mongo.uri.replace('mongodb://', '')}"
+            else:
+                connection_string = self.config.mongo.uri
+            
+            self.client = MongoClient(connection_string)
+            self.db = self.client[self.config.mongo.db]
+            self.collection = self.db[self.config.mongo.collections.feedback_analysis]
+            
+            # Create indexes for better performance (documents are keyed by _id = feedback_id)
+            self.collection.create_index([("feedback_source", pymongo.ASCENDING)])
+            self.collection.create_index([("sentiment", pymongo.ASCENDING)])
+            self.collection.create_index([("created_at", pymongo.DESCENDING)])
+            # Keyset paging for list_analyses, with and without a source filter
+            self.collection.create_index([("created_at", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)])
+            self.collection.create_index([
+                ("feedback_source", pymongo.ASCENDING),
+                ("created_at", pymongo.DESCENDING),
+                ("_id", pymongo.DESCENDING),
+            ])
+
+            # Inverted keyword index: one document per keyword/source/day
+            self.keywords_collection = self.db[self.config.mongo.collections.keywords]
+            self.keywords_collection.create_index([
+                ("keyword", pymongo.ASCENDING),
+                ("day", pymongo.DESCENDING),
+            ])
+            self.keywords_collection.create_index([
+                ("day", pymongo.DESCENDING),
+                ("feedback_source", pymongo.ASCENDING),
+            ])
+            
+            self.logger.info("MongoDB connection established successfully")
+            
+        except Exception as e:
+            self.logger.error(f"Failed to connect to MongoDB: {e}")
+            raise
+    
+    def save_analysis_result(self, result: FeedbackAnalysisResult) -> bool:
+        """Save feedback analysis result to database"""
+        try:
+            update_result = self.collection.update_one(
+                {"_id": result.feedback_id},
+                self._to_update(result),
+                upsert=True
+            )
+
+            # Only count keywords once per feedback, redeliveries just overwrite the document
+            if update_result.upserted_id is not None:
+                self._index_keywords([result])
+
+            self.logger.debug(f"Saved analysis result for feedback {result.feedback_id}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Failed to save analysis result: {e}")
+            return False
+
+    def save_analysis_results(self, results: List[FeedbackAnalysisResult]) -> List[str]:
+        """Save a batch of results with a single unordered bulk write"""
+        if not results:
+            return []
+
+        operations = [
+            UpdateOne({"_id": result.feedback_id}, self._to_update(result), upsert=True)
+            for result in results
+        ]
+
+        try:
+            bulk_result = self.collection.bulk_write(operations, ordered=False)
+            failed_indexes = set()
+            upserted_indexes = set(bulk_result.upserted_ids)
+        except BulkWriteError as e:
+            # Unordered writes keep going past failures, so only the reported items are lost
+            failed_indexes = {error["index"] for error in e.details.get("writeErrors", [])}
+            upserted_indexes = {item["index"] for item in e.details.get("upserted", [])}
+            self.logger.error(f"Failed to save {len(failed_indexes)} of {len(results)} analysis results: {e}")
+        except Exception as e:
+            self.logger.error(f"Failed to save analysis results: {e}")
+            return [result.feedback_id for result in results]
+
+        self._index_keywords([results[index] for index in sorted(upserted_indexes)])
+
+        self.logger.debug(f"Saved {len(results) - len(failed_indexes)} analysis results")
+        return [results[index].feedback_id for index in sorted(failed_indexes)]
+    
+    def get_analysis_result(self, feedback_id: str) -> Optional[FeedbackAnalysisResult]:
+        """Get analysis result by feedback ID"""
+        try:
+            result_dict = self.collection.find_one({"_id": feedback_id})
+
+            if result_dict:
+                return self._to_result(result_dict)
+
+            return None
+
+        except Exception as e:
+            self.logger.error(f"Failed to get analysis result: {e}")
+            return None
+    
+    def get_analysis_history(self, feedback_source: Optional[str] = None, limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """Get analysis history with optional filtering"""
+        try:
+            # Build query
+            query = {}
+            if feedback_source:
+                query["feedback_source"] = feedback_source
+            
+            # Execute query
+            cursor = self.collection.find(query).sort("created_at", -1).limit(limit)
+            
+            results = []
+            for result_dict in cursor:
+                results.append(self._to_result(result_dict))
+            
+            return results
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get analysis history: {e}")
+            return []
+    
+    def list_analyses(self, feedback_source: Optional[str] = None, after: Optional[Tuple[datetime, str]] = None,
+                      limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """List results newest first by (created_at, feedback_id) using a keyset query"""
+        try:
+            query = {}
+            if feedback_source:
+                query["feedback_source"] = feedback_source
+            if after is not None:
+                # created_at is stored in isoformat, which sorts chronologically as a string
+                created_at = after[0].isoformat()
+                query["$or"] = [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "_id": {"$lt": after[1]}},
+                ]
+
+            cursor = self.collection.find(query).sort([("created_at", -1), ("_id", -1)]).limit(limit)
+            return [self._to_result(result_dict) for result_dict in cursor]
+
+        except Exception as e:
+            self.logger.error(f"Failed to list analysis results: {e}")
+            return []
+
+    def get_sentiment_statistics(self, feedback_source: Optional[str] = None) -> dict:
+        """Get sentiment statistics using MongoDB aggregation"""
+        try:
+            # Build match stage
+            match_stage = {}
+            if feedback_source:
+                match_stage["feedback_source"] = feedback_source
+            
+            # Aggregation pipeline
+            pipeline = [
+                {"$match": match_stage} if match_stage else {"$match": {}},
+                {
+                    "$group": {
+                        "_id": "$sentiment",
+                        "count": {"$sum": 1}
+                    }
+                }
+            ]
+            
+            # Execute aggregation
+            sentiment_counts = list(self.collection.aggregate(pipeline))
+            
+            counts = {item["_id"]: item["count"] for item in sentiment_counts}
+            stats = self._build_statistics(counts)
+            
+            return stats
+            
+        except Exception as e:
+            self.logger.error(f"Failed to get sentiment statistics: {e}")
+            return {"positive": 0, "negative": 0, "neutral": 0, "total": 0}
+    
+    def get_top_keywords(self, since: datetime, until: Optional[datetime] = None,
+                         feedback_source: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """Get the most frequent keywords for feedback created between since and until at day granularity
+
+        Both bounds are widened to whole days: since down to the start of its day and until
+        up to the next day boundary, so the day containing until is counted.
+        """
+        try:
+            day_range = {"$gte": self._day_bucket(since)}
+            if until:
+                day_range["$lt"] = self._day_ceiling(until)
+
+            match_stage = {"day": day_range}
+            if feedback_source:
+                match_stage["feedback_source"] = feedback_source
+
+            pipeline = [
+                {"$match": match_stage},
+                {"$group": {"_id": "$keyword", "count": {"$sum": "$count"}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": limit},
+            ]
+
+            return [
+                {"keyword": item["_id"], "count": item["count"]}
+                for item in self.keywords_collection.aggregate(pipeline)
+            ]
+
+        except Exception as e:
+            self.logger.error(f"Failed to get top keywords: {e}")
+            return []
+
+    def get_feedback_by_keyword(self, keyword: str, feedback_source: Optional[str] = None,
+                                limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """Get the most recent feedback containing the keyword using the inverted index"""
+        try:
+            query = {"keyword": keyword.strip().lower()}
+            if feedback_source:
+                query["feedback_source"] = feedback_source
+
+            # Walk index buckets from the newest day until enough IDs are collected
+            feedback_ids: List[str] = []
+            cursor = self.keywords_collection.find(query, {"recent_feedback_ids": 1}).sort("day", -1)
+            for bucket in cursor:
+                for feedback_id in reversed(bucket.get("recent_feedback_ids", [])):
+                    if feedback_id not in feedback_ids:
+                        feedback_ids.append(feedback_id)
+                if len(feedback_ids) >= limit:
+                    break
+
+            if not feedback_ids:
+                return []
+
+            cursor = self.collection.find({"_id": {"$in": feedback_ids[:limit]}}).sort("created_at", -1)
+            return [self._to_result(result_dict) for result_dict in cursor]
+
+        except Exception as e:
+            self.logger.error(f"Failed to get feedback by keyword: {e}")
+            return []
+
+    def delete_analysis_result(self, feedback_id: str) -> bool:
+        """Delete analysis result by feedback ID"""
+        try:
+            result = self.collection.delete_one({"_id": feedback_id})
+            return result.deleted_count > 0
+            
+        except Exception as e:
+            self.logger.error(f"Failed to delete analysis result: {e}")
+            return False
+    
+    def _index_keywords(self, results: List[FeedbackAnalysisResult]):
+        """Upsert keyword counters and recent feedback IDs in a single bulk write"""
+        buckets = self._keyword_buckets(results)
+        if not buckets:
+            return
+
+        recent_limit = self.config.mongo.keywordRecentIds
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": f"{keyword}|{feedback_source}|{day.date().isoformat()}"},
+                {
+                    "$setOnInsert": {"keyword": keyword, "feedback_source": feedback_source, "day": day},
+                    "$inc": {"count": len(feedback_ids)},
+                    "$push": {"recent_feedback_ids": {"$each": feedback_ids, "$slice": -recent_limit}},
+                    "$set": {"updated_at": now},
+                },
+                upsert=True,
+            )
+            for (keyword, feedback_source, day), feedback_ids in buckets.items()
+        ]
+
+        try:
+            self.keywords_collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            # The analysis document is already stored, a stale index is not fatal
+            self.logger.warning(f"Failed to update keyword index: {e}")
+
+    def _to_update(self, result: FeedbackAnalysisResult) -> dict:
+        """Build the upsert update for a result keyed by _id"""
+        # Convert to dictionary, storing text compressed when configured
+        result_dict, unset = self._to_document(result)
+
+        # Store keywords as a real list, FeedbackAnalysisResult joins them back on read
+        result_dict["keywords"] = split_keywords(result_dict.get("keywords"))
+
+        # Используем _id
+        result_dict["_id"] = result.feedback_id
+        result_dict.pop("feedback_id", None)
+
+        update = {"$set": result_dict}
+        if unset:
+            update["$unset"] = {unset: ""}
+        return update
+
+    def _to_document(self, result: FeedbackAnalysisResult) -> Tuple[dict, str]:
+        """Convert a result to a document and name the text field it replaces"""
+        compressed = None
+        if self.text_compressor.enabled:
+            if result.compressed_text is not None:
+                compressed = result.compressed_text.data
+            else:
+                compressed = self.text_compressor.compress(result.get_text())
+
+        if compressed is None:
+            return result.to_dict(), "text_z"
+
+        # Build the dict without to_dict() so lazily compressed text is never decompressed
+        result_dict = {
+            "feedback_id": result.feedback_id,
+            "feedback_source": result.feedback_source,
+            "text_z": Binary(compressed),
+            "created_at": result.created_at.isoformat(),
+            "keywords": result.keywords,
+            "sentiment": result.sentiment,
+            "analyzed_at": result.analyzed_at.isoformat(),
+        }
+        return result_dict, "text"
+
+    def _to_result(self, result_dict: dict) -> FeedbackAnalysisResult:
+        """Restore the domain model from a stored document keyed by _id"""
+        result_dict["feedback_id"] = result_dict.pop("_id", result_dict.get("feedback_id"))
+
+        compressed = result_dict.pop("text_z", None)
+        if compressed is None:
+            return FeedbackAnalysisResult.from_dict(result_dict)
+
+        result_dict["text"] = None
+        result = FeedbackAnalysisResult.from_dict(result_dict)
+        result.compressed_text = CompressedText(bytes(compressed), self.text_compressor)
+        return result
+
+    def ping(self) -> bool:
+        """Check that MongoDB answers a ping"""
+        if not self.client:
+            return False
+        try:
+            self.client.admin.command("ping")
+            return True
+        except Exception as e:
+            self.logger.warning(f"MongoDB ping failed: {e}")
+            return False
+
+    def close_connection(self):
+        """Close MongoDB connection"""
+        if self.client:
+            self.client.close()
+            self.logger.info("MongoDB connection closed")
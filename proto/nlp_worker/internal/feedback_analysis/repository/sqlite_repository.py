@@ -0,0 +1,352 @@
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult, split_keywords
+from internal.feedback_analysis.models.text_compression import CompressedText
+from internal.feedback_analysis.repository.feedback_analysis_repository import FeedbackAnalysisRepository
+from config.config import Config
+
+
+# Fixed-width ISO format so timestamps compare correctly as strings
+_TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS feedback_analysis (
+    feedback_id TEXT PRIMARY KEY,
+    feedback_source TEXT NOT NULL,
+    text TEXT,
+    text_z BLOB,
+    created_at TEXT NOT NULL,
+    keywords TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    analyzed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_feedback_analysis_source ON feedback_analysis (feedback_source);
+CREATE INDEX IF NOT EXISTS idx_feedback_analysis_sentiment ON feedback_analysis (sentiment);
+CREATE INDEX IF NOT EXISTS idx_feedback_analysis_created_at ON feedback_analysis (created_at DESC, feedback_id DESC);
+CREATE INDEX IF NOT EXISTS idx_feedback_analysis_source_created_at
+    ON feedback_analysis (feedback_source, created_at DESC, feedback_id DESC);
+
+CREATE TABLE IF NOT EXISTS keyword_index (
+    keyword TEXT NOT NULL,
+    feedback_source TEXT NOT NULL,
+    day TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    recent_feedback_ids TEXT NOT NULL,
+    PRIMARY KEY (keyword, feedback_source, day)
+);
+CREATE INDEX IF NOT EXISTS idx_keyword_index_day ON keyword_index (day DESC, feedback_source);
+"""
+
+_RESULT_COLUMNS = "feedback_id, feedback_source, text, text_z, created_at, keywords, sentiment, analyzed_at"
+
+_UPSERT_RESULT = f"INSERT OR REPLACE INTO feedback_analysis ({_RESULT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _format_timestamp(value: datetime) -> str:
+    return value.strftime(_TIMESTAMP_FORMAT)
+
+
+class SqliteFeedbackAnalysisRepository(FeedbackAnalysisRepository):
+    """Embedded SQLite repository with the same query semantics as the Mongo backend"""
+
+    def __init__(self, config: Config, logger: logging.Logger):
+        super().__init__(config, logger)
+        self.path = config.storage.sqlitePath
+        # One connection shared by gRPC and Kafka threads, serialized by the lock
+        self._lock = threading.RLock()
+        self.connection: Optional[sqlite3.Connection] = None
+
+        self._initialize_connection()
+
+    def _initialize_connection(self):
+        """Open the database file and create the schema"""
+        try:
+            self.connection = sqlite3.connect(self.path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(_SCHEMA)
+            self.connection.commit()
+
+            self.logger.info(f"SQLite database {self.path} opened successfully")
+
+        except Exception as e:
+            self.logger.error(f"Failed to open SQLite database: {e}")
+            raise
+
+    def save_analysis_result(self, result: FeedbackAnalysisResult) -> bool:
+        """Save feedback analysis result to database"""
+        try:
+            row = self._to_row(result)
+
+            with self._lock, self.connection:
+                is_new = self.connection.execute(
+                    "SELECT 1 FROM feedback_analysis WHERE feedback_id = ?", (result.feedback_id,)
+                ).fetchone() is None
+                self.connection.execute(_UPSERT_RESULT, row)
+                # Only count keywords once per feedback, redeliveries just overwrite the row
+                if is_new:
+                    self._index_keywords([result])
+
+            self.logger.debug(f"Saved analysis result for feedback {result.feedback_id}")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Failed to save analysis result: {e}")
+            return False
+
+    def save_analysis_results(self, results: List[FeedbackAnalysisResult]) -> List[str]:
+        """Save a batch of results in a single transaction"""
+        if not results:
+            return []
+
+        try:
+            rows = [self._to_row(result) for result in results]
+
+            with self._lock, self.connection:
+                existing = self._existing_ids([result.feedback_id for result in results])
+                new_results = []
+                for result in results:
+                    if result.feedback_id not in existing:
+                        existing.add(result.feedback_id)
+                        new_results.append(result)
+
+                self.connection.executemany(_UPSERT_RESULT, rows)
+                self._index_keywords(new_results)
+
+            self.logger.debug(f"Saved {len(results)} analysis results")
+            return []
+
+        except Exception as e:
+            self.logger.error(f"Failed to save analysis results: {e}")
+            return [result.feedback_id for result in results]
+
+    def get_analysis_result(self, feedback_id: str) -> Optional[FeedbackAnalysisResult]:
+        """Get analysis result by feedback ID"""
+        try:
+            with self._lock:
+                row = self.connection.execute(
+                    f"SELECT {_RESULT_COLUMNS} FROM feedback_analysis WHERE feedback_id = ?", (feedback_id,)
+                ).fetchone()
+
+            return self._to_result(row) if row else None
+
+        except Exception as e:
+            self.logger.error(f"Failed to get analysis result: {e}")
+            return None
+
+    def get_analysis_history(self, feedback_source: Optional[str] = None, limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """Get analysis history with optional filtering"""
+        try:
+            query = f"SELECT {_RESULT_COLUMNS} FROM feedback_analysis"
+            params: list = []
+            if feedback_source:
+                query += " WHERE feedback_source = ?"
+                params.append(feedback_source)
+            query += " ORDER BY created_at DESC LIMIT ?"
+            params.append(limit)
+
+            with self._lock:
+                rows = self.connection.execute(query, params).fetchall()
+
+            return [self._to_result(row) for row in rows]
+
+        except Exception as e:
+            self.logger.error(f"Failed to get analysis history: {e}")
+            return []
+
+    def list_analyses(self, feedback_source: Optional[str] = None, after: Optional[Tuple[datetime, str]] = None,
+                      limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """List results newest first by (created_at, feedback_id), starting after the given keyset position"""
+        try:
+            query = f"SELECT {_RESULT_COLUMNS} FROM feedback_analysis"
+            conditions, params = [], []
+            if feedback_source:
+                conditions.append("feedback_source = ?")
+                params.append(feedback_source)
+            if after is not None:
+                conditions.append("(created_at, feedback_id) < (?, ?)")
+                params.extend([_format_timestamp(after[0]), after[1]])
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY created_at DESC, feedback_id DESC LIMIT ?"
+            params.append(limit)
+
+            with self._lock:
+                rows = self.connection.execute(query, params).fetchall()
+
+            return [self._to_result(row) for row in rows]
+
+        except Exception as e:
+            self.logger.error(f"Failed to list analysis results: {e}")
+            return []
+
+    def get_sentiment_statistics(self, feedback_source: Optional[str] = None) -> dict:
+        """Get sentiment statistics using GROUP BY"""
+        try:
+            query = "SELECT sentiment, COUNT(*) FROM feedback_analysis"
+            params: list = []
+            if feedback_source:
+                query += " WHERE feedback_source = ?"
+                params.append(feedback_source)
+            query += " GROUP BY sentiment"
+
+            with self._lock:
+                counts = dict(self.connection.execute(query, params).fetchall())
+
+            return self._build_statistics(counts)
+
+        except Exception as e:
+            self.logger.error(f"Failed to get sentiment statistics: {e}")
+            return {"positive": 0, "negative": 0, "neutral": 0, "total": 0}
+
+    def get_top_keywords(self, since: datetime, until: Optional[datetime] = None,
+                         feedback_source: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """Get the most frequent keywords for feedback created between since and until at day granularity
+
+        Both bounds are widened to whole days: since down to the start of its day and until
+        up to the next day boundary, so the day containing until is counted.
+        """
+        try:
+            query = "SELECT keyword, SUM(count) AS total FROM keyword_index WHERE day >= ?"
+            params: list = [_format_timestamp(self._day_bucket(since))]
+            if until:
+                query += " AND day < ?"
+                params.append(_format_timestamp(self._day_ceiling(until)))
+            if feedback_source:
+                query += " AND feedback_source = ?"
+                params.append(feedback_source)
+            query += " GROUP BY keyword ORDER BY total DESC, keyword ASC LIMIT ?"
+            params.append(limit)
+
+            with self._lock:
+                rows = self.connection.execute(query, params).fetchall()
+
+            return [{"keyword": keyword, "count": count} for keyword, count in rows]
+
+        except Exception as e:
+            self.logger.error(f"Failed to get top keywords: {e}")
+            return []
+
+    def get_feedback_by_keyword(self, keyword: str, feedback_source: Optional[str] = None,
+                                limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """Get the most recent feedback containing the keyword using the inverted index"""
+        try:
+            query = "SELECT recent_feedback_ids FROM keyword_index WHERE keyword = ?"
+            params: list = [keyword.strip().lower()]
+            if feedback_source:
+                query += " AND feedback_source = ?"
+                params.append(feedback_source)
+            query += " ORDER BY day DESC"
+
+            with self._lock:
+                # Walk index buckets from the newest day until enough IDs are collected
+                feedback_ids: List[str] = []
+                for (recent_feedback_ids,) in self.connection.execute(query, params):
+                    for feedback_id in reversed(json.loads(recent_feedback_ids)):
+                        if feedback_id not in feedback_ids:
+                            feedback_ids.append(feedback_id)
+                    if len(feedback_ids) >= limit:
+                        break
+
+                if not feedback_ids:
+                    return []
+
+                feedback_ids = feedback_ids[:limit]
+                placeholders = ", ".join("?" * len(feedback_ids))
+                rows = self.connection.execute(
+                    f"SELECT {_RESULT_COLUMNS} FROM feedback_analysis "
+                    f"WHERE feedback_id IN ({placeholders}) ORDER BY created_at DESC",
+                    feedback_ids,
+                ).fetchall()
+
+            return [self._to_result(row) for row in rows]
+
+        except Exception as e:
+            self.logger.error(f"Failed to get feedback by keyword: {e}")
+            return []
+
+    def delete_analysis_result(self, feedback_id: str) -> bool:
+        """Delete analysis result by feedback ID"""
+        try:
+            with self._lock, self.connection:
+                cursor = self.connection.execute(
+                    "DELETE FROM feedback_analysis WHERE feedback_id = ?", (feedback_id,)
+                )
+            return cursor.rowcount > 0
+
+        except Exception as e:
+            self.logger.error(f"Failed to delete analysis result: {e}")
+            return False
+
+    def _index_keywords(self, results: List[FeedbackAnalysisResult]):
+        """Update keyword counters and recent feedback IDs; called inside the save transaction"""
+        recent_limit = self.config.mongo.keywordRecentIds
+        for (keyword, feedback_source, day), feedback_ids in self._keyword_buckets(results).items():
+            key = (keyword, feedback_source, _format_timestamp(day))
+            row = self.connection.execute(
+                "SELECT count, recent_feedback_ids FROM keyword_index "
+                "WHERE keyword = ? AND feedback_source = ? AND day = ?",
+                key,
+            ).fetchone()
+
+            count, recent = (row[0], json.loads(row[1])) if row else (0, [])
+            recent = (recent + feedback_ids)[-recent_limit:]
+            self.connection.execute(
+                "INSERT OR REPLACE INTO keyword_index (keyword, feedback_source, day, count, recent_feedback_ids) "
+                "VALUES (?, ?, ?, ?, ?)",
+                key + (count + len(feedback_ids), json.dumps(recent)),
+            )
+
+    def _existing_ids(self, feedback_ids: List[str]) -> set:
+        placeholders = ", ".join("?" * len(feedback_ids))
+        rows = self.connection.execute(
+            f"SELECT feedback_id FROM feedback_analysis WHERE feedback_id IN ({placeholders})", feedback_ids
+        )
+        return {feedback_id for (feedback_id,) in rows}
+
+    def _to_row(self, result: FeedbackAnalysisResult) -> tuple:
+        """Build a feedback_analysis row, storing text compressed when configured"""
+        compressed = None
+        if self.text_compressor.enabled:
+            if result.compressed_text is not None:
+                compressed = result.compressed_text.data
+            else:
+                compressed = self.text_compressor.compress(result.get_text())
+
+        return (
+            result.feedback_id,
+            result.feedback_source,
+            result.get_text() if compressed is None else None,
+            compressed,
+            _format_timestamp(result.created_at),
+            # Same comma-joined form the service produces and the codec restores
+            ", ".join(split_keywords(result.keywords)),
+            result.sentiment,
+            _format_timestamp(result.analyzed_at),
+        )
+
+    def _to_result(self, row: tuple) -> FeedbackAnalysisResult:
+        """Restore the domain model from a feedback_analysis row"""
+        feedback_id, feedback_source, text, text_z, created_at, keywords, sentiment, analyzed_at = row
+        return FeedbackAnalysisResult(
+            feedback_id=feedback_id,
+            feedback_source=feedback_source,
+            text=text,
+            created_at=datetime.fromisoformat(created_at),
+            keywords=keywords,
+            sentiment=sentiment,
+            analyzed_at=datetime.fromisoformat(analyzed_at),
+            compressed_text=CompressedText(bytes(text_z), self.text_compressor) if text_z is not None else None,
+        )
+
+    def close_connection(self):
+        """Close the SQLite connection"""
+        if self.connection:
+            with self._lock:
+                self.connection.close()
+            self.logger.info("SQLite connection closed")
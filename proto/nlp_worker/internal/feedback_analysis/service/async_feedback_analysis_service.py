@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from internal.feedback_analysis.models.feedback_analysis import (
+    FeedbackAnalysisBatchError, FeedbackAnalysisRequest, FeedbackAnalysisResult
+)
+from internal.feedback_analysis.service.feedback_analysis_service import FeedbackAnalysisService
+from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
+from internal.server.admission import AdmissionController, AdmissionTicket, DeadlineExpired
+from internal.tracing.tracing import tracer
+from config.config import Config
+
+
+class AsyncFeedbackAnalysisService:
+    """Asyncio facade over FeedbackAnalysisService for the grpc.aio server
+
+    Analysis runs on a bounded CPU pool and persistence on a separate IO pool, so a
+    slow database write never occupies a worker that could be analyzing, and neither
+    blocks the event loop that accepts new RPCs.
+    """
+
+    def __init__(self, config: Config, metrics: NlpWorkerMetrics, logger: logging.Logger, service: FeedbackAnalysisService,
+                 admission: Optional[AdmissionController] = None):
+        self.config = config
+        self.metrics = metrics
+        self.logger = logger
+        self.service = service
+        self.admission = admission
+        self.analysis_executor = ThreadPoolExecutor(
+            max_workers=config.grpc.analysisWorkers, thread_name_prefix="analysis"
+        )
+        self.persistence_executor = ThreadPoolExecutor(
+            max_workers=config.grpc.persistenceWorkers, thread_name_prefix="persistence"
+        )
+
+    async def analyze_feedback(self, feedback_id: str, feedback_source: str, text: str, created_at: datetime,
+                               persist: bool = True, ticket: Optional[AdmissionTicket] = None) -> FeedbackAnalysisResult:
+        """Analyze feedback text and persist the result unless persist is False
+
+        Raises DeadlineExpired if the ticket's deadline passes before an analysis worker picks it up.
+        A caller that joins an identical request in flight waits for it without holding queue capacity.
+        """
+        if not persist:
+            return await self._analyze(feedback_id, feedback_source, text, created_at, ticket)
+
+        shared = False
+
+        def joined():
+            nonlocal shared
+            shared = True
+            # The leader's ticket pays for the analysis, a waiting follower holds no queue capacity
+            if ticket is not None:
+                self.admission.refund(ticket)
+
+        # Same single-flight table as the sync path, so gRPC retries and Kafka redeliveries coalesce too
+        key = self.service.feedback_key(feedback_id, text)
+        while True:
+            try:
+                result, shared = await self.service.inflight.do_async(
+                    key, self._analyze_and_save, feedback_id, feedback_source, text, created_at, ticket, on_join=joined
+                )
+                break
+            except DeadlineExpired:
+                # The shared work was dropped at the leader's deadline. A follower with time left,
+                # typically a retry carrying a fresh deadline, runs it again under its own ticket.
+                if not shared or ticket is None or ticket.expired():
+                    raise
+                self.admission.charge(ticket, 1)
+                shared = False
+
+        if shared:
+            self.metrics.coalesced_requests.labels("feedback").inc()
+        return result
+
+    async def _analyze(self, feedback_id: str, feedback_source: str, text: str, created_at: datetime,
+                       ticket: Optional[AdmissionTicket]) -> FeedbackAnalysisResult:
+        self._set_active(1)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.analysis_executor, tracer.wrap(self._run_admitted), ticket, 1,
+                self.service.analyze, feedback_id, feedback_source, text, created_at
+            )
+        finally:
+            self._set_active(-1)
+
+    async def _analyze_and_save(self, feedback_id: str, feedback_source: str, text: str, created_at: datetime,
+                                ticket: Optional[AdmissionTicket]) -> FeedbackAnalysisResult:
+        result = await self._analyze(feedback_id, feedback_source, text, created_at, ticket)
+
+        saved = await asyncio.get_running_loop().run_in_executor(
+            self.persistence_executor, tracer.wrap(self.service.save_analysis_result), result
+        )
+        if not saved:
+            self.logger.warning("Analysis result for feedback %s was not saved", feedback_id)
+        return result
+
+    async def analyze_feedback_batch(self, requests: List[FeedbackAnalysisRequest],
+                                     ticket: Optional[AdmissionTicket] = None) -> Tuple[List[Optional[FeedbackAnalysisResult]], List[FeedbackAnalysisBatchError]]:
+        """Analyze a batch of feedback and persist it with one bulk write"""
+        loop = asyncio.get_running_loop()
+        self._set_active(len(requests))
+        try:
+            results, errors = await loop.run_in_executor(
+                self.analysis_executor, tracer.wrap(self._run_admitted), ticket, len(requests), self.service.analyze_batch, requests
+            )
+        finally:
+            self._set_active(-len(requests))
+
+        persist = [request.persist for request in requests]
+        if not any(persist):
+            # Analyze-only batch, nothing to hand to the persistence pool
+            return results, errors
+        return await loop.run_in_executor(
+            self.persistence_executor, tracer.wrap(self.service.persist_batch), results, errors, persist
+        )
+
+    async def get_analysis_result(self, feedback_id: str) -> Optional[FeedbackAnalysisResult]:
+        """Get analysis result by feedback ID"""
+        return await self._read(self.service.get_analysis_result, feedback_id)
+
+    async def list_analyses(self, feedback_source: Optional[str] = None, after: Optional[Tuple[datetime, str]] = None,
+                            limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """List results newest first, starting after a keyset position"""
+        return await self._read(self.service.list_analyses, feedback_source, after, limit)
+
+    async def get_sentiment_statistics(self, feedback_source: Optional[str] = None) -> dict:
+        """Get sentiment statistics"""
+        return await self._read(self.service.get_sentiment_statistics, feedback_source)
+
+    def shutdown(self):
+        """Stop the executors after in-flight work completes"""
+        self.analysis_executor.shutdown(wait=True)
+        self.persistence_executor.shutdown(wait=True)
+
+    def _run_admitted(self, ticket: Optional[AdmissionTicket], items: int, func, *args):
+        # Runs on an analysis worker: drop work the caller stopped waiting for while it was queued
+        if ticket is not None:
+            ticket.check_deadline()
+
+        start = time.perf_counter()
+        result = func(*args)
+        if self.admission is not None:
+            self.admission.observe(time.perf_counter() - start, items)
+        return result
+
+    async def _read(self, func, *args):
+        # Reads are IO bound like writes and share the persistence pool
+        return await asyncio.get_running_loop().run_in_executor(self.persistence_executor, func, *args)
+
+    def _set_active(self, delta: int):
+        # Relative updates, the Kafka consumer adjusts the same gauge from its threads
+        self.metrics.add_active_requests(delta)
@@ -1,6 +1,7 @@
+import hashlib
 import logging
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
@@ -8,9 +9,15 @@ from nltk.stem import WordNetLemmatizer
 from collections import Counter
 import re
 import sys
+import time
 
-from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.models.feedback_analysis import (
+    FeedbackAnalysisBatchError, FeedbackAnalysisRequest, FeedbackAnalysisResult
+)
 from internal.feedback_analysis.repository.feedback_analysis_repository import FeedbackAnalysisRepository
+from internal.feedback_analysis.service.single_flight import SingleFlight
+from internal.profiling.profiler import request_profiler
+from internal.tracing.tracing import tracer
 from config.config import Config
 from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
 
@@ -21,6 +28,8 @@ class FeedbackAnalysisService:
         self.metrics = metrics
         self.logger = logger
         self.repository = mongo
+        # Shared by the Kafka consumer threads and the gRPC event loop
+        self.inflight = SingleFlight()
         
         # Initialize NLP models
         self._initialize_nlp_models()
@@ -44,6 +53,14 @@ class FeedbackAnalysisService:
                 self.logger.warning(f"spaCy not available, using NLTK only: {e}")
                 self.nlp = None
             
+            # Try to load TextBlob (optional), resolved once instead of an import attempt per text
+            self.text_blob = None
+            try:
+                from textblob import TextBlob
+                self.text_blob = TextBlob
+            except ImportError:
+                self.logger.warning("TextBlob not available, using rule-based sentiment analysis")
+            
             # Initialize NLTK components
             self.stop_words = set(stopwords.words('english'))
             self.lemmatizer = WordNetLemmatizer()
@@ -54,43 +71,162 @@ class FeedbackAnalysisService:
             self.logger.error(f"Failed to initialize NLP models: {e}")
             raise
     
-    def analyze_feedback(self, feedback_id: str, feedback_source: str, text: str, created_at: datetime) -> FeedbackAnalysisResult:
-        """Analyze feedback text and return sentiment and keywords"""
+    def analyze_feedback(self, feedback_id: str, feedback_source: str, text: str, created_at: datetime,
+                         persist: bool = True, path: str = "grpc") -> FeedbackAnalysisResult:
+        """Analyze feedback text and return sentiment and keywords
+
+        With persist=False the result is only computed, nothing is written. path labels the
+        stage timings with the entry point, "grpc" or "kafka".
+        """
         try:
-            self.logger.info(f"Starting analysis for feedback {feedback_id}")
-            
-            # Clean and preprocess text
-            cleaned_text = self._preprocess_text(text)
-            
-            # Extract sentiment
-            sentiment = self._analyze_sentiment(cleaned_text)
+            self.logger.debug("Starting analysis for feedback %s", feedback_id)
             
-            # Extract keywords
-            keywords = self._extract_keywords(cleaned_text)
+            if not persist:
+                return self.analyze(feedback_id, feedback_source, text, created_at, path)
             
-            # Create result
-            result = FeedbackAnalysisResult(
-                feedback_id=feedback_id,
-                feedback_source=feedback_source,
-                text=text,
-                created_at=created_at,
-                keywords=keywords,
-                sentiment=sentiment,
-                analyzed_at=datetime.utcnow()
+            # Retries and redeliveries of the same feedback share one analysis and one write
+            result, shared = self.inflight.do(
+                self.feedback_key(feedback_id, text), self._analyze_and_save, feedback_id, feedback_source, text, created_at, path
             )
-            
-            # Save to repository
-            print("Сохраняем в репозиторий результат анализа: ", result)
-            self.repository.save_analysis_result(result)
-            
-            self.logger.info(f"Analysis completed for feedback {feedback_id}: sentiment={sentiment}, keywords={keywords}")
+            if shared:
+                self.metrics.coalesced_requests.labels("feedback").inc()
             
             return result
             
         except Exception as e:
-            self.logger.error(f"Error analyzing feedback {feedback_id}: {e}")
+            self.logger.error("Error analyzing feedback %s: %s", feedback_id, e)
             raise
     
+    def _analyze_and_save(self, feedback_id: str, feedback_source: str, text: str, created_at: datetime,
+                          path: str) -> FeedbackAnalysisResult:
+        result = self.analyze(feedback_id, feedback_source, text, created_at, path)
+        sentiment, keywords = result.sentiment, result.keywords
+        
+        # Save to repository
+        self.save_analysis_result(result, path)
+        
+        self.logger.debug("Analysis completed for feedback %s: sentiment=%s, keywords=%s", feedback_id, sentiment, keywords)
+        return result
+
+    @staticmethod
+    def text_key(text: str) -> Tuple[str, bytes]:
+        """Single-flight key for the NLP work on a text"""
+        return "text", hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    @classmethod
+    def feedback_key(cls, feedback_id: str, text: str) -> Tuple[str, str, bytes]:
+        """Single-flight key for analyzing and saving one feedback"""
+        return "feedback", feedback_id, cls.text_key(text)[1]
+
+    def analyze_feedback_batch(self, requests: List[FeedbackAnalysisRequest],
+                               path: str = "grpc") -> Tuple[List[Optional[FeedbackAnalysisResult]], List[FeedbackAnalysisBatchError]]:
+        """Analyze a batch of feedback and persist it with one bulk write
+
+        Returns results aligned with requests (None for failed items) and the per-item errors.
+        """
+        results, errors = self.analyze_batch(requests, path)
+        return self.persist_batch(results, errors, [request.persist for request in requests], path)
+
+    def analyze_batch(self, requests: List[FeedbackAnalysisRequest],
+                      path: str = "grpc") -> Tuple[List[Optional[FeedbackAnalysisResult]], List[FeedbackAnalysisBatchError]]:
+        """Analyze a batch of feedback without persisting it"""
+        results: List[Optional[FeedbackAnalysisResult]] = []
+        errors: List[FeedbackAnalysisBatchError] = []
+
+        for index, request in enumerate(requests):
+            try:
+                results.append(self.analyze(request.feedback_id, request.feedback_source, request.text, request.created_at, path))
+            except Exception as e:
+                self.logger.error("Error analyzing feedback %s: %s", request.feedback_id, e)
+                results.append(None)
+                errors.append(FeedbackAnalysisBatchError(index, request.feedback_id, f"analysis failed: {e}"))
+
+        return results, errors
+
+    def persist_batch(self, results: List[Optional[FeedbackAnalysisResult]], errors: List[FeedbackAnalysisBatchError],
+                      persist: Optional[List[bool]] = None, path: str = "grpc") -> Tuple[List[Optional[FeedbackAnalysisResult]], List[FeedbackAnalysisBatchError]]:
+        """Bulk-save the analyzed items of a batch, turning save failures into per-item errors
+
+        persist, aligned with results, excludes analyze-only items from the write.
+        """
+        analyzed = [
+            result for index, result in enumerate(results)
+            if result is not None and (persist is None or persist[index])
+        ]
+        failed_ids = set()
+        if analyzed:
+            start = time.perf_counter()
+            with tracer.span("persist", attributes={"batch.size": len(analyzed)}):
+                failed_ids = set(self.repository.save_analysis_results(analyzed))
+            self.metrics.record_stage_duration("persist", path, time.perf_counter() - start)
+        if failed_ids:
+            for index, result in enumerate(results):
+                if result is not None and result.feedback_id in failed_ids:
+                    results[index] = None
+                    errors.append(FeedbackAnalysisBatchError(index, result.feedback_id, "failed to save analysis result"))
+            errors.sort(key=lambda error: error.index)
+
+        self.logger.debug("Batch analysis completed: %d succeeded, %d failed", len(results) - len(errors), len(errors))
+        return results, errors
+
+    def save_analysis_result(self, result: FeedbackAnalysisResult, path: str = "grpc") -> bool:
+        """Persist one analysis result, timed as the persist stage"""
+        start = time.perf_counter()
+        with tracer.span("persist"):
+            saved = self.repository.save_analysis_result(result)
+        self.metrics.record_stage_duration("persist", path, time.perf_counter() - start)
+        return saved
+
+    def analyze(self, feedback_id: str, feedback_source: str, text: str, created_at: datetime,
+                path: str = "grpc") -> FeedbackAnalysisResult:
+        """Run sentiment and keyword analysis without persisting the result"""
+        with tracer.span("analyze", attributes={"feedback.id": feedback_id, "feedback.source": feedback_source}):
+            # cProfile is only attached while a /debug/pprof/requests capture is armed
+            return request_profiler.run(self._analyze, feedback_id, feedback_source, text, created_at, path)
+
+    def _analyze(self, feedback_id: str, feedback_source: str, text: str, created_at: datetime,
+                 path: str) -> FeedbackAnalysisResult:
+        # Identical texts in flight at the same time share one NLP pass
+        (sentiment, keywords), shared = self.inflight.do(self.text_key(text), self._analyze_text, text, path)
+        if shared:
+            self.metrics.coalesced_requests.labels("text").inc()
+        
+        return FeedbackAnalysisResult(
+            feedback_id=feedback_id,
+            feedback_source=feedback_source,
+            text=text,
+            created_at=created_at,
+            keywords=keywords,
+            sentiment=sentiment,
+            analyzed_at=datetime.utcnow()
+        )
+    
+    def _analyze_text(self, text: str, path: str) -> Tuple[str, str]:
+        record = self.metrics.record_stage_duration
+        span = tracer.span
+        start = time.perf_counter()
+        
+        # Clean and preprocess text
+        with span("preprocess"):
+            cleaned_text = self._preprocess_text(text)
+        preprocessed = time.perf_counter()
+        record("preprocess", path, preprocessed - start)
+        
+        # Extract sentiment
+        with span("sentiment"):
+            sentiment = self._analyze_sentiment(cleaned_text)
+        sentiment_done = time.perf_counter()
+        record("sentiment", path, sentiment_done - preprocessed)
+        
+        # Extract keywords
+        with span("keywords"):
+            keywords = self._extract_keywords(cleaned_text)
+        end = time.perf_counter()
+        record("keywords", path, end - sentiment_done)
+        
+        self.metrics.record_feedback_analysis_duration(end - start, path)
+        return sentiment, keywords
+    
     def _preprocess_text(self, text: str) -> str:
         """Clean and preprocess text for analysis"""
         # Convert to lowercase
@@ -104,9 +240,11 @@ class FeedbackAnalysisService:
     
     def _analyze_sentiment(self, text: str) -> str:
         """Analyze sentiment using TextBlob or fallback to simple rules"""
+        if self.text_blob is None:
+            # Fallback to simple rule-based sentiment analysis
+            return self._simple_sentiment_analysis(text)
         try:
-            from textblob import TextBlob
-            blob = TextBlob(text)
+            blob = self.text_blob(text)
             polarity = blob.sentiment.polarity
             
             # Determine sentiment category
@@ -117,12 +255,8 @@ class FeedbackAnalysisService:
             else:
                 return "neutral"
                 
-        except ImportError:
-            # Fallback to simple rule-based sentiment analysis
-            self.logger.warning("TextBlob not available, using rule-based sentiment analysis")
-            return self._simple_sentiment_analysis(text)
         except Exception as e:
-            self.logger.warning(f"Error in sentiment analysis: {e}")
+            self.logger.warning("Error in sentiment analysis: %s", e)
             return "neutral"
     
     def _simple_sentiment_analysis(self, text: str) -> str:
@@ -168,30 +302,42 @@ class FeedbackAnalysisService:
             # Count frequency and get top keywords
             keyword_counts = Counter(keywords)
             top_keywords = [kw for kw, count in keyword_counts.most_common(self.config.nlp.max_keywords)]
+            self.metrics.record_keyword_count(len(top_keywords))
             
             return ", ".join(top_keywords) if top_keywords else "no_keywords"
             
         except Exception as e:
-            self.logger.warning(f"Error in keyword extraction: {e}")
+            self.logger.warning("Error in keyword extraction: %s", e)
             return "extraction_error"
     
     def get_analysis_history(self, feedback_source: Optional[str] = None, limit: int = 100) -> List[FeedbackAnalysisResult]:
         """Get analysis history with optional filtering"""
         return self.repository.get_analysis_history(feedback_source, limit)
     
+    def get_top_keywords(self, since: datetime, until: Optional[datetime] = None,
+                         feedback_source: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """Get the most frequent keywords in a time window of whole days"""
+        return self.repository.get_top_keywords(since, until, feedback_source, limit)
+
+    def get_feedback_by_keyword(self, keyword: str, feedback_source: Optional[str] = None,
+                                limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """Get recent feedback containing a keyword"""
+        return self.repository.get_feedback_by_keyword(keyword, feedback_source, limit)
+
+    def get_analysis_result(self, feedback_id: str) -> Optional[FeedbackAnalysisResult]:
+        """Get analysis result by feedback ID"""
+        return self.repository.get_analysis_result(feedback_id)
+
+    def list_analyses(self, feedback_source: Optional[str] = None, after: Optional[Tuple[datetime, str]] = None,
+                      limit: int = 100) -> List[FeedbackAnalysisResult]:
+        """List results newest first, starting after a keyset position"""
+        return self.repository.list_analyses(feedback_source, after, limit)
+
     def get_sentiment_statistics(self, feedback_source: Optional[str] = None) -> dict:
-        """Get sentiment statistics"""
-        results = self.get_analysis_history(feedback_source)
-        
-        sentiment_counts = {"positive": 0, "negative": 0, "neutral": 0}
-        for result in results:
-            sentiment_counts[result.sentiment] += 1
-        
-        total = len(results)
-        if total > 0:
-            sentiment_counts["total"] = total
-            sentiment_counts["positive_percentage"] = (sentiment_counts["positive"] / total) * 100
-            sentiment_counts["negative_percentage"] = (sentiment_counts["negative"] / total) * 100
-            sentiment_counts["neutral_percentage"] = (sentiment_counts["neutral"] / total) * 100
-        
-        return sentiment_counts
+        """Get sentiment counts and percentages over all stored feedback
+
+        Keyed like the repositories' statistics: positive, negative, neutral, total and
+        the *_percentage values, the last two only when there is feedback.
+        """
+        # Aggregated by the repository instead of counting a 100 item history page
+        return self.repository.get_sentiment_statistics(feedback_source)
@@ -0,0 +1,78 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution
+
+    The first caller for a key runs the function; callers arriving while it is in
+    flight wait for and share its result or exception. Nothing is cached after the
+    call completes. Safe to share between worker threads and the asyncio event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                return future, False
+            future = self._calls[key] = Future()
+            return future, True
+
+    def _finish(self, key: Hashable):
+        with self._lock:
+            del self._calls[key]
+
+    def do(self, key: Hashable, func: Callable[..., T], *args) -> Tuple[T, bool]:
+        """Run func(*args) once per in-flight key; returns (result, shared)"""
+        future, leader = self._join(key)
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            self._finish(key)
+
+    async def do_async(self, key: Hashable, func: Callable[..., Awaitable[T]], *args,
+                       on_join: Optional[Callable[[], None]] = None) -> Tuple[T, bool]:
+        """Async variant of do; followers wait without holding a thread
+
+        The leader starts func(*args) as a task of its own and every caller, the leader
+        included, awaits it through a shield. Cancelling one caller, e.g. an RPC whose client
+        gave up, leaves the work and the other callers waiting for it untouched. on_join is
+        called when the caller joins a call that is already in flight.
+        """
+        future, leader = self._join(key)
+        if leader:
+            task = asyncio.ensure_future(func(*args))
+            task.add_done_callback(functools.partial(self._settle, key, future))
+        elif on_join is not None:
+            on_join()
+
+        return await asyncio.shield(asyncio.wrap_future(future)), not leader
+
+    def _settle(self, key: Hashable, future: Future, task: asyncio.Task):
+        # Unregister first, so a caller woken with an error can start a new call for the key
+        self._finish(key)
+        if task.cancelled():
+            future.cancel()
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
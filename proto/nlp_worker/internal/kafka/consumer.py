@@ -4,57 +4,104 @@ Kafka Consumer Service for NLP Worker
 Consumes raw feedback messages and processes them through NLP analysis
 """
 
-import json
 import logging
+import threading
 import time
 from typing import Dict, Any, Optional
 from concurrent.futures import ThreadPoolExecutor
-from kafka import KafkaConsumer, KafkaProducer
-from kafka.errors import KafkaError
+from functools import partial
+from kafka import ConsumerRebalanceListener, KafkaConsumer, KafkaProducer
+from kafka.errors import CommitFailedError, KafkaError
+from kafka.structs import OffsetAndMetadata, TopicPartition
 from proto.nlp_worker_reader import nlp_worker_reader_pb2
 from google.protobuf.timestamp_pb2 import Timestamp
 from datetime import datetime
 
-from internal.feedback_analysis.repository.feedback_analysis_repository import FeedbackAnalysisRepository
+from internal.feedback_analysis.repository.feedback_analysis_repository import FeedbackAnalysisRepository, create_repository
+from internal.feedback_analysis.repository.feedback_analysis_cache import create_cached_repository
 from internal.feedback_analysis.service.feedback_analysis_service import FeedbackAnalysisService
-from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisRequest
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.models import codec
+from internal.kafka.offset_tracker import OffsetTracker
+from internal.kafka.transport import ConsumerTransport, ProducerTransport
 from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
+from internal.tracing.tracing import kafka_carrier, kafka_headers, tracer
 
 
 class KafkaConsumerService:
-    """Kafka Consumer Service for processing feedback messages"""
+    """Kafka Consumer Service for processing feedback messages
+
+    At most kafka.maxInFlightMessages fetched messages wait for or run on the worker
+    pool; at the limit the assigned partitions are paused, so a backlog stays in Kafka
+    where the lag shows it. Offsets are committed every kafka.commitIntervalMs once the
+    message and every earlier one of its partition are processed, so a crash or a
+    rebalance redelivers unfinished messages instead of losing them. Processed offsets of
+    revoked partitions are committed before the rebalance hands them to another member.
+
+    The consumer, producer and repository are created from config unless given, e.g.
+    the in-memory broker and repository of the pipeline benchmark. An injected
+    consumer must deserialize values with protobuf_deserializer, not auto-commit and
+    not be subscribed yet, and an injected producer must serialize keys to bytes.
+    """
     
-    def __init__(self, config: Dict[str, Any], metrics: NlpWorkerMetrics):
+    def __init__(self, config: Dict[str, Any], metrics: NlpWorkerMetrics,
+                 consumer: Optional[ConsumerTransport] = None, producer: Optional[ProducerTransport] = None,
+                 repository: Optional[FeedbackAnalysisRepository] = None,
+                 service: Optional[FeedbackAnalysisService] = None):
         self.config = config
         self.metrics = metrics
         self.logger = logging.getLogger(__name__)
         
         # Initialize Kafka consumer
-        self.consumer = KafkaConsumer(
-            config.kafka.kafkaTopics.feedbackRaw.topicName,
+        self.consumer = consumer or KafkaConsumer(
             bootstrap_servers=config.kafka.brokers,
             group_id=config.kafka.groupID,
             auto_offset_reset='earliest',
-            enable_auto_commit=True,
+            # Committed after processing, see _commit
+            enable_auto_commit=False,
             value_deserializer=protobuf_deserializer,
             # key_deserializer=lambda x: x.decode('utf-8') if x else None,
             # compression_type='snappy'
         )
         
-        # Initialize Kafka producer for analyzed results
-        self.producer = KafkaProducer(
+        # Initialize Kafka producer for analyzed results, values are pre-encoded bytes
+        self.producer = producer or KafkaProducer(
             bootstrap_servers=config.kafka.brokers,
-            value_serializer=lambda x: json.dumps(x).encode('utf-8'),
-            key_serializer=lambda x: x.encode('utf-8') if x else None
+            key_serializer=encode_key
         )
 
-        self.mongo_repo = FeedbackAnalysisRepository(config, self.logger)
+        include_text = not config.storage.dropTextFromOutput
+        if config.kafka.outputEncoding == "json":
+            self._encode_result = partial(codec.encode_analyzed_json, include_text=include_text)
+            content_type = codec.JSON_CONTENT_TYPE
+        else:
+            self._encode_result = partial(codec.encode_analyzed_message, include_text=include_text)
+            content_type = codec.PROTOBUF_CONTENT_TYPE
+        self._result_headers = [
+            ("content-type", content_type.encode('utf-8')),
+            ("schema-version", str(codec.RECORD_FORMAT_VERSION).encode('utf-8')),
+        ]
+
+        if repository is None:
+            repository = create_cached_repository(config, metrics, self.logger, create_repository(config, self.logger))
+        self.mongo_repo = repository
         
-        # Initialize NLP service
-        self.nlp_service = FeedbackAnalysisService(config, metrics, self.logger, self.mongo_repo)
+        # Initialize NLP service, or reuse one with models already loaded, e.g. by a forking parent
+        if service is None:
+            service = FeedbackAnalysisService(config, metrics, self.logger, self.mongo_repo)
+        else:
+            service.repository = self.mongo_repo
+        self.nlp_service = service
         
         # Thread pool for processing messages
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        self.executor = ThreadPoolExecutor(max_workers=config.kafka.workers)
+        self.offsets = OffsetTracker(config.kafka.maxInFlightMessages)
+        self.consumer.subscribe([config.kafka.kafkaTopics.feedbackRaw.topicName], listener=_CommitOnRevoke(self))
+        
+        self._lag_partitions = set()
+        self._next_lag_update = 0.0
+        self._next_commit = 0.0
+        self._stopping = threading.Event()
         
         self.logger.info("Kafka Consumer Service initialized")
     
@@ -66,14 +113,33 @@ class KafkaConsumerService:
         #     print(msg.value)
         
         try:
-            for message in self.consumer:
-                self.logger.info(f"Received message: {message.value}")
-                
-                # Process message asynchronously
-                self.executor.submit(self._process_message, message)
+            poll_timeout = self.config.kafka.pollTimeoutMs / 1000
+            while not self._stopping.is_set():
+                capacity = self.offsets.wait_for_capacity(poll_timeout)
+                self._apply_backpressure(capacity)
+
+                # poll() instead of iterating so lag is refreshed while no messages arrive. At the
+                # limit the partitions are paused and polling only keeps the group membership alive.
+                records = self.consumer.poll(
+                    timeout_ms=self.config.kafka.pollTimeoutMs if capacity else 0,
+                    max_records=capacity or None
+                )
+                # Drop partitions a rebalance in this poll took away, before they could be committed
+                self.offsets.retain(self.consumer.assignment())
+                for messages in records.values():
+                    for message in messages:
+                        self.logger.debug("Received message %s[%d]@%d", message.topic, message.partition, message.offset)
+                        
+                        # Process message asynchronously
+                        partition = TopicPartition(message.topic, message.partition)
+                        epoch = self.offsets.start(partition, message.offset)
+                        self.executor.submit(self._handle_message, message, partition, epoch)
+                        
+                        # Update metrics
+                        self.metrics.messages_received.inc()
                 
-                # Update metrics
-                self.metrics.messages_received.inc()
+                self._commit()
+                self._update_lag()
                 
         except KeyboardInterrupt:
             self.logger.info("Shutting down consumer...")
@@ -83,98 +149,207 @@ class KafkaConsumerService:
         finally:
             self._cleanup()
     
-    def _process_message(self, message):
+    def stop(self):
+        """Make start_consuming return after the current poll, then clean up"""
+        self._stopping.set()
+
+    @property
+    def in_flight(self) -> int:
+        """Messages fetched and not yet processed"""
+        return self.offsets.running
+
+    def _apply_backpressure(self, capacity: int):
+        # Runs on the polling thread; a rebalance resumes partitions, so pausing is repeated every poll
+        if capacity:
+            paused = self.consumer.paused()
+            if paused:
+                self.consumer.resume(*paused)
+        else:
+            self.consumer.pause(*self.consumer.assignment())
+
+    def _handle_message(self, message, partition: TopicPartition, epoch: int):
         try:
-            feedback_data = message.value  # это CreateFeedbackAnalysisReq protobuf
+            self._process_message(message)
+        finally:
+            # Failed messages are logged and counted by _process_message and not retried
+            self.offsets.done(partition, message.offset, epoch)
+
+    def _on_partitions_revoked(self, revoked):
+        # Called from poll() on the polling thread. Records of the revoked partitions still in
+        # flight are redelivered to the new owner, their completions are ignored.
+        self._commit(force=True)
+        self.offsets.forget(revoked)
+
+    def _commit(self, force: bool = False):
+        """Commit the offsets of processed messages of the partitions still assigned
+
+        Runs on the polling thread. A commit rejected after a rebalance is dropped: the new
+        owner resumes from the last committed offset, and processing is idempotent per feedback.
+        """
+        now = time.monotonic()
+        if not force and now < self._next_commit:
+            return
+        self._next_commit = now + self.config.kafka.commitIntervalMs / 1000
+
+        offsets = self.offsets.committable()
+        if not offsets:
+            return
+        try:
+            self.consumer.commit({
+                partition: OffsetAndMetadata(offset, "", -1) for partition, (offset, _) in offsets.items()
+            })
+            self.offsets.committed(offsets)
+        except CommitFailedError as e:
+            self.logger.warning("Offset commit rejected after a rebalance: %s", e)
+        except Exception as e:
+            self.logger.error("Error committing offsets: %s", e)
+            self.metrics.consumer_errors.inc()
+    
+    def _update_lag(self):
+        """Export end offset minus processed offset for every assigned partition
 
-            ts: Timestamp = feedback_data.created_at
+        Runs on the polling thread, KafkaConsumer is not thread-safe. Messages fetched but
+        not yet processed count as lag, so it measures the work the consumer still owes.
+        """
+        now = time.monotonic()
+        if now < self._next_lag_update:
+            return
+        self._next_lag_update = now + self.config.kafka.lagIntervalSeconds
 
-            # Конвертируем в секунды
-            unix_seconds = ts.seconds  # int
+        try:
+            partitions = self.consumer.assignment()
+            end_offsets = self.consumer.end_offsets(list(partitions)) if partitions else {}
+            for tp, end_offset in end_offsets.items():
+                processed = self.offsets.processed(tp)
+                lag = max(0, end_offset - (processed if processed is not None else self.consumer.position(tp)))
+                self.metrics.kafka_consumer_lag.labels(tp.topic, str(tp.partition)).set(lag)
+
+            # Drop series of partitions revoked by a rebalance. With PROMETHEUS_MULTIPROC_DIR set,
+            # remove() leaves the value in this process's file and the merged livesum keeps it,
+            # so zero it first.
+            for tp in self._lag_partitions - set(end_offsets):
+                self.metrics.kafka_consumer_lag.labels(tp.topic, str(tp.partition)).set(0)
+                self.metrics.kafka_consumer_lag.remove(tp.topic, str(tp.partition))
+            self._lag_partitions = set(end_offsets)
+        except Exception as e:
+            self.logger.warning(f"Could not update consumer lag: {e}")
+    
+    def _process_message(self, message):
+        start = time.perf_counter()
+        if message.timestamp is not None and message.timestamp > 0:
+            # Record timestamp is in milliseconds, producer or broker time depending on the topic config
+            self.metrics.kafka_queue_duration.observe(max(0.0, time.time() - message.timestamp / 1000))
+        self.metrics.add_active_requests(1)
+        # Continue the trace of the producer, e.g. the gateway request that published the feedback
+        parent = tracer.extract(kafka_carrier(message.headers))
+        attributes = {
+            "messaging.system": "kafka",
+            "messaging.destination.name": message.topic,
+            "messaging.kafka.partition": message.partition,
+            "messaging.kafka.offset": message.offset,
+        }
+        try:
+            with tracer.span(f"{message.topic} process", parent, "consumer", attributes):
+                feedback_data = message.value  # это CreateFeedbackAnalysisReq protobuf
 
-            # Если нужно в datetime
-            created_dt = datetime.fromtimestamp(unix_seconds)
+                ts: Timestamp = feedback_data.created_at
 
-            # Если сообщение приходит как обычный dict (json) из Go
-            # с полями feedback_id, feedback_source, feedback_text, feedback_timestamp
-            feedback_id = getattr(feedback_data, 'feedback_id', None)
-            feedback_source = getattr(feedback_data, 'feedback_source', 'unknown')
-            text = getattr(feedback_data, 'feedback_text', getattr(feedback_data, 'text', ''))
-            timestamp = getattr(feedback_data, 'feedback_timestamp', None)
+                # Конвертируем в секунды
+                unix_seconds = ts.seconds  # int
 
-            request = FeedbackAnalysisRequest(
-                feedback_id=feedback_id,
-                feedback_source=feedback_source,
-                text=text,
-                created_at=created_dt,
-            )
-            print(' Сообщение получили из кафки: ', request)
+                # Если нужно в datetime
+                created_dt = datetime.fromtimestamp(unix_seconds)
 
-            result = self.nlp_service.analyze_feedback(feedback_id=feedback_id,
-                feedback_source=feedback_source,
-                text=text,
-                created_at=created_dt,)
-            self._send_analyzed_result(result)
+                # Если сообщение приходит как обычный dict (json) из Go
+                # с полями feedback_id, feedback_source, feedback_text, feedback_timestamp
+                feedback_id = getattr(feedback_data, 'feedback_id', None)
+                feedback_source = getattr(feedback_data, 'feedback_source', 'unknown')
+                text = getattr(feedback_data, 'feedback_text', getattr(feedback_data, 'text', ''))
 
-            self.metrics.messages_processed.inc()
-            if timestamp:
-                self.metrics.processing_time.observe(time.time() - timestamp)
+                result = self.nlp_service.analyze_feedback(feedback_id=feedback_id,
+                    feedback_source=feedback_source,
+                    text=text,
+                    created_at=created_dt,
+                    path="kafka")
+                if self._send_analyzed_result(result):
+                    if ts.seconds:
+                        created_at = ts.seconds + ts.nanos / 1e9
+                        self.metrics.end_to_end_duration.observe(max(0.0, time.time() - created_at))
+                    self.metrics.kafka_processing_duration.observe(time.perf_counter() - start)
+                    self.metrics.messages_processed.inc()
+                else:
+                    self.metrics.processing_errors.inc()
 
         except Exception as e:
-            self.logger.error(f"Error processing message: {e}")
+            self.logger.error("Error processing message %s[%d]@%d: %s", message.topic, message.partition, message.offset, e)
             self.metrics.processing_errors.inc()
+        finally:
+            self.metrics.add_active_requests(-1)
 
     
-    def _send_analyzed_result(self, result: Dict[str, Any]):
-        """Send analyzed result to output Kafka topic"""
+    def _send_analyzed_result(self, result: FeedbackAnalysisResult) -> bool:
+        """Send analyzed result to output Kafka topic, returns False if it was not published"""
         try:
             topic = self.config.kafka.kafkaTopics.feedbackAnalyzed.topicName
-            
-            print("Результат", result)
-            # Convert result to dict for JSON serialization
-
-            print(result)
-            result_dict = {
-                'feedback_id': result.feedback_id,
-                'feedback_source': result.feedback_source,
-                'text': result.text,
-                'sentiment': result.sentiment,
-                'keywords': result.keywords,
-                'created_at': result.created_at.isoformat(),
-            }
-            
-            print('Поехали в кафку отправлять в топик: ', topic, "данные: ", result_dict)
+
             # Send to Kafka
-            future = self.producer.send(
-                topic,
-                key=str(result.feedback_id),
-                value=result_dict
-            )
-            
-            # Wait for send to complete
-            record_metadata = future.get(timeout=10)
+            start = time.perf_counter()
+            with tracer.span(f"{topic} publish", kind="producer", attributes={"messaging.system": "kafka"}):
+                # Consumers of the analyzed topic continue this trace
+                future = self.producer.send(
+                    topic,
+                    key=str(result.feedback_id),
+                    value=self._encode_result(result),
+                    headers=self._result_headers + kafka_headers(tracer.inject())
+                )
+                
+                # Wait for send to complete
+                record_metadata = future.get(timeout=10)
+            self.metrics.record_stage_duration("publish", "kafka", time.perf_counter() - start)
             
-            self.logger.info(f"Sent analyzed result to {topic}: {record_metadata}")
+            self.logger.debug("Sent analyzed result to %s: %s", topic, record_metadata)
             self.metrics.results_sent.inc()
+            return True
             
         except Exception as e:
-            self.logger.error(f"Error sending analyzed result: {e}")
+            self.logger.error("Error sending analyzed result: %s", e)
             self.metrics.send_errors.inc()
+            return False
     
     def _cleanup(self):
         """Clean up resources"""
         try:
-            self.consumer.close()
-            self.producer.close()
+            # Finish the fetched messages and commit them while the partitions are still ours
             self.executor.shutdown(wait=True)
+            self._commit(force=True)
+            self.consumer.close(autocommit=False)
+            self.producer.close()
             self.logger.info("Kafka Consumer Service cleaned up")
         except Exception as e:
             self.logger.error(f"Error during cleanup: {e}")
 
 
-def create_kafka_consumer_service(config: Dict[str, Any], metrics: NlpWorkerMetrics) -> KafkaConsumerService:
+class _CommitOnRevoke(ConsumerRebalanceListener):
+    def __init__(self, service: KafkaConsumerService):
+        self.service = service
+
+    def on_partitions_revoked(self, revoked):
+        self.service._on_partitions_revoked(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        pass
+
+
+def create_kafka_consumer_service(config: Dict[str, Any], metrics: NlpWorkerMetrics,
+                                  consumer: Optional[ConsumerTransport] = None,
+                                  producer: Optional[ProducerTransport] = None,
+                                  repository: Optional[FeedbackAnalysisRepository] = None,
+                                  service: Optional[FeedbackAnalysisService] = None) -> KafkaConsumerService:
     """Factory function to create Kafka consumer service"""
-    return KafkaConsumerService(config, metrics)
+    return KafkaConsumerService(config, metrics, consumer, producer, repository, service)
+
+def encode_key(key):
+    return key.encode('utf-8') if key else None
 
 def protobuf_deserializer(msg_bytes):
     feedback = nlp_worker_reader_pb2.CreateFeedbackAnalysisReq()
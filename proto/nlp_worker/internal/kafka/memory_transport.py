@@ -0,0 +1,387 @@
+import itertools
+import threading
+import time
+from collections import namedtuple
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from kafka.errors import CommitFailedError, IllegalStateError
+from kafka.partitioner.default import murmur2
+from kafka.structs import OffsetAndMetadata, TopicPartition
+
+from internal.kafka.transport import ConsumerTransport, ProducerTransport
+
+
+# Field names follow kafka-python's ConsumerRecord and RecordMetadata
+InMemoryRecord = namedtuple("InMemoryRecord", "topic partition offset timestamp key value headers")
+InMemoryRecordMetadata = namedtuple("InMemoryRecordMetadata", "topic partition offset timestamp")
+
+
+class _Group:
+    __slots__ = ("members", "subscriptions", "generation", "assigned_generation", "joined", "assignments",
+                 "committed", "rebalance_started", "rebalances")
+
+    def __init__(self):
+        self.members: Set[str] = set()
+        self.subscriptions: Dict[str, Tuple[str, ...]] = {}
+        self.generation = 0
+        # Generation of the last completed assignment, members of it may commit until the next one
+        self.assigned_generation = -1
+        self.joined: Set[str] = set()
+        # Member -> partitions, only filled once every member rejoined the current generation
+        self.assignments: Optional[Dict[str, Set[TopicPartition]]] = None
+        self.committed: Dict[TopicPartition, int] = {}
+        self.rebalance_started = 0.0
+        self.rebalances = 0
+
+
+class InMemoryBroker:
+    """Topics, partition logs and consumer groups of a single process
+
+    Models what the consumer service depends on: key-hashed partitioning (murmur2,
+    like kafka-python's default partitioner), per-partition offsets, committed offsets
+    per group and group rebalances. A rebalance is a barrier as in Kafka: members keep
+    nothing until every member has rejoined on its next poll, members that do not
+    rejoin within rebalance_timeout are evicted, and commits from a stale generation
+    fail with CommitFailedError. Until the rebalance completes, members of the previous
+    generation can still commit, which is what a rebalance listener does on revocation.
+    """
+
+    def __init__(self, default_partitions: int = 1, rebalance_timeout: float = 30.0):
+        self.default_partitions = default_partitions
+        self.rebalance_timeout = rebalance_timeout
+        self._logs: Dict[str, List[List[InMemoryRecord]]] = {}
+        self._round_robin: Dict[str, itertools.count] = {}
+        self._groups: Dict[str, _Group] = {}
+        self._member_ids = itertools.count()
+        self._cond = threading.Condition()
+
+    def create_topic(self, topic: str, partitions: Optional[int] = None):
+        with self._cond:
+            self._partitions(topic, partitions)
+
+    def append(self, topic: str, value: Optional[bytes], key: Optional[bytes] = None,
+               headers: Optional[Iterable[Tuple[str, bytes]]] = None, partition: Optional[int] = None,
+               timestamp_ms: Optional[int] = None) -> InMemoryRecordMetadata:
+        """Append a serialized record, as the broker would after a producer request"""
+        timestamp = timestamp_ms if timestamp_ms is not None else int(time.time() * 1000)
+        with self._cond:
+            logs = self._partitions(topic)
+            if partition is None:
+                if key is not None:
+                    partition = (murmur2(key) & 0x7fffffff) % len(logs)
+                else:
+                    partition = next(self._round_robin[topic]) % len(logs)
+            log = logs[partition]
+            record = InMemoryRecord(topic, partition, len(log), timestamp, key, value, list(headers or []))
+            log.append(record)
+            self._cond.notify_all()
+        return InMemoryRecordMetadata(topic, partition, record.offset, timestamp)
+
+    def records(self, topic: str) -> List[InMemoryRecord]:
+        """Every record of the topic, partition by partition"""
+        with self._cond:
+            return [record for log in self._logs.get(topic, []) for record in log]
+
+    def end_offset(self, partition: TopicPartition) -> int:
+        with self._cond:
+            return len(self._partitions(partition.topic)[partition.partition])
+
+    def committed(self, group_id: str, partition: TopicPartition) -> Optional[int]:
+        with self._cond:
+            group = self._groups.get(group_id)
+            return group.committed.get(partition) if group else None
+
+    def lag(self, group_id: str, topic: str) -> int:
+        """End offsets minus committed offsets over the topic's partitions"""
+        with self._cond:
+            group = self._groups.get(group_id)
+            committed = group.committed if group else {}
+            return sum(len(log) - committed.get(TopicPartition(topic, index), 0)
+                       for index, log in enumerate(self._partitions(topic)))
+
+    def rebalances(self, group_id: str) -> int:
+        with self._cond:
+            group = self._groups.get(group_id)
+            return group.rebalances if group else 0
+
+    def rebalance(self, group_id: str):
+        """Start a new generation, as a joining or failing member would"""
+        with self._cond:
+            group = self._groups.setdefault(group_id, _Group())
+            group.generation += 1
+            group.joined = set()
+            group.assignments = None
+            group.rebalance_started = time.monotonic()
+            group.rebalances += 1
+            self._cond.notify_all()
+
+    def _partitions(self, topic: str, count: Optional[int] = None) -> List[List[InMemoryRecord]]:
+        # Topics are auto-created, like a broker with auto.create.topics.enable
+        logs = self._logs.get(topic)
+        if logs is None:
+            logs = self._logs[topic] = [[] for _ in range(count or self.default_partitions)]
+            self._round_robin[topic] = itertools.count()
+        return logs
+
+    def _join(self, group_id: str, topics: Tuple[str, ...]) -> str:
+        with self._cond:
+            member = f"member-{next(self._member_ids)}"
+            group = self._groups.setdefault(group_id, _Group())
+            group.members.add(member)
+            group.subscriptions[member] = topics
+        self.rebalance(group_id)
+        return member
+
+    def _leave(self, group_id: str, member: str):
+        with self._cond:
+            group = self._groups[group_id]
+            group.members.discard(member)
+            group.subscriptions.pop(member, None)
+        self.rebalance(group_id)
+
+    def _sync(self, group: _Group, member: str):
+        # Called with the lock held by a member of the current generation
+        group.joined.add(member)
+        waiting = group.members - group.joined
+        if waiting and time.monotonic() - group.rebalance_started > self.rebalance_timeout:
+            group.members -= waiting
+            for evicted in waiting:
+                group.subscriptions.pop(evicted, None)
+            waiting = set()
+        if waiting or group.assignments is not None:
+            return
+        group.assigned_generation = group.generation
+
+        # Range assignor: each topic's partitions in contiguous ranges over the sorted members
+        group.assignments = {name: set() for name in group.members}
+        for topic in sorted({topic for topics in group.subscriptions.values() for topic in topics}):
+            members = sorted(name for name in group.members if topic in group.subscriptions[name])
+            partitions = len(self._partitions(topic))
+            per_member, extra = divmod(partitions, len(members))
+            start = 0
+            for index, name in enumerate(members):
+                count = per_member + (1 if index < extra else 0)
+                group.assignments[name].update(TopicPartition(topic, p) for p in range(start, start + count))
+                start += count
+        self._cond.notify_all()
+
+
+class InMemoryConsumer(ConsumerTransport):
+    """Group member consuming from an InMemoryBroker with KafkaConsumer's semantics
+
+    poll() advances positions past the returned records. With enable_auto_commit the
+    positions are committed every auto_commit_interval_ms during poll(), when partitions
+    are revoked and on close(), as kafka-python does, so records still being processed
+    can already be committed. Paused partitions are not fetched from; a rebalance
+    resumes them, as it does in kafka-python. A rebalance listener passed to subscribe()
+    is called from poll() when partitions are revoked and assigned.
+    """
+
+    def __init__(self, broker: InMemoryBroker, *topics: str, group_id: str,
+                 auto_offset_reset: str = "latest", enable_auto_commit: bool = True,
+                 auto_commit_interval_ms: int = 5000, max_poll_records: int = 500,
+                 value_deserializer: Optional[Callable] = None, key_deserializer: Optional[Callable] = None):
+        self._broker = broker
+        self._group_id = group_id
+        self._auto_offset_reset = auto_offset_reset
+        self._enable_auto_commit = enable_auto_commit
+        self._auto_commit_interval = auto_commit_interval_ms / 1000
+        self._next_auto_commit = time.monotonic() + self._auto_commit_interval
+        self._max_poll_records = max_poll_records
+        self._value_deserializer = value_deserializer
+        self._key_deserializer = key_deserializer
+        self._topics = ()
+        self._listener = None
+        self._member: Optional[str] = None
+        self._generation = -1
+        self._assignment: Optional[Set[TopicPartition]] = None
+        self._positions: Dict[TopicPartition, int] = {}
+        self._paused: Set[TopicPartition] = set()
+        self._closed = False
+        if topics:
+            self.subscribe(list(topics))
+
+    def subscribe(self, topics: List[str], listener=None) -> None:
+        with self._broker._cond:
+            if self._member is not None:
+                raise IllegalStateError("Already subscribed")
+            self._topics = tuple(topics)
+            self._listener = listener
+        self._member = self._broker._join(self._group_id, self._topics)
+
+    def poll(self, timeout_ms: int = 0, max_records: Optional[int] = None, update_offsets: bool = True) -> Dict:
+        deadline = time.monotonic() + timeout_ms / 1000
+        remaining = max_records or self._max_poll_records
+        with self._broker._cond:
+            while True:
+                if self._closed:
+                    raise IllegalStateError("Consumer is closed")
+                if self._member is None:
+                    raise IllegalStateError("Consumer is not subscribed to any topics")
+                self._ensure_assignment()
+                if self._enable_auto_commit and time.monotonic() >= self._next_auto_commit:
+                    self._commit_positions()
+                    self._next_auto_commit = time.monotonic() + self._auto_commit_interval
+
+                fetched = self._fetch(remaining, update_offsets)
+                timeout = deadline - time.monotonic()
+                if fetched or timeout <= 0:
+                    return fetched
+                self._broker._cond.wait(timeout)
+
+    def assignment(self) -> set:
+        with self._broker._cond:
+            return set(self._assignment or ())
+
+    def position(self, partition: TopicPartition) -> int:
+        with self._broker._cond:
+            if partition not in self._positions:
+                raise IllegalStateError(f"No current assignment for partition {partition}")
+            return self._positions[partition]
+
+    def pause(self, *partitions) -> None:
+        with self._broker._cond:
+            self._paused.update(partition for partition in partitions if partition in (self._assignment or ()))
+
+    def resume(self, *partitions) -> None:
+        with self._broker._cond:
+            self._paused.difference_update(partitions)
+            self._broker._cond.notify_all()
+
+    def paused(self) -> set:
+        with self._broker._cond:
+            return set(self._paused)
+
+    def committed(self, partition: TopicPartition) -> Optional[int]:
+        return self._broker.committed(self._group_id, partition)
+
+    def end_offsets(self, partitions: List) -> Dict:
+        return {partition: self._broker.end_offset(partition) for partition in partitions}
+
+    def commit(self, offsets: Optional[Dict] = None) -> None:
+        with self._broker._cond:
+            group = self._broker._groups[self._group_id]
+            if self._assignment is None or self._generation != group.assigned_generation:
+                raise CommitFailedError("Commit cannot be completed since the group has already rebalanced")
+            offsets = dict(self._positions) if offsets is None else offsets
+            for partition, offset in offsets.items():
+                if partition not in self._assignment:
+                    raise CommitFailedError(f"Partition {partition} is not assigned to this member")
+                group.committed[partition] = offset.offset if isinstance(offset, OffsetAndMetadata) else offset
+
+    def close(self, autocommit: bool = True) -> None:
+        with self._broker._cond:
+            if self._closed:
+                return
+            if autocommit and self._enable_auto_commit:
+                self._commit_positions()
+            self._closed = True
+        if self._member is not None:
+            self._broker._leave(self._group_id, self._member)
+
+    def _ensure_assignment(self):
+        # Called with the broker lock held, which is reentrant
+        group = self._broker._groups[self._group_id]
+        if self._member not in group.members:
+            # Evicted for missing a rebalance: the partitions already moved on, so nothing
+            # is committed, and rejoining starts another generation
+            self._revoke(commit=False, lost=True)
+            group.members.add(self._member)
+            group.subscriptions[self._member] = self._topics
+            self._broker.rebalance(self._group_id)
+
+        if self._generation != group.generation:
+            self._revoke(commit=self._enable_auto_commit)
+            self._generation = group.generation
+        if self._assignment is None:
+            self._broker._sync(group, self._member)
+            if group.assignments is not None and self._member in group.assignments:
+                self._assignment = set(group.assignments[self._member])
+                self._positions = {partition: self._initial_position(group, partition)
+                                   for partition in self._assignment}
+                if self._listener is not None:
+                    self._listener.on_partitions_assigned(set(self._assignment))
+
+    def _revoke(self, commit: bool, lost: bool = False):
+        if self._assignment and commit:
+            # Nobody owns the partitions until every member rejoined, the next owner resumes here
+            self._broker._groups[self._group_id].committed.update(self._positions)
+        if self._assignment and not lost and self._listener is not None:
+            # Still a member of the previous generation here, so the listener can commit
+            self._listener.on_partitions_revoked(set(self._assignment))
+        self._assignment = None
+        self._positions = {}
+        self._paused = set()
+
+    def _initial_position(self, group: _Group, partition: TopicPartition) -> int:
+        committed = group.committed.get(partition)
+        if committed is not None:
+            return committed
+        if self._auto_offset_reset == "earliest":
+            return 0
+        return len(self._broker._partitions(partition.topic)[partition.partition])
+
+    def _commit_positions(self):
+        group = self._broker._groups[self._group_id]
+        if self._assignment and self._generation == group.generation:
+            group.committed.update(self._positions)
+
+    def _fetch(self, remaining: int, update_offsets: bool) -> Dict:
+        fetched = {}
+        for partition in sorted(self._assignment or ()):
+            if remaining <= 0:
+                break
+            if partition in self._paused:
+                continue
+            position = self._positions[partition]
+            log = self._broker._partitions(partition.topic)[partition.partition]
+            batch = log[position:position + remaining]
+            if not batch:
+                continue
+            if self._value_deserializer or self._key_deserializer:
+                batch = [record._replace(
+                    key=self._key_deserializer(record.key) if self._key_deserializer else record.key,
+                    value=self._value_deserializer(record.value) if self._value_deserializer else record.value,
+                ) for record in batch]
+            fetched[partition] = batch
+            remaining -= len(batch)
+            if update_offsets:
+                self._positions[partition] = position + len(batch)
+        return fetched
+
+
+class _SentFuture:
+    """Already completed send, records are appended synchronously"""
+
+    def __init__(self, metadata: InMemoryRecordMetadata):
+        self.value = metadata
+
+    def get(self, timeout: Optional[float] = None) -> InMemoryRecordMetadata:
+        return self.value
+
+
+class InMemoryProducer(ProducerTransport):
+    """Producer appending to an InMemoryBroker, acknowledged as soon as send() returns"""
+
+    def __init__(self, broker: InMemoryBroker, key_serializer: Optional[Callable] = None,
+                 value_serializer: Optional[Callable] = None):
+        self._broker = broker
+        self._key_serializer = key_serializer
+        self._value_serializer = value_serializer
+        self._closed = False
+
+    def send(self, topic: str, value=None, key=None, headers=None, partition: Optional[int] = None,
+             timestamp_ms: Optional[int] = None) -> _SentFuture:
+        if self._closed:
+            raise IllegalStateError("Cannot send after the producer is closed")
+        if self._key_serializer is not None:
+            key = self._key_serializer(key)
+        if self._value_serializer is not None:
+            value = self._value_serializer(value)
+        return _SentFuture(self._broker.append(topic, value, key, headers, partition, timestamp_ms))
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        pass
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        self._closed = True
@@ -0,0 +1,104 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional, Set, Tuple
+
+from kafka.structs import TopicPartition
+
+
+class _PartitionOffsets:
+    __slots__ = ("epoch", "pending", "done", "next_offset", "committed")
+
+    def __init__(self, epoch: int, offset: int):
+        self.epoch = epoch
+        # Offsets handed to workers and not yet safe to commit, in fetch order
+        self.pending: Deque[int] = deque()
+        self.done: Set[int] = set()
+        self.next_offset = offset
+        self.committed: Optional[int] = None
+
+    def processed(self) -> int:
+        """Offset to resume from: the oldest record still in flight, else the next one to fetch"""
+        return self.pending[0] if self.pending else self.next_offset
+
+
+class OffsetTracker:
+    """Bounds the records in flight and tracks the offsets that are safe to commit
+
+    Workers finish records out of order, so a partition's commit offset only moves past
+    a record once every earlier record of the partition is done. Offsets going backwards
+    mean the consumer rewound to the committed offset after a rebalance; the partition is
+    then tracked afresh and completions of the records fetched before are ignored.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.running = 0
+        self._partitions: Dict[TopicPartition, _PartitionOffsets] = {}
+        self._epochs = 0
+        self._cond = threading.Condition()
+
+    def wait_for_capacity(self, timeout: float) -> int:
+        """Free slots, waiting up to timeout while there are none"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.running < self.limit, timeout)
+            return max(0, self.limit - self.running)
+
+    def start(self, partition: TopicPartition, offset: int) -> int:
+        """Register a fetched record before it is handed to a worker; returns the token for done()"""
+        with self._cond:
+            state = self._partitions.get(partition)
+            if state is None or offset < state.next_offset:
+                self._epochs += 1
+                state = self._partitions[partition] = _PartitionOffsets(self._epochs, offset)
+            state.pending.append(offset)
+            state.next_offset = offset + 1
+            self.running += 1
+            return state.epoch
+
+    def done(self, partition: TopicPartition, offset: int, epoch: int):
+        """Mark a record processed, successfully or not, and free its slot"""
+        with self._cond:
+            self.running -= 1
+            state = self._partitions.get(partition)
+            if state is not None and state.epoch == epoch:
+                state.done.add(offset)
+                while state.pending and state.pending[0] in state.done:
+                    state.done.discard(state.pending.popleft())
+            self._cond.notify_all()
+
+    def retain(self, assignment: Iterable[TopicPartition]):
+        """Forget partitions no longer assigned, their records will be fetched again by the new owner"""
+        assigned = set(assignment)
+        with self._cond:
+            for partition in list(self._partitions):
+                if partition not in assigned:
+                    del self._partitions[partition]
+
+    def forget(self, partitions: Iterable[TopicPartition]):
+        """Forget revoked partitions"""
+        with self._cond:
+            for partition in partitions:
+                self._partitions.pop(partition, None)
+
+    def processed(self, partition: TopicPartition) -> Optional[int]:
+        """Offset below which every record of the partition is processed, None if untracked"""
+        with self._cond:
+            state = self._partitions.get(partition)
+            return state.processed() if state is not None else None
+
+    def committable(self) -> Dict[TopicPartition, Tuple[int, int]]:
+        """Partitions whose processed offset moved since the last commit, as (offset, epoch)"""
+        with self._cond:
+            return {
+                partition: (state.processed(), state.epoch)
+                for partition, state in self._partitions.items()
+                if state.processed() != state.committed
+            }
+
+    def committed(self, offsets: Dict[TopicPartition, Tuple[int, int]]):
+        """Record a successful commit of offsets returned by committable()"""
+        with self._cond:
+            for partition, (offset, epoch) in offsets.items():
+                state = self._partitions.get(partition)
+                if state is not None and state.epoch == epoch:
+                    state.committed = offset
@@ -0,0 +1,80 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from kafka import KafkaConsumer, KafkaProducer
+
+
+class ConsumerTransport(ABC):
+    """The part of kafka-python's KafkaConsumer the consumer service relies on
+
+    Partitions are kafka.structs.TopicPartition and records carry topic, partition,
+    offset, timestamp, key, value and headers like kafka-python's ConsumerRecord.
+    """
+
+    @abstractmethod
+    def subscribe(self, topics: List[str], listener=None) -> None:
+        """Join the group for the topics; listener is a kafka.ConsumerRebalanceListener"""
+        ...
+
+    @abstractmethod
+    def poll(self, timeout_ms: int = 0, max_records: Optional[int] = None) -> Dict:
+        """Fetched records by partition, advancing the positions past them"""
+        ...
+
+    @abstractmethod
+    def assignment(self) -> set:
+        ...
+
+    @abstractmethod
+    def position(self, partition) -> int:
+        ...
+
+    @abstractmethod
+    def end_offsets(self, partitions: List) -> Dict:
+        ...
+
+    @abstractmethod
+    def pause(self, *partitions) -> None:
+        """Stop fetching from the partitions until resumed or reassigned by a rebalance"""
+        ...
+
+    @abstractmethod
+    def resume(self, *partitions) -> None:
+        ...
+
+    @abstractmethod
+    def paused(self) -> set:
+        ...
+
+    @abstractmethod
+    def commit(self, offsets: Optional[Dict] = None) -> None:
+        """Commit the given offsets, or the current positions of every assigned partition"""
+        ...
+
+    @abstractmethod
+    def close(self, autocommit: bool = True) -> None:
+        ...
+
+
+class ProducerTransport(ABC):
+    """The part of kafka-python's KafkaProducer the consumer service relies on"""
+
+    @abstractmethod
+    def send(self, topic: str, value: Optional[bytes] = None, key=None,
+             headers: Optional[Iterable[Tuple[str, bytes]]] = None, partition: Optional[int] = None,
+             timestamp_ms: Optional[int] = None):
+        """Future whose get(timeout) returns the record metadata or raises the send error"""
+        ...
+
+    @abstractmethod
+    def flush(self, timeout: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def close(self, timeout: Optional[float] = None) -> None:
+        ...
+
+
+# kafka-python's clients already implement both interfaces
+ConsumerTransport.register(KafkaConsumer)
+ProducerTransport.register(KafkaProducer)
@@ -0,0 +1,164 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from config.config import LoggerConfig
+
+
+_LEVELS = {
+    "debug": logging.DEBUG,
+    "info": logging.INFO,
+    "warn": logging.WARNING,
+    "warning": logging.WARNING,
+    "error": logging.ERROR,
+    "fatal": logging.CRITICAL,
+}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the same keys as the bootstrap format"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%d %H:%M:%S"),
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class LogSampler(logging.Filter):
+    """Rate limits repeated log lines, like zap's sampler
+
+    Per level and message template, the first `initial` records of every second pass,
+    then only every `thereafter`-th. The template is the unformatted msg, so the
+    per-message logs on the hot path use %-style arguments rather than f-strings.
+    """
+
+    def __init__(self, initial: int, thereafter: int, interval: float = 1.0):
+        super().__init__()
+        self.initial = initial
+        self.thereafter = thereafter
+        self.interval = interval
+        self.sampled_out = 0
+        self._window = 0
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = (record.levelno, record.msg if isinstance(record.msg, str) else type(record.msg))
+        window = int(record.created // self.interval)
+        with self._lock:
+            if window != self._window:
+                self._window = window
+                self._counts.clear()
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+
+            if count <= self.initial:
+                return True
+            if self.thereafter > 0 and (count - self.initial) % self.thereafter == 0:
+                return True
+            self.sampled_out += 1
+            return False
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the writer thread without blocking the caller
+
+    Records are neither formatted nor copied here, the writer thread does both, so
+    arguments must not be mutated after logging. When the queue is full the record
+    is dropped and counted, and the next record that fits reports the loss.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self._reported = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            if self.dropped != self._reported:
+                dropped = self.dropped
+                self.queue.put_nowait(logging.makeLogRecord({
+                    "name": __name__, "levelno": logging.WARNING, "levelname": "WARNING",
+                    "msg": "Dropped %d log records, the log writer fell behind", "args": (dropped - self._reported,),
+                }))
+                self._reported = dropped
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+
+
+def configure_logging(config: LoggerConfig) -> logging.Logger:
+    """Route the root logger through a queue to a writer thread, honoring the logger config
+
+    devMode switches to console output without sampling. Replaces the handlers installed
+    by the bootstrap logging.basicConfig() in main.
+    """
+    global _handler, _listener
+
+    level = _LEVELS.get(config.level.lower())
+    if level is None:
+        raise ValueError(f"unknown log level {config.level}")
+
+    stream = logging.StreamHandler()
+    if config.encoder == "console" or config.devMode:
+        stream.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(name)s: %(message)s"))
+    else:
+        stream.setFormatter(JsonFormatter())
+
+    handler = DroppingQueueHandler(queue.Queue(config.queueSize))
+    if not config.devMode and config.samplingInitial > 0:
+        handler.addFilter(LogSampler(config.samplingInitial, config.samplingThereafter))
+
+    shutdown_logging()
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _handler = handler
+    _listener = QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    return root
+
+
+def shutdown_logging():
+    """Stop the writer thread after it has written every queued record"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    # The writer thread does not survive fork and the queue's lock may have been held
+    # by another thread, forked workers get a fresh queue and writer
+    global _listener
+    if _listener is None:
+        return
+    handlers = _listener.handlers
+    _handler.queue = queue.Queue(_handler.queue.maxsize)
+    _listener = QueueListener(_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+atexit.register(shutdown_logging)
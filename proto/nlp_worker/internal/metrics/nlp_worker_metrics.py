@@ -1,7 +1,44 @@
-from prometheus_client import Counter, Histogram, Gauge, Summary
+from prometheus_client import Counter, Histogram, Gauge
+from prometheus_client import CollectorRegistry, multiprocess, values
+import glob
+import os
 import time
 
 
+# Request paths and pipeline stages used as labels on the latency histograms
+PATHS = ("grpc", "kafka")
+STAGES = ("preprocess", "sentiment", "keywords", "persist", "publish")
+
+# 5ms to 1h, queue and end-to-end times include Kafka backlog and upstream delays
+END_TO_END_BUCKETS = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+# 50us to 10s, NLP stages take well under a millisecond on short texts while storage round trips take tens of milliseconds
+LATENCY_BUCKETS = (.00005, .0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+
+def enable_multiprocess_metrics(directory: str):
+    """Switch prometheus_client to per-process metric files; call before NlpWorkerMetrics() and before forking"""
+    os.makedirs(directory, exist_ok=True)
+    # Files left by a previous run would be merged into this one's totals
+    for path in glob.glob(os.path.join(directory, "*.db")):
+        os.remove(path)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = directory
+    values.ValueClass = values.get_value_class()
+
+
+def multiprocess_registry() -> CollectorRegistry:
+    """Registry that merges the metric files of every worker process"""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def mark_process_dead(pid: int):
+    """Drop the live gauge values of an exited worker process"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
+
+
 class NlpWorkerMetrics:
     """Metrics for NLP Worker Service"""
     
@@ -12,6 +49,65 @@ class NlpWorkerMetrics:
             'Total number of gRPC requests for feedback analysis'
         )
         
+        self.batch_create_feedback_analysis_grpc_requests = Counter(
+            'nlp_worker_grpc_batch_requests_total',
+            'Total number of batch gRPC requests for feedback analysis'
+        )
+
+        self.grpc_batch_size = Histogram(
+            'nlp_worker_grpc_batch_size',
+            'Number of feedback items per batch gRPC request',
+            buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+        )
+        
+        self.stream_feedback_analysis_grpc_requests = Counter(
+            'nlp_worker_grpc_streams_total',
+            'Total number of streaming gRPC calls for feedback analysis'
+        )
+
+        self.grpc_stream_batch_size = Histogram(
+            'nlp_worker_grpc_stream_batch_size',
+            'Number of feedback items per streaming micro-batch',
+            buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256)
+        )
+
+        self.grpc_stream_queue_depth = Histogram(
+            'nlp_worker_grpc_stream_queue_depth',
+            'Requests waiting in the stream queue when a micro-batch is taken',
+            buckets=(0, 1, 4, 16, 64, 128, 256, 512, 1024)
+        )
+        
+        self.grpc_request_duration = Histogram(
+            'nlp_worker_grpc_request_duration_seconds',
+            'Time spent handling gRPC requests',
+            ['method'],
+            buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+        )
+        
+        self.analyze_only_duration = Histogram(
+            'nlp_worker_grpc_analyze_only_duration_seconds',
+            'Time spent handling analyze-only CreateFeedbackAnalysis requests',
+            buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+        )
+
+        self.shed_requests = Counter(
+            'nlp_worker_shed_requests_total',
+            'Requests rejected or dropped by admission control',
+            ['reason']
+        )
+
+        self.admission_queued_items = Gauge(
+            'nlp_worker_admission_queued_items',
+            'Admitted feedback items waiting for or running analysis',
+            multiprocess_mode='livesum'
+        )
+
+        self.coalesced_requests = Counter(
+            'nlp_worker_coalesced_requests_total',
+            'Requests that shared an identical in-flight analysis instead of running their own',
+            ['key_class']
+        )
+        
         self.success_grpc_requests = Counter(
             'nlp_worker_grpc_success_total',
             'Total number of successful gRPC requests'
@@ -25,17 +121,51 @@ class NlpWorkerMetrics:
         # Processing metrics
         self.feedback_analysis_duration = Histogram(
             'nlp_worker_feedback_analysis_duration_seconds',
-            'Time spent processing feedback analysis'
+            'Time spent analyzing one feedback text',
+            ['path'],
+            buckets=LATENCY_BUCKETS
         )
         
-        self.sentiment_analysis_duration = Histogram(
-            'nlp_worker_sentiment_analysis_duration_seconds',
-            'Time spent on sentiment analysis'
+        self.stage_duration = Histogram(
+            'nlp_worker_stage_duration_seconds',
+            'Time spent in each stage of the analysis pipeline',
+            ['stage', 'path'],
+            buckets=LATENCY_BUCKETS
         )
+        # Resolved once, labels() takes a lock and a dict lookup on every call
+        self._stage_durations = {
+            (stage, path): self.stage_duration.labels(stage, path) for stage in STAGES for path in PATHS
+        }
+        self._feedback_analysis_durations = {path: self.feedback_analysis_duration.labels(path) for path in PATHS}
         
-        self.keyword_extraction_duration = Histogram(
-            'nlp_worker_keyword_extraction_duration_seconds',
-            'Time spent on keyword extraction'
+        self.kafka_queue_duration = Histogram(
+            'nlp_worker_kafka_queue_duration_seconds',
+            'Time from the Kafka record timestamp until a worker starts processing it',
+            buckets=END_TO_END_BUCKETS
+        )
+
+        self.kafka_processing_duration = Histogram(
+            'nlp_worker_kafka_processing_duration_seconds',
+            'Time from a worker picking up a Kafka message until its result is published',
+            buckets=LATENCY_BUCKETS
+        )
+
+        self.end_to_end_duration = Histogram(
+            'nlp_worker_end_to_end_duration_seconds',
+            'Time from the feedback created_at until its analysis result is published',
+            buckets=END_TO_END_BUCKETS
+        )
+
+        self.kafka_consumer_lag = Gauge(
+            'nlp_worker_kafka_consumer_lag',
+            'Messages between the consumer position and the end offset of each assigned partition',
+            ['topic', 'partition'],
+            multiprocess_mode='livesum'
+        )
+
+        self.processing_errors = Counter(
+            'nlp_worker_processing_errors_total',
+            'Kafka messages that failed analysis or publishing'
         )
         
         # Quality metrics
@@ -46,26 +176,23 @@ class NlpWorkerMetrics:
         
         self.keyword_count = Histogram(
             'nlp_worker_keyword_count',
-            'Number of keywords extracted per feedback'
+            'Number of keywords extracted per feedback',
+            buckets=(0, 1, 2, 3, 5, 8, 10, 15, 20)
         )
         
         # System metrics
         self.active_analysis_requests = Gauge(
             'nlp_worker_active_analysis_requests',
-            'Number of feedback analysis requests currently being processed'
+            'Number of feedback analysis requests currently being processed',
+            multiprocess_mode='livesum'
         )
         
         self.nlp_model_health = Gauge(
             'nlp_worker_nlp_model_health',
-            'Health status of NLP models (1 = healthy, 0 = unhealthy)'
+            'Health status of NLP models (1 = healthy, 0 = unhealthy)',
+            multiprocess_mode='livemin'
         )
         
-        # Summary metrics
-        self.feedback_analysis_summary = Summary(
-            'nlp_worker_feedback_analysis_summary',
-            'Summary of feedback analysis processing'
-        )
-
         self.consumer_errors = Counter(
             'nlp_worker_consumer_errors', 'Number of Kafka consumer errors'
         )
@@ -85,18 +212,40 @@ class NlpWorkerMetrics:
         self.messages_processed = Counter(
             'nlp_worker_messages_processed', 'Number of messages processed from Kafka'
             )
+
+        # Cache metrics
+        self.cache_hits = Counter(
+            'nlp_worker_cache_hits_total',
+            'Number of analysis cache hits',
+            ['key_class']
+        )
+
+        self.cache_misses = Counter(
+            'nlp_worker_cache_misses_total',
+            'Number of analysis cache misses',
+            ['key_class']
+        )
+
+        self.cache_errors = Counter(
+            'nlp_worker_cache_errors_total',
+            'Number of failed analysis cache operations',
+            ['key_class']
+        )
+
+        self.cache_operation_duration = Histogram(
+            'nlp_worker_cache_operation_duration_seconds',
+            'Time spent on analysis cache operations',
+            ['operation'],
+            buckets=(.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5)
+        )
     
-    def record_feedback_analysis_duration(self, duration: float):
+    def record_feedback_analysis_duration(self, duration: float, path: str = "grpc"):
         """Record the duration of feedback analysis"""
-        self.feedback_analysis_duration.observe(duration)
+        self._feedback_analysis_durations[path].observe(duration)
     
-    def record_sentiment_analysis_duration(self, duration: float):
-        """Record the duration of sentiment analysis"""
-        self.sentiment_analysis_duration.observe(duration)
-    
-    def record_keyword_extraction_duration(self, duration: float):
-        """Record the duration of keyword extraction"""
-        self.keyword_extraction_duration.observe(duration)
+    def record_stage_duration(self, stage: str, path: str, duration: float):
+        """Record the duration of one pipeline stage"""
+        self._stage_durations[stage, path].observe(duration)
     
     def record_sentiment_result(self, sentiment: str):
         """Record sentiment analysis result"""
@@ -110,20 +259,11 @@ class NlpWorkerMetrics:
         """Set the number of active analysis requests"""
         self.active_analysis_requests.set(count)
     
+    def add_active_requests(self, delta: int):
+        """Adjust the number of active analysis requests; safe to mix between gRPC and Kafka paths"""
+        self.active_analysis_requests.inc(delta)
+    
     def set_nlp_model_health(self, is_healthy: bool):
         """Set the health status of NLP models"""
         self.nlp_model_health.set(1 if is_healthy else 0)
-    
-    def record_feedback_analysis_summary(self, duration: float):
-        """Record summary of feedback analysis"""
-        self.feedback_analysis_summary.observe(duration)
-    
-    def get_metrics_summary(self) -> dict:
-        """Get a summary of current metrics"""
-        return {
-            "total_requests": self.create_feedback_analysis_grpc_requests._value.get(),
-            "successful_requests": self.success_grpc_requests._value.get(),
-            "failed_requests": self.failed_grpc_requests._value.get(),
-            "active_requests": self.active_analysis_requests._value.get(),
-            "nlp_model_health": self.nlp_model_health._value.get()
-        }
+
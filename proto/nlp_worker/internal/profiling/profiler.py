@@ -0,0 +1,234 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+# (name, file, line) of one stack frame
+Frame = Tuple[str, str, int]
+
+
+class ProfilerBusy(Exception):
+    """Another capture of the same kind is already running"""
+
+
+class StackSampler:
+    """Statistical profiler sampling the Python stacks of every thread
+
+    The calling thread reads sys._current_frames() at a fixed rate for a bounded
+    time. Nothing runs between captures, so the idle cost is zero.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def sample(self, seconds: float, hz: int) -> Tuple[Dict[str, Counter], float]:
+        """Sample all threads; returns per-thread stack counts (root first) and the sampling interval"""
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("a sampling profile is already running")
+        try:
+            interval = 1.0 / hz
+            me = threading.get_ident()
+            stacks: Dict[str, Counter] = {}
+            names = {}
+            code_frames: Dict[object, Frame] = {}
+
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                frames = sys._current_frames()
+                if len(names) != len(frames):
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in frames.items():
+                    if ident == me:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        entry = code_frames.get(code)
+                        if entry is None:
+                            entry = code_frames[code] = (code.co_name, code.co_filename, code.co_firstlineno)
+                        stack.append(entry)
+                        frame = frame.f_back
+                    stack.reverse()
+                    stacks.setdefault(names.get(ident, str(ident)), Counter())[tuple(stack)] += 1
+                del frames, frame
+                time.sleep(interval)
+            return stacks, interval
+        finally:
+            self._lock.release()
+
+
+def to_collapsed(stacks: Dict[str, Counter]) -> str:
+    """Render samples in the collapsed format read by flamegraph.pl and speedscope"""
+    lines = []
+    for thread, counts in stacks.items():
+        for stack, count in counts.items():
+            frames = ";".join(f"{name} ({_short_path(file)}:{line})" for name, file, line in stack)
+            lines.append(f"{thread};{frames} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(stacks: Dict[str, Counter], interval: float, name: str) -> dict:
+    """Render samples as a speedscope file with one sampled profile per thread"""
+    frame_index: Dict[Frame, int] = {}
+    frames: List[dict] = []
+    profiles = []
+    for thread, counts in stacks.items():
+        samples, weights = [], []
+        for stack, count in counts.items():
+            indexes = []
+            for frame in stack:
+                index = frame_index.get(frame)
+                if index is None:
+                    index = frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indexes.append(index)
+            samples.append(indexes)
+            weights.append(count * interval)
+        profiles.append({
+            "type": "sampled",
+            "name": thread,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights,
+        })
+
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "exporter": "nlp_worker",
+        "shared": {"frames": frames},
+        "profiles": profiles,
+    }
+
+
+class _Capture:
+    def __init__(self, requests: int):
+        self.remaining = requests
+        self.running = 0
+        self.profiles: List[cProfile.Profile] = []
+        self.done = threading.Event()
+
+
+class RequestProfiler:
+    """Runs cProfile over the next N requests that go through run()
+
+    When no capture is armed run() costs one attribute check.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._capture: Optional[_Capture] = None
+
+    def run(self, func: Callable[..., T], *args) -> T:
+        capture = self._capture
+        if capture is None:
+            return func(*args)
+
+        with self._lock:
+            claimed = capture.remaining > 0
+            if claimed:
+                capture.remaining -= 1
+                capture.running += 1
+        if not claimed:
+            return func(*args)
+
+        # One Profile per request, a Profile only instruments the thread that enabled it
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args)
+        finally:
+            with self._lock:
+                capture.profiles.append(profile)
+                capture.running -= 1
+                if capture.remaining == 0 and capture.running == 0:
+                    capture.done.set()
+
+    def capture(self, requests: int, timeout: float, sort: str = "cumulative", limit: int = 50) -> Tuple[int, str]:
+        """Profile the next requests and return how many were captured and the pstats report"""
+        with self._lock:
+            if self._capture is not None:
+                raise ProfilerBusy("a request profile is already running")
+            capture = self._capture = _Capture(requests)
+
+        capture.done.wait(timeout)
+
+        with self._lock:
+            # Requests still running after the timeout finish unprofiled into the discarded capture
+            self._capture = None
+            capture.remaining = 0
+            profiles = list(capture.profiles)
+
+        if not profiles:
+            return 0, "No requests were profiled before the timeout\n"
+        out = io.StringIO()
+        stats = pstats.Stats(*profiles, stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+        return len(profiles), out.getvalue()
+
+
+class HeapProfiler:
+    """tracemalloc snapshots of the biggest allocation sites
+
+    Tracing is started only for the duration of a capture unless the process already
+    runs with PYTHONTRACEMALLOC, so there is no allocation overhead while idle.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def top(self, seconds: float, limit: int, key_type: str = "lineno", frames: int = 1) -> str:
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("a heap profile is already running")
+        try:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start(frames)
+                time.sleep(seconds)
+            try:
+                snapshot = tracemalloc.take_snapshot()
+                traced, peak = tracemalloc.get_traced_memory()
+            finally:
+                if started:
+                    tracemalloc.stop()
+        finally:
+            self._lock.release()
+
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        window = f"allocations during the last {seconds:g}s" if started else "all live traced allocations"
+        lines = [f"# {window}, traced {traced / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB"]
+        for stat in snapshot.statistics(key_type)[:limit]:
+            frame = stat.traceback[-1]
+            location = _short_path(frame.filename) if key_type == "filename" else f"{_short_path(frame.filename)}:{frame.lineno}"
+            lines.append(f"{stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  {location}")
+            if key_type == "traceback":
+                lines.extend("    " + line for line in stat.traceback.format())
+        return "\n".join(lines) + "\n"
+
+
+def _short_path(path: str) -> str:
+    # Paths relative to the service root or site-packages keep collapsed stacks readable
+    for marker in ("site-packages" + os.sep, "nlp_worker" + os.sep):
+        index = path.rfind(marker)
+        if index != -1:
+            return path[index + len(marker):]
+    return path
+
+
+# Shared by the analysis path and the profiling server of this process
+request_profiler = RequestProfiler()
+stack_sampler = StackSampler()
+heap_profiler = HeapProfiler()
@@ -0,0 +1,180 @@
+import logging
+import multiprocessing
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional, Tuple
+
+import grpc
+
+from config.config import AdmissionConfig
+from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
+
+
+class AdmissionRejected(Exception):
+    """Request was shed before any work was done"""
+
+    def __init__(self, reason: str, code: grpc.StatusCode, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.code = code
+
+
+class DeadlineExpired(AdmissionRejected):
+    """Caller's deadline passed while the request was waiting for an analysis worker"""
+
+    def __init__(self):
+        super().__init__("deadline_expired", grpc.StatusCode.DEADLINE_EXCEEDED,
+                         "Deadline expired before analysis started")
+
+
+@dataclass
+class AdmissionTicket:
+    cost: int
+    # time.monotonic() value after which the caller no longer waits, None without a deadline
+    deadline: Optional[float]
+    started: bool = field(default=False)
+
+    def expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def check_deadline(self):
+        """Mark the work as started, or raise DeadlineExpired when the caller has already given up"""
+        if self.expired():
+            raise DeadlineExpired()
+        self.started = True
+
+
+class AdmissionController:
+    """Admits analysis work based on queue depth and the caller's remaining deadline
+
+    Wait time is estimated from the items already admitted, the number of analysis
+    workers and an EWMA of per-item analysis time. Requests that cannot finish before
+    their deadline are rejected immediately instead of timing out after using a worker.
+    """
+
+    def __init__(self, config: AdmissionConfig, workers: int, metrics: NlpWorkerMetrics, logger: logging.Logger,
+                 on_queued: Optional[Callable[[int], None]] = None):
+        self.config = config
+        self.workers = max(1, workers)
+        self.metrics = metrics
+        self.logger = logger
+        # Called with the new queue depth on every change, e.g. SharedQueueDepths.publish
+        self.on_queued = on_queued
+        self.in_flight = 0
+        self.service_time = config.initialServiceTimeMs / 1000
+        self._lock = threading.Lock()
+
+    def estimated_wait(self, cost: int = 1) -> float:
+        """Seconds until a request of the given cost would finish if admitted now"""
+        return (self.in_flight + cost) / self.workers * self.service_time
+
+    def check(self) -> Tuple[bool, str]:
+        """Readiness check failing while admitted work is above readyQueueRatio of the queue limit"""
+        limit = self.config.readyQueueRatio * self.config.maxQueuedItems
+        if self.config.enable and self.in_flight >= limit:
+            return False, f"backpressure: {self.in_flight} items queued"
+        return True, f"{self.in_flight} items queued"
+
+    def admit(self, time_remaining: Optional[float], cost: int = 1) -> AdmissionTicket:
+        """Admit a request or raise AdmissionRejected; pair every ticket with release()"""
+        deadline = None
+        if self.config.enable and time_remaining is not None:
+            deadline = time.monotonic() + time_remaining
+
+        with self._lock:
+            if self.config.enable:
+                if self.in_flight + cost > self.config.maxQueuedItems and self.in_flight > 0:
+                    self._shed("queue_full")
+                    raise AdmissionRejected(
+                        "queue_full", grpc.StatusCode.RESOURCE_EXHAUSTED,
+                        f"Server overloaded: {self.in_flight} items queued"
+                    )
+                if time_remaining is not None:
+                    if time_remaining <= 0:
+                        self._shed("deadline_expired")
+                        raise DeadlineExpired()
+                    estimated_wait = self.estimated_wait(cost)
+                    if estimated_wait > time_remaining:
+                        self._shed("deadline_unmeetable")
+                        raise AdmissionRejected(
+                            "deadline_unmeetable", grpc.StatusCode.RESOURCE_EXHAUSTED,
+                            f"Server overloaded: estimated {estimated_wait * 1000:.0f}ms exceeds the "
+                            f"{time_remaining * 1000:.0f}ms deadline"
+                        )
+
+            self.in_flight += cost
+            self._queued()
+
+        return AdmissionTicket(cost, deadline)
+
+    def release(self, ticket: AdmissionTicket):
+        """Return the ticket's capacity; work that never started past its deadline counts as shed"""
+        with self._lock:
+            self.in_flight -= ticket.cost
+            self._queued()
+        # Covers both check_deadline() failures and handlers cancelled by gRPC while still queued
+        if not ticket.started and ticket.expired():
+            self._shed("deadline_expired")
+
+    def refund(self, ticket: AdmissionTicket):
+        """Return the ticket's capacity early for a caller that waits on work admitted by another
+
+        The ticket stays valid and is still passed to release(), which then returns nothing.
+        """
+        with self._lock:
+            self.in_flight -= ticket.cost
+            self._queued()
+        ticket.cost = 0
+
+    def charge(self, ticket: AdmissionTicket, cost: int = 1):
+        """Charge a refunded ticket again when its caller has to do the work after all
+
+        The request was already admitted, so this never sheds.
+        """
+        with self._lock:
+            self.in_flight += cost
+            self._queued()
+        ticket.cost += cost
+
+    def observe(self, seconds: float, items: int = 1):
+        """Feed a measured analysis duration into the per-item service time estimate"""
+        if items <= 0:
+            return
+        alpha = self.config.ewmaAlpha
+        with self._lock:
+            self.service_time = (1 - alpha) * self.service_time + alpha * (seconds / items)
+
+    def _queued(self):
+        self.metrics.admission_queued_items.set(self.in_flight)
+        if self.on_queued is not None:
+            self.on_queued(self.in_flight)
+
+    def _shed(self, reason: str):
+        self.metrics.shed_requests.labels(reason).inc()
+        self.logger.debug("Shedding request: %s, %d items in flight", reason, self.in_flight)
+
+
+class SharedQueueDepths:
+    """Queue depth of every forked worker's admission controller, in shared memory
+
+    Created before the workers are forked. Each worker publishes its depth into its own
+    slot and the supervisor process serves readiness over all of them.
+    """
+
+    def __init__(self, config: AdmissionConfig, workers: int):
+        self.config = config
+        # Every slot has a single writer, so no lock is needed
+        self._depths = multiprocessing.get_context("fork").Array("i", workers, lock=False)
+
+    def publish(self, index: int, in_flight: int):
+        self._depths[index] = in_flight
+
+    def check(self) -> Tuple[bool, str]:
+        """Readiness check failing while the workers together are above readyQueueRatio of their queue limits"""
+        depths = list(self._depths)
+        queued = sum(depths)
+        limit = self.config.readyQueueRatio * self.config.maxQueuedItems * len(depths)
+        if self.config.enable and queued >= limit:
+            return False, f"backpressure: {queued} items queued, {depths} per worker"
+        return True, f"{queued} items queued"
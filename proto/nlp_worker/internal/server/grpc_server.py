@@ -1,76 +1,165 @@
+import asyncio
 import grpc
-from concurrent import futures
 import logging
-import time
-import sys
+import signal
+import threading
+from functools import partial
+from typing import Callable, Optional
 
 # Import our protobuf-generated classes
 from proto.nlp_worker_reader import nlp_worker_reader_pb2_grpc
 from internal.feedback_analysis.delivery.grpc.grpc_service import NlpWorkerGrpcService
 from internal.feedback_analysis.service.feedback_analysis_service import FeedbackAnalysisService
-from internal.feedback_analysis.repository.feedback_analysis_repository import FeedbackAnalysisRepository
+from internal.feedback_analysis.service.async_feedback_analysis_service import AsyncFeedbackAnalysisService
+from internal.feedback_analysis.repository.feedback_analysis_repository import create_repository
+from internal.feedback_analysis.repository.feedback_analysis_cache import create_cached_repository
 from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
-from internal.server.health_server import start_health_server
+from internal.server.health_server import HealthState, RepositoryCheck, repository_check
+from internal.server.admission import AdmissionController, SharedQueueDepths
+from internal.server.worker_supervisor import WorkerSupervisor
+from internal.server.profiling_server import start_profiling_server
+from internal.server.tracing_interceptor import TracingInterceptor
+from internal.tracing.tracing import tracer
 from config.config import Config
 
 
-def serve(config: Config, metrics: NlpWorkerMetrics, logger: logging.Logger):
-    """Start the gRPC server for NLP Worker Service"""
+def serve(config: Config, metrics: NlpWorkerMetrics, logger: logging.Logger, health: Optional[HealthState] = None):
+    """Start the gRPC server for NLP Worker Service
+
+    The ops server with probes and metrics is started by main.py; health receives the
+    model, storage and backpressure state of this server.
+    """
     try:
         logger.info("Starting NLP Worker gRPC server...")
     
-        repository = FeedbackAnalysisRepository(config, logger)
-        service = FeedbackAnalysisService(config, metrics, logger)
-        
-        # Start health check server
-        health_thread = start_health_server(config.probes.port, metrics, logger)
-        logger.info(f"Health check server started on port {config.probes.port}")
-        
-        # Create gRPC server
-        server = grpc.server(
-            futures.ThreadPoolExecutor(max_workers=10),
-            options=[
-                ('grpc.keepalive_time_ms', 10 * 60 * 1000),
-                ('grpc.keepalive_timeout_ms', 15 * 1000),
-                ('grpc.keepalive_permit_without_calls', 1),
-                ('grpc.http2.max_pings_without_data', 0),
-                ('grpc.http2.min_time_between_pings_ms', 5 * 60 * 1000),
-                ('grpc.http2.min_ping_interval_without_data_ms', 5 * 60 * 1000),
-            ]
-        )
-        
-        # Register gRPC service
-        nlp_worker_service = NlpWorkerGrpcService(logger, config, service, metrics)
-        nlp_worker_reader_pb2_grpc.add_NlpWorkerServiceServicer_to_server(nlp_worker_service, server)
-        
-        # Start Prometheus metrics server (simplified)
-        try:
-            from prometheus_client import start_http_server
-            start_http_server(port=config.probes.prometheusPort)
-            logger.info(f"Prometheus metrics server started on port {config.probes.prometheusPort}")
-        except Exception as e:
-            logger.warning(f"Could not start Prometheus server: {e}")
-        
-        # Start server
-        address = f"[::]:{config.grpc.port}"
-        server.add_insecure_port(address)
-        server.start()
-        
-        logger.info(f"NLP Worker gRPC server started successfully on port {config.grpc.port}")
-        
-        # Set model health to healthy
-        metrics.set_nlp_model_health(True)
+        repository = create_cached_repository(config, metrics, logger, create_repository(config, logger))
+        service = FeedbackAnalysisService(config, metrics, logger, repository)
+        if health is not None:
+            health.set_condition("models", True, "loaded")
+            health.add_check("storage", repository_check(repository))
         
-        # Keep server running
-        try:
-            while True:
-                time.sleep(1)
-        except KeyboardInterrupt:
-            logger.info("Received shutdown signal, stopping server...")
-            server.stop(0)
-            repository.close_connection()
-            logger.info("Server stopped gracefully")
+        # The event loop lives in this thread so main.py can run it next to the Kafka consumer
+        asyncio.run(_serve(config, metrics, logger, service, health))
             
     except Exception as e:
         logger.error(f"Failed to start gRPC server: {e}")
         raise
+
+
+def serve_multiprocess(config: Config, metrics: NlpWorkerMetrics, logger: logging.Logger,
+                       kafka_worker: Optional[Callable[[FeedbackAnalysisService], None]] = None,
+                       health: Optional[HealthState] = None):
+    """Serve gRPC from grpc.processes forked workers sharing the port via SO_REUSEPORT
+
+    Metrics must have been switched to multiprocess mode with enable_multiprocess_metrics(),
+    the ops server in this process then serves the merged metrics of all workers.
+    kafka_worker runs in one more forked process and receives the shared service.
+    """
+    logger.info(f"Starting NLP Worker gRPC server with {config.grpc.processes} worker processes...")
+
+    # Models are loaded once here and shared copy-on-write, the Kafka worker included; storage
+    # clients are not fork-safe and are opened by each worker after the fork
+    service = FeedbackAnalysisService(config, metrics, logger, None)
+    metrics.set_nlp_model_health(True)
+
+    # Workers publish their admission queue depth here for the backpressure check
+    queue_depths = SharedQueueDepths(config.admission, config.grpc.processes)
+    if health is not None:
+        health.set_condition("models", True, "loaded")
+        health.add_check("backpressure", queue_depths.check, inline=True)
+
+    def add_storage_check():
+        # Opened by the check thread once the workers are forked, workers open their own connections
+        health.add_check("storage", RepositoryCheck(config, logger))
+
+    # Readiness fails while any worker, the Kafka consumer included, is down or restarting
+    supervisor = WorkerSupervisor(logger, config.grpc.workerRestartDelaySeconds, config.grpc.shutdownGraceSeconds, health)
+    for index in range(config.grpc.processes):
+        supervisor.add_worker(f"grpc-{index}",
+                              lambda index=index: serve_worker(config, metrics, logger, service, index, queue_depths))
+    if kafka_worker is not None:
+        supervisor.add_worker("kafka", lambda: kafka_worker(service))
+    supervisor.run(add_storage_check if health is not None else None)
+
+
+def serve_worker(config: Config, metrics: NlpWorkerMetrics, logger: logging.Logger, service: FeedbackAnalysisService,
+                 index: int = 0, queue_depths: Optional[SharedQueueDepths] = None):
+    """Run one forked gRPC worker process"""
+    # Exporter channels and span batching threads do not survive fork, every worker sets up its own
+    tracer.configure(config.jaeger, logger)
+    if config.probes.pprofEnable:
+        # Each worker profiles only itself, so they get consecutive ports
+        start_profiling_server(config.probes.pprof + index, logger)
+    service.repository = create_cached_repository(config, metrics, logger, create_repository(config, logger))
+    on_queued = None
+    if queue_depths is not None:
+        # Clear what a previous worker in this slot left behind when it died
+        queue_depths.publish(index, 0)
+        on_queued = partial(queue_depths.publish, index)
+    try:
+        asyncio.run(_serve(config, metrics, logger, service, on_queued=on_queued))
+    finally:
+        tracer.shutdown()
+
+
+def create_server(config: Config, metrics: NlpWorkerMetrics, logger: logging.Logger,
+                  service: AsyncFeedbackAnalysisService) -> grpc.aio.Server:
+    """Create the grpc.aio server with the NLP Worker servicer registered; must be called inside a running loop"""
+    server = grpc.aio.server(
+        # Calls beyond this limit are rejected with RESOURCE_EXHAUSTED instead of queueing without bound
+        maximum_concurrent_rpcs=config.grpc.maxConcurrentRpcs,
+        interceptors=[TracingInterceptor()] if tracer.enabled else None,
+        options=[
+            ('grpc.keepalive_time_ms', 10 * 60 * 1000),
+            ('grpc.keepalive_timeout_ms', 15 * 1000),
+            ('grpc.keepalive_permit_without_calls', 1),
+            ('grpc.http2.max_pings_without_data', 0),
+            ('grpc.http2.min_time_between_pings_ms', 5 * 60 * 1000),
+            ('grpc.http2.min_ping_interval_without_data_ms', 5 * 60 * 1000),
+            # Worker processes bind the same port and the kernel balances connections between them
+            ('grpc.so_reuseport', 1 if config.grpc.processes > 1 else 0),
+        ]
+    )
+    
+    # Register gRPC service
+    nlp_worker_service = NlpWorkerGrpcService(logger, config, service, metrics, service.admission)
+    nlp_worker_reader_pb2_grpc.add_NlpWorkerServiceServicer_to_server(nlp_worker_service, server)
+    return server
+
+
+async def _serve(config: Config, metrics: NlpWorkerMetrics, logger: logging.Logger, service: FeedbackAnalysisService,
+                 health: Optional[HealthState] = None, on_queued: Optional[Callable[[int], None]] = None):
+    admission = AdmissionController(config.admission, config.grpc.analysisWorkers, metrics, logger, on_queued)
+    if health is not None:
+        # Stop receiving new traffic while admission control is close to shedding
+        health.add_check("backpressure", admission.check, inline=True)
+    async_service = AsyncFeedbackAnalysisService(config, metrics, logger, service, admission)
+    server = create_server(config, metrics, logger, async_service)
+    
+    # Start server
+    address = f"[::]:{config.grpc.port}"
+    server.add_insecure_port(address)
+    await server.start()
+    
+    logger.info(f"NLP Worker gRPC server started successfully on port {config.grpc.port}")
+    
+    # Set model health to healthy
+    metrics.set_nlp_model_health(True)
+    
+    loop = asyncio.get_running_loop()
+    handle_signals = threading.current_thread() is threading.main_thread()
+    if handle_signals:
+        # Forked workers are stopped by the supervisor with SIGTERM
+        loop.add_signal_handler(signal.SIGTERM, lambda: asyncio.ensure_future(server.stop(config.grpc.shutdownGraceSeconds)))
+    
+    # Keep server running
+    try:
+        await server.wait_for_termination()
+    finally:
+        logger.info("Stopping gRPC server...")
+        await server.stop(config.grpc.shutdownGraceSeconds)
+        if handle_signals:
+            loop.remove_signal_handler(signal.SIGTERM)
+        async_service.shutdown()
+        service.repository.close_connection()
+        logger.info("Server stopped gracefully")
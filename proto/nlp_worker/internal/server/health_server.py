@@ -1,130 +1,227 @@
 import logging
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import json
+import os
 import threading
-from typing import Optional
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from config.config import Config
+from internal.feedback_analysis.repository.feedback_analysis_repository import FeedbackAnalysisRepository, create_repository
+from internal.metrics.nlp_worker_metrics import multiprocess_registry
+
+
+# A check returns (ok, detail); raising counts as a failed check
+Check = Callable[[], Tuple[bool, str]]
+
+
+class HealthState:
+    """Readiness conditions and dependency checks behind the /ready probe
+
+    Conditions are set by the code that owns them, e.g. once models are loaded. Checks
+    that talk to a dependency run on their own background thread every checkIntervalSeconds,
+    so a hanging dependency does not delay the others, and the probe returns their cached
+    results. Inline checks run on every probe and must be cheap in-process reads.
+    """
+
+    def __init__(self, interval: float, logger: logging.Logger):
+        self.interval = interval
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._conditions: Dict[str, Tuple[bool, str]] = {}
+        self._checks: Dict[str, Check] = {}
+        self._inline_checks: Dict[str, Check] = {}
+        self._results: Dict[str, Tuple[bool, str]] = {}
+        self._started = False
+
+    def set_condition(self, name: str, ok: bool, detail: str = ""):
+        with self._lock:
+            self._conditions[name] = (ok, detail)
+
+    def add_check(self, name: str, check: Check, inline: bool = False):
+        with self._lock:
+            if inline:
+                self._inline_checks[name] = check
+                return
+            self._checks[name] = check
+            # Not ready until the check has passed once
+            self._results[name] = (False, "not checked yet")
+            started = self._started
+        if started:
+            self._start_check(name, check)
+
+    def start(self):
+        """Start running the cached checks, including ones added later"""
+        with self._lock:
+            self._started = True
+            checks = list(self._checks.items())
+        for name, check in checks:
+            self._start_check(name, check)
+
+    def _start_check(self, name: str, check: Check):
+        threading.Thread(target=self._run, args=(name, check), name=f"health-check-{name}", daemon=True).start()
+
+    def readiness(self) -> Tuple[bool, Dict[str, dict]]:
+        with self._lock:
+            results = dict(self._conditions)
+            results.update(self._results)
+            inline_checks = list(self._inline_checks.items())
+        for name, check in inline_checks:
+            results[name] = _run_check(check)
+
+        details = {name: {"ok": ok, "detail": detail} for name, (ok, detail) in results.items()}
+        return all(ok for ok, _ in results.values()), details
+
+    def _run(self, name: str, check: Check):
+        while True:
+            ok, detail = _run_check(check)
+            with self._lock:
+                previous = self._results.get(name)
+                self._results[name] = (ok, detail)
+            if previous is not None and previous[0] != ok:
+                log = self.logger.info if ok else self.logger.warning
+                log(f"Readiness check {name} is now {'passing' if ok else 'failing'}: {detail}")
+            time.sleep(self.interval)
+
+
+def _run_check(check: Check) -> Tuple[bool, str]:
+    try:
+        return check()
+    except Exception as e:
+        return False, str(e)
+
+
+def repository_check(repository: FeedbackAnalysisRepository) -> Check:
+    """Readiness check pinging the storage backend"""
+    def check() -> Tuple[bool, str]:
+        return (True, "reachable") if repository.ping() else (False, "ping failed")
+    return check
+
+
+class RepositoryCheck:
+    """Readiness check pinging a storage backend that it opens on its first run
+
+    The check thread opens the client, so it is not created on the calling thread of a
+    process that is about to fork workers.
+    """
+
+    def __init__(self, config: Config, logger: logging.Logger):
+        self.config = config
+        self.logger = logger
+        self._repository: Optional[FeedbackAnalysisRepository] = None
+
+    def __call__(self) -> Tuple[bool, str]:
+        if self._repository is None:
+            self._repository = create_repository(self.config, self.logger)
+        return repository_check(self._repository)()
 
-from internal.metrics.nlp_worker_metrics import NlpWorkerMetrics
+
+class KafkaBrokerCheck:
+    """Checks that the Kafka cluster answers a metadata request
+
+    Uses its own admin client, the consumer's client is not thread-safe.
+    """
+
+    def __init__(self, brokers: List[str], timeout_ms: int = 2000):
+        self.brokers = brokers
+        self.timeout_ms = timeout_ms
+        self._admin = None
+
+    def __call__(self) -> Tuple[bool, str]:
+        from kafka import KafkaAdminClient
+
+        try:
+            if self._admin is None:
+                self._admin = KafkaAdminClient(bootstrap_servers=self.brokers, request_timeout_ms=self.timeout_ms)
+            self._admin.list_topics()
+            return True, "reachable"
+        except Exception as e:
+            if self._admin is not None:
+                self._admin.close()
+                self._admin = None
+            return False, f"unreachable: {e}"
 
 
 class HealthCheckHandler(BaseHTTPRequestHandler):
-    """HTTP handler for health checks"""
-    
-    def __init__(self, *args, metrics: Optional[NlpWorkerMetrics] = None, **kwargs):
-        self.metrics = metrics
-        super().__init__(*args, **kwargs)
-    
+    """HTTP handler for health checks and Prometheus metrics"""
+
+    config: Config
+    health: HealthState
+    registry = REGISTRY
+
     def do_GET(self):
         """Handle GET requests for health checks"""
-        if self.path == '/ready':
+        path = self.path.split('?', 1)[0]
+        if path == self.config.probes.readinessPath:
             self._handle_readiness()
-        elif self.path == '/live':
+        elif path == self.config.probes.livenessPath:
             self._handle_liveness()
-        elif self.path == '/metrics':
+        elif path == self.config.probes.prometheusPath:
             self._handle_metrics()
         else:
-            self.send_response(404)
-            self.end_headers()
-            self.wfile.write(b'Not Found')
-    
+            self._send(404, 'text/plain', b'Not Found')
+
     def _handle_readiness(self):
-        """Handle readiness probe"""
-        try:
-            # Check if service is ready to receive traffic
-            # For now, always return ready
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            
-            response = {
-                "status": "ready",
-                "service": "nlp_worker_service"
-            }
-            self.wfile.write(json.dumps(response).encode())
-            
-        except Exception as e:
-            self.send_response(503)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            
-            response = {
-                "status": "not_ready",
-                "error": str(e),
-                "service": "nlp_worker_service"
-            }
-            self.wfile.write(json.dumps(response).encode())
-    
+        """Handle readiness probe from the cached check results"""
+        ready, checks = self.health.readiness()
+        response = {
+            "status": "ready" if ready else "not_ready",
+            "service": self.config.serviceName,
+            "checks": checks
+        }
+        self._send(200 if ready else 503, 'application/json', json.dumps(response).encode())
+
     def _handle_liveness(self):
         """Handle liveness probe"""
-        try:
-            # Check if service is alive and functioning
-            # For now, always return alive
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            
-            response = {
-                "status": "alive",
-                "service": "nlp_worker_service"
-            }
-            self.wfile.write(json.dumps(response).encode())
-            
-        except Exception as e:
-            self.send_response(503)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            
-            response = {
-                "status": "not_alive",
-                "error": str(e),
-                "service": "nlp_worker_service"
-            }
-            self.wfile.write(json.dumps(response).encode())
-    
+        # Dependencies are readiness concerns, a restart would not fix them
+        response = {
+            "status": "alive",
+            "service": self.config.serviceName
+        }
+        self._send(200, 'application/json', json.dumps(response).encode())
+
     def _handle_metrics(self):
-        """Handle metrics endpoint"""
-        if self.metrics:
-            metrics_summary = self.metrics.get_metrics_summary()
-            
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            
-            self.wfile.write(json.dumps(metrics_summary, indent=2).encode())
-        else:
-            self.send_response(503)
-            self.send_header('Content-Type', 'application/json')
-            self.end_headers()
-            
-            response = {"error": "Metrics not available"}
-            self.wfile.write(json.dumps(response).encode())
-    
+        """Handle metrics endpoint in the Prometheus text format"""
+        self._send(200, CONTENT_TYPE_LATEST, generate_latest(self.registry))
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def log_message(self, format, *args):
         """Override to use our logger instead of stderr"""
         pass
 
 
-def start_health_server(port: int, metrics: Optional[NlpWorkerMetrics] = None, logger: Optional[logging.Logger] = None):
-    """Start the health check server in a separate thread"""
-    
-    def run_server():
-        try:
-            # Create custom handler class with metrics
-            class CustomHandler(HealthCheckHandler):
-                def __init__(self, *args, **kwargs):
-                    super().__init__(*args, metrics=metrics, **kwargs)
-            
-            server = HTTPServer(('', port), CustomHandler)
-            if logger:
-                logger.info(f"Health check server started on port {port}")
-            server.serve_forever()
-            
-        except Exception as e:
-            if logger:
-                logger.error(f"Health check server failed: {e}")
-    
-    # Start server in background thread
-    health_thread = threading.Thread(target=run_server, daemon=True)
-    health_thread.start()
-    
-    return health_thread
+def start_health_server(config: Config, health: HealthState,
+                        logger: Optional[logging.Logger] = None) -> List[threading.Thread]:
+    """Start the ops server on the probes port, and on the Prometheus port if it differs
+
+    Serves readiness, liveness and metrics from one threaded handler. In multiprocess
+    mode the metrics of every worker are merged.
+    """
+    registry = multiprocess_registry() if "PROMETHEUS_MULTIPROC_DIR" in os.environ else REGISTRY
+    handler = type("OpsHandler", (HealthCheckHandler,), {"config": config, "health": health, "registry": registry})
+
+    ports = [config.probes.port]
+    if config.probes.prometheusPort != config.probes.port:
+        ports.append(config.probes.prometheusPort)
+
+    threads = []
+    for port in ports:
+        # Threaded, a slow scrape must not hold up a kubelet probe
+        server = ThreadingHTTPServer(('', port), handler)
+        server.daemon_threads = True
+        thread = threading.Thread(target=server.serve_forever, name=f"ops-server-{port}", daemon=True)
+        thread.start()
+        threads.append(thread)
+        if logger:
+            logger.info(f"Ops server started on port {port}")
+
+    health.start()
+    return threads
@@ -0,0 +1,119 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+from internal.profiling.profiler import (
+    ProfilerBusy, heap_profiler, request_profiler, stack_sampler, to_collapsed, to_speedscope
+)
+
+
+MAX_SECONDS = 120
+MAX_REQUESTS = 10000
+
+
+class ProfilingHandler(BaseHTTPRequestHandler):
+    """HTTP handler for on-demand profiles
+
+    GET /debug/pprof/profile?seconds=10&hz=100&format=collapsed|speedscope
+    GET /debug/pprof/requests?count=100&timeout=30&sort=cumulative&limit=50
+    GET /debug/pprof/heap?seconds=10&limit=25&key=lineno|filename|traceback
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        try:
+            if url.path == '/debug/pprof/profile':
+                self._handle_profile(query)
+            elif url.path == '/debug/pprof/requests':
+                self._handle_requests(query)
+            elif url.path == '/debug/pprof/heap':
+                self._handle_heap(query)
+            elif url.path in ('/debug/pprof', '/debug/pprof/'):
+                self._send(200, 'text/plain', (self.__class__.__doc__ or '').encode())
+            else:
+                self._send(404, 'text/plain', b'Not Found')
+        except ValueError as e:
+            self._send(400, 'text/plain', f'Bad request: {e}'.encode())
+        except ProfilerBusy as e:
+            self._send(409, 'text/plain', f'{e}'.encode())
+
+    def _handle_profile(self, query):
+        seconds = _param(query, 'seconds', 10.0, float, 0, MAX_SECONDS)
+        hz = _param(query, 'hz', 100, int, 1, 1000)
+        output = query.get('format', ['collapsed'])[0]
+        if output not in ('collapsed', 'speedscope'):
+            raise ValueError(f'unknown format {output}')
+
+        stacks, interval = stack_sampler.sample(seconds, hz)
+        if output == 'speedscope':
+            body = json.dumps(to_speedscope(stacks, interval, f'nlp_worker {seconds:g}s @ {hz}Hz')).encode()
+            self._send(200, 'application/json', body)
+        else:
+            self._send(200, 'text/plain', to_collapsed(stacks).encode())
+
+    def _handle_requests(self, query):
+        count = _param(query, 'count', 100, int, 1, MAX_REQUESTS)
+        timeout = _param(query, 'timeout', 30.0, float, 0, MAX_SECONDS)
+        limit = _param(query, 'limit', 50, int, 1, 1000)
+        sort = query.get('sort', ['cumulative'])[0]
+        if sort not in ('cumulative', 'tottime', 'ncalls', 'pcalls', 'filename', 'name'):
+            raise ValueError(f'unknown sort key {sort}')
+
+        profiled, report = request_profiler.capture(count, timeout, sort, limit)
+        self._send(200, 'text/plain', f'# {profiled} of {count} requests profiled\n{report}'.encode())
+
+    def _handle_heap(self, query):
+        seconds = _param(query, 'seconds', 10.0, float, 0, MAX_SECONDS)
+        limit = _param(query, 'limit', 25, int, 1, 1000)
+        key = query.get('key', ['lineno'])[0]
+        if key not in ('lineno', 'filename', 'traceback'):
+            raise ValueError(f'unknown key {key}')
+
+        frames = 10 if key == 'traceback' else 1
+        self._send(200, 'text/plain', heap_profiler.top(seconds, limit, key, frames).encode())
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Override to use our logger instead of stderr"""
+        pass
+
+
+def _param(query, name: str, default, cast, minimum, maximum):
+    if name not in query:
+        return default
+    value = cast(query[name][0])
+    if not minimum <= value <= maximum:
+        raise ValueError(f'{name} must be between {minimum} and {maximum}')
+    return value
+
+
+def start_profiling_server(port: int, logger: Optional[logging.Logger] = None):
+    """Start the profiling server in a separate thread"""
+
+    def run_server():
+        try:
+            # Threaded, a running capture must not block the other endpoints
+            server = ThreadingHTTPServer(('', port), ProfilingHandler)
+            server.daemon_threads = True
+            if logger:
+                logger.info(f"Profiling server started on port {port}")
+            server.serve_forever()
+
+        except Exception as e:
+            if logger:
+                logger.error(f"Profiling server failed: {e}")
+
+    profiling_thread = threading.Thread(target=run_server, name="profiling-server", daemon=True)
+    profiling_thread.start()
+
+    return profiling_thread
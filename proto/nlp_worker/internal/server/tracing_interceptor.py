@@ -0,0 +1,55 @@
+import grpc
+
+from internal.tracing.tracing import grpc_carrier, tracer
+
+
+class TracingInterceptor(grpc.aio.ServerInterceptor):
+    """Opens a server span per RPC, continuing the trace from the caller's metadata
+
+    Only installed while tracing is enabled, so disabled tracing adds nothing per call.
+    """
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+
+        method = handler_call_details.method.lstrip("/")
+        service, _, name = method.rpartition("/")
+        parent = tracer.extract(grpc_carrier(handler_call_details.invocation_metadata))
+        attributes = {"rpc.system": "grpc", "rpc.service": service, "rpc.method": name}
+
+        def span():
+            return tracer.span(method, parent, "server", attributes)
+
+        if handler.unary_unary is not None:
+            behavior = handler.unary_unary
+
+            async def unary_unary(request, context):
+                with span():
+                    return await behavior(request, context)
+
+            return handler._replace(unary_unary=unary_unary)
+
+        if handler.unary_stream is not None:
+            behavior = handler.unary_stream
+
+            async def unary_stream(request, context):
+                with span():
+                    async for response in behavior(request, context):
+                        yield response
+
+            return handler._replace(unary_stream=unary_stream)
+
+        if handler.stream_stream is not None:
+            behavior = handler.stream_stream
+
+            async def stream_stream(request_iterator, context):
+                with span():
+                    async for response in behavior(request_iterator, context):
+                        yield response
+
+            return handler._replace(stream_stream=stream_stream)
+
+        # Client streaming is not used by NlpWorkerService
+        return handler
@@ -0,0 +1,113 @@
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Callable, Dict, Optional
+
+from internal.metrics.nlp_worker_metrics import mark_process_dead
+from internal.server.health_server import HealthState
+
+
+class WorkerSupervisor:
+    """Runs forked worker processes and restarts them when they exit
+
+    Workers are forked from the calling process, so models loaded before run() are
+    shared copy-on-write instead of being loaded again by every worker. With health set,
+    every worker has a readiness condition that fails while it is down or waiting to restart.
+    """
+
+    def __init__(self, logger: logging.Logger, restart_delay: float, shutdown_grace: float,
+                 health: Optional[HealthState] = None):
+        self.logger = logger
+        self.restart_delay = restart_delay
+        self.shutdown_grace = shutdown_grace
+        self._context = multiprocessing.get_context("fork")
+        self._targets: Dict[str, Callable[[], None]] = {}
+        self._processes: Dict[str, multiprocessing.Process] = {}
+        self._restart_at: Dict[str, float] = {}
+        self._stopping = False
+        self.health = health
+
+    def add_worker(self, name: str, target: Callable[[], None]):
+        self._targets[name] = target
+        self._set_health(name, False, "not started")
+
+    def run(self, on_started: Optional[Callable[[], None]] = None):
+        """Start every worker and supervise them until SIGTERM or SIGINT
+
+        on_started runs once all workers are forked, for state the workers must not inherit.
+        """
+        previous = {sig: signal.signal(sig, self._stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+        try:
+            for name in self._targets:
+                self._start(name)
+            if on_started is not None:
+                on_started()
+
+            while not self._stopping:
+                sentinels = {process.sentinel: name for name, process in self._processes.items()}
+                for sentinel in wait(list(sentinels), timeout=0.5):
+                    self._reap(sentinels[sentinel])
+
+                now = time.monotonic()
+                for name, restart_at in list(self._restart_at.items()):
+                    if now >= restart_at and not self._stopping:
+                        del self._restart_at[name]
+                        self._start(name)
+        finally:
+            self._shutdown()
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+    def _start(self, name: str):
+        process = self._context.Process(target=_run_worker, args=(self._targets[name],), name=name)
+        process.start()
+        self._processes[name] = process
+        self._set_health(name, True, f"running (pid {process.pid})")
+        self.logger.info(f"Started worker {name} (pid {process.pid})")
+
+    def _reap(self, name: str):
+        process = self._processes.pop(name)
+        process.join()
+        mark_process_dead(process.pid)
+        if self._stopping:
+            return
+        self._set_health(name, False, f"exited with code {process.exitcode}, restarting")
+        self.logger.error(f"Worker {name} (pid {process.pid}) exited with code {process.exitcode}, "
+                          f"restarting in {self.restart_delay}s")
+        self._restart_at[name] = time.monotonic() + self.restart_delay
+
+    def _stop(self, signum, frame):
+        self.logger.info(f"Received signal {signum}, stopping workers...")
+        self._stopping = True
+
+    def _shutdown(self):
+        self._stopping = True
+        for name in self._targets:
+            self._set_health(name, False, "stopping")
+        for process in self._processes.values():
+            if process.is_alive():
+                process.terminate()
+
+        deadline = time.monotonic() + self.shutdown_grace + 1
+        for name, process in self._processes.items():
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                self.logger.warning(f"Worker {name} (pid {process.pid}) did not stop in time, killing it")
+                process.kill()
+                process.join()
+            mark_process_dead(process.pid)
+        self._processes.clear()
+        self.logger.info("All workers stopped")
+
+    def _set_health(self, name: str, ok: bool, detail: str):
+        if self.health is not None:
+            self.health.set_condition(f"worker_{name}", ok, detail)
+
+
+def _run_worker(target: Callable[[], None]):
+    # The supervisor forwards shutdown as SIGTERM; ignore the terminal's SIGINT sent to the whole group
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    target()
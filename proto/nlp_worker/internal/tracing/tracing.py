@@ -0,0 +1,162 @@
+import contextvars
+import logging
+from contextlib import nullcontext
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.config import JaegerConfig
+
+
+_NOOP_SPAN = nullcontext()
+
+
+class Tracer:
+    """OpenTelemetry spans for the analysis pipeline
+
+    Until configure() enables it every method is a no-op that allocates nothing, so the
+    pipeline calls it unconditionally and opentelemetry stays an optional dependency.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.memory_exporter = None
+        self._tracer = None
+        self._provider = None
+        self._propagator = None
+        self._kinds = {}
+
+    def configure(self, config: JaegerConfig, logger: logging.Logger) -> bool:
+        """Set up the tracer provider from config; returns whether tracing is enabled"""
+        if not config.enable or config.exporter == "none":
+            return False
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor, SimpleSpanProcessor
+            from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+            from opentelemetry.trace import SpanKind
+
+            # Head sampling: new traces are kept at sampleRate, requests from upstream follow its decision
+            sampler = ParentBased(TraceIdRatioBased(config.sampleRate))
+            provider = TracerProvider(resource=Resource.create({"service.name": config.serviceName}), sampler=sampler)
+
+            if config.exporter == "memory":
+                from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+                self.memory_exporter = InMemorySpanExporter()
+                provider.add_span_processor(SimpleSpanProcessor(self.memory_exporter))
+            elif config.exporter == "otlp":
+                from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+                provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=config.hostPort, insecure=True)))
+            else:
+                raise ValueError(f"unknown exporter {config.exporter}")
+            if config.logSpans:
+                provider.add_span_processor(SimpleSpanProcessor(_logging_exporter(logger)))
+
+            self._propagator = _create_propagator(config.propagators)
+        except (ImportError, ValueError) as e:
+            logger.warning(f"Tracing disabled: {e}")
+            return False
+
+        self._kinds = {
+            "internal": SpanKind.INTERNAL,
+            "server": SpanKind.SERVER,
+            "consumer": SpanKind.CONSUMER,
+            "producer": SpanKind.PRODUCER,
+        }
+        self._provider = provider
+        self._tracer = provider.get_tracer("nlp_worker")
+        self.enabled = True
+        logger.info(f"Tracing enabled: {config.exporter} exporter, sample rate {config.sampleRate}")
+        return True
+
+    def span(self, name: str, context=None, kind: str = "internal", attributes: Optional[dict] = None):
+        """Context manager for a span, child of context or of the current span"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return self._tracer.start_as_current_span(name, context=context, kind=self._kinds[kind], attributes=attributes)
+
+    def extract(self, carrier: Dict[str, str]):
+        """Trace context sent by the caller, None when there is none or tracing is disabled"""
+        if not self.enabled or not carrier:
+            return None
+        return self._propagator.extract(carrier)
+
+    def inject(self) -> Dict[str, str]:
+        """Propagation headers for the current span"""
+        carrier: Dict[str, str] = {}
+        if self.enabled:
+            self._propagator.inject(carrier)
+        return carrier
+
+    def wrap(self, func: Callable) -> Callable:
+        """Bind func to the current trace context, for handing work to executor threads"""
+        if not self.enabled:
+            return func
+        # run_in_executor does not copy contextvars the way asyncio tasks do
+        return partial(contextvars.copy_context().run, func)
+
+    def finished_spans(self) -> List:
+        """Spans recorded by the memory exporter"""
+        return list(self.memory_exporter.get_finished_spans()) if self.memory_exporter is not None else []
+
+    def shutdown(self):
+        """Flush spans that are still batched"""
+        if self._provider is not None:
+            self._provider.shutdown()
+
+
+def kafka_carrier(headers: Optional[Iterable[Tuple[str, bytes]]]) -> Dict[str, str]:
+    """Kafka record headers as a propagation carrier"""
+    if not headers:
+        return {}
+    return {key.lower(): value.decode("utf-8", "replace") for key, value in headers if value is not None}
+
+
+def kafka_headers(carrier: Dict[str, str]) -> List[Tuple[str, bytes]]:
+    """Propagation carrier as Kafka record headers"""
+    return [(key, value.encode("utf-8")) for key, value in carrier.items()]
+
+
+def grpc_carrier(metadata) -> Dict[str, str]:
+    """gRPC invocation metadata as a propagation carrier, binary headers are skipped"""
+    if not metadata:
+        return {}
+    return {key: value for key, value in metadata if not key.endswith("-bin")}
+
+
+def _create_propagator(names: List[str]):
+    from opentelemetry.propagators.composite import CompositePropagator
+
+    propagators = []
+    for name in names:
+        if name == "tracecontext":
+            from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+            propagators.append(TraceContextTextMapPropagator())
+        elif name == "baggage":
+            from opentelemetry.baggage.propagation import W3CBaggagePropagator
+            propagators.append(W3CBaggagePropagator())
+        elif name == "jaeger":
+            # uber-trace-id, as sent by services still on the Jaeger client
+            from opentelemetry.propagators.jaeger import JaegerPropagator
+            propagators.append(JaegerPropagator())
+        else:
+            raise ValueError(f"unknown propagator {name}")
+    return CompositePropagator(propagators)
+
+
+def _logging_exporter(logger: logging.Logger):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class LoggingSpanExporter(SpanExporter):
+        def export(self, spans):
+            for span in spans:
+                context = span.get_span_context()
+                logger.info(f"Span {span.name} trace={context.trace_id:032x} span={context.span_id:016x} "
+                            f"duration={(span.end_time - span.start_time) / 1e6:.2f}ms")
+            return SpanExportResult.SUCCESS
+
+    return LoggingSpanExporter()
+
+
+# Shared by the gRPC servicer, the Kafka consumer and the analysis service of this process
+tracer = Tracer()
@@ -23,9 +23,10 @@ _sym_db = _symbol_database.Default()
 
 
 from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+from google.protobuf import field_mask_pb2 as google_dot_protobuf_dot_field__mask__pb2
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n/proto/nlp_worker_reader/nlp_worker_reader.proto\x12\rreaderService\x1a\x1fgoogle/protobuf/timestamp.proto\"\x87\x01\n\x19\x43reateFeedbackAnalysisReq\x12\x13\n\x0b\x66\x65\x65\x64\x62\x61\x63k_id\x18\x01 \x01(\t\x12\x17\n\x0f\x66\x65\x65\x64\x62\x61\x63k_source\x18\x02 \x01(\t\x12\x0c\n\x04text\x18\x03 \x01(\t\x12.\n\ncreated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"\xac\x01\n\x19\x43reateFeedbackAnalysisRes\x12\x13\n\x0b\x66\x65\x65\x64\x62\x61\x63k_id\x18\x01 \x01(\t\x12\x17\n\x0f\x66\x65\x65\x64\x62\x61\x63k_source\x18\x02 \x01(\t\x12\x0c\n\x04text\x18\x03 \x01(\t\x12.\n\ncreated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x10\n\x08keywords\x18\x05 \x01(\t\x12\x11\n\tsentiment\x18\x06 \x01(\t2\x80\x01\n\x10NlpWorkerService\x12l\n\x16\x43reateFeedbackAnalysis\x12(.readerService.CreateFeedbackAnalysisReq\x1a(.readerService.CreateFeedbackAnalysisResB\x12Z\x10./;readerServiceb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n/proto/nlp_worker_reader/nlp_worker_reader.proto\x12\rreaderService\x1a\x1fgoogle/protobuf/timestamp.proto\x1a google/protobuf/field_mask.proto\"\x9d\x01\n\x19\x43reateFeedbackAnalysisReq\x12\x13\n\x0b\x66\x65\x65\x64\x62\x61\x63k_id\x18\x01 \x01(\t\x12\x17\n\x0f\x66\x65\x65\x64\x62\x61\x63k_source\x18\x02 \x01(\t\x12\x0c\n\x04text\x18\x03 \x01(\t\x12.\n\ncreated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x14\n\x0c\x61nalyze_only\x18\x05 \x01(\x08\"\xbb\x01\n\x19\x43reateFeedbackAnalysisRes\x12\x13\n\x0b\x66\x65\x65\x64\x62\x61\x63k_id\x18\x01 \x01(\t\x12\x17\n\x0f\x66\x65\x65\x64\x62\x61\x63k_source\x18\x02 \x01(\t\x12\x0c\n\x04text\x18\x03 \x01(\t\x12.\n\ncreated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x10\n\x08keywords\x18\x05 \x01(\t\x12\x11\n\tsentiment\x18\x06 \x01(\t\x12\r\n\x05\x65rror\x18\x07 \x01(\t\"\\\n\x1e\x42\x61tchCreateFeedbackAnalysisReq\x12:\n\x08requests\x18\x01 \x03(\x0b\x32(.readerService.CreateFeedbackAnalysisReq\"L\n\x15\x46\x65\x65\x64\x62\x61\x63kAnalysisError\x12\r\n\x05index\x18\x01 \x01(\x05\x12\x13\n\x0b\x66\x65\x65\x64\x62\x61\x63k_id\x18\x02 \x01(\t\x12\x0f\n\x07message\x18\x03 \x01(\t\"\x91\x01\n\x1e\x42\x61tchCreateFeedbackAnalysisRes\x12\x39\n\x07results\x18\x01 \x03(\x0b\x32(.readerService.CreateFeedbackAnalysisRes\x12\x34\n\x06\x65rrors\x18\x02 \x03(\x0b\x32$.readerService.FeedbackAnalysisError\"\xd4\x01\n\x10\x46\x65\x65\x64\x62\x61\x63kAnalysis\x12\x13\n\x0b\x66\x65\x65\x64\x62\x61\x63k_id\x18\x01 \x01(\t\x12\x17\n\x0f\x66\x65\x65\x64\x62\x61\x63k_source\x18\x02 \x01(\t\x12\x0c\n\x04text\x18\x03 \x01(\t\x12.\n\ncreated_at\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x10\n\x08keywords\x18\x05 \x01(\t\x12\x11\n\tsentiment\x18\x06 \x01(\t\x12/\n\x0b\x61nalyzed_at\x18\x07 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\"\\\n\x16GetFeedbackAnalysisReq\x12\x13\n\x0b\x66\x65\x65\x64\x62\x61\x63k_id\x18\x01 \x01(\t\x12-\n\tread_mask\x18\x02 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"K\n\x16GetFeedbackAnalysisRes\x12\x31\n\x08\x61nalysis\x18\x01 \x01(\x0b\x32\x1f.readerService.FeedbackAnalysis\"\x88\x01\n\x17ListFeedbackAnalysesReq\x12\x17\n\x0f\x66\x65\x65\x64\x62\x61\x63k_source\x18\x01 \x01(\t\x12\x11\n\tpage_size\x18\x02 \x01(\x05\x12\x12\n\npage_token\x18\x03 \x01(\t\x12-\n\tread_mask\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.FieldMask\"e\n\x17ListFeedbackAnalysesRes\x12\x31\n\x08\x61nalyses\x18\x01 \x03(\x0b\x32\x1f.readerService.FeedbackAnalysis\x12\x17\n\x0fnext_page_token\x18\x02 \x01(\t\"4\n\x19GetSentimentStatisticsReq\x12\x17\n\x0f\x66\x65\x65\x64\x62\x61\x63k_source\x18\x01 \x01(\t\"\xe9\x01\n\x19GetSentimentStatisticsRes\x12\x16\n\x0etotal_feedback\x18\x01 \x01(\x03\x12\x16\n\x0epositive_count\x18\x02 \x01(\x03\x12\x16\n\x0enegative_count\x18\x03 \x01(\x03\x12\x15\n\rneutral_count\x18\x04 \x01(\x03\x12\x1b\n\x13positive_percentage\x18\x05 \x01(\x01\x12\x1b\n\x13negative_percentage\x18\x06 \x01(\x01\x12\x1a\n\x12neutral_percentage\x18\x07 \x01(\x01\x12\x17\n\x0f\x66\x65\x65\x64\x62\x61\x63k_source\x18\x08 \x01(\t2\xac\x05\n\x10NlpWorkerService\x12l\n\x16\x43reateFeedbackAnalysis\x12(.readerService.CreateFeedbackAnalysisReq\x1a(.readerService.CreateFeedbackAnalysisRes\x12{\n\x1b\x42\x61tchCreateFeedbackAnalysis\x12-.readerService.BatchCreateFeedbackAnalysisReq\x1a-.readerService.BatchCreateFeedbackAnalysisRes\x12p\n\x16StreamFeedbackAnalysis\x12(.readerService.CreateFeedbackAnalysisReq\x1a(.readerService.CreateFeedbackAnalysisRes(\x01\x30\x01\x12\x63\n\x13GetFeedbackAnalysis\x12%.readerService.GetFeedbackAnalysisReq\x1a%.readerService.GetFeedbackAnalysisRes\x12h\n\x14ListFeedbackAnalyses\x12&.readerService.ListFeedbackAnalysesReq\x1a&.readerService.ListFeedbackAnalysesRes0\x01\x12l\n\x16GetSentimentStatistics\x12(.readerService.GetSentimentStatisticsReq\x1a(.readerService.GetSentimentStatisticsResB\x12Z\x10./;readerServiceb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -33,10 +34,30 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'proto.nlp_worker_reader.nlp
 if not _descriptor._USE_C_DESCRIPTORS:
   _globals['DESCRIPTOR']._loaded_options = None
   _globals['DESCRIPTOR']._serialized_options = b'Z\020./;readerService'
-  _globals['_CREATEFEEDBACKANALYSISREQ']._serialized_start=100
-  _globals['_CREATEFEEDBACKANALYSISREQ']._serialized_end=235
-  _globals['_CREATEFEEDBACKANALYSISRES']._serialized_start=238
-  _globals['_CREATEFEEDBACKANALYSISRES']._serialized_end=410
-  _globals['_NLPWORKERSERVICE']._serialized_start=413
-  _globals['_NLPWORKERSERVICE']._serialized_end=541
+  _globals['_CREATEFEEDBACKANALYSISREQ']._serialized_start=134
+  _globals['_CREATEFEEDBACKANALYSISREQ']._serialized_end=291
+  _globals['_CREATEFEEDBACKANALYSISRES']._serialized_start=294
+  _globals['_CREATEFEEDBACKANALYSISRES']._serialized_end=481
+  _globals['_BATCHCREATEFEEDBACKANALYSISREQ']._serialized_start=483
+  _globals['_BATCHCREATEFEEDBACKANALYSISREQ']._serialized_end=575
+  _globals['_FEEDBACKANALYSISERROR']._serialized_start=577
+  _globals['_FEEDBACKANALYSISERROR']._serialized_end=653
+  _globals['_BATCHCREATEFEEDBACKANALYSISRES']._serialized_start=656
+  _globals['_BATCHCREATEFEEDBACKANALYSISRES']._serialized_end=801
+  _globals['_FEEDBACKANALYSIS']._serialized_start=804
+  _globals['_FEEDBACKANALYSIS']._serialized_end=1016
+  _globals['_GETFEEDBACKANALYSISREQ']._serialized_start=1018
+  _globals['_GETFEEDBACKANALYSISREQ']._serialized_end=1110
+  _globals['_GETFEEDBACKANALYSISRES']._serialized_start=1112
+  _globals['_GETFEEDBACKANALYSISRES']._serialized_end=1187
+  _globals['_LISTFEEDBACKANALYSESREQ']._serialized_start=1190
+  _globals['_LISTFEEDBACKANALYSESREQ']._serialized_end=1326
+  _globals['_LISTFEEDBACKANALYSESRES']._serialized_start=1328
+  _globals['_LISTFEEDBACKANALYSESRES']._serialized_end=1429
+  _globals['_GETSENTIMENTSTATISTICSREQ']._serialized_start=1431
+  _globals['_GETSENTIMENTSTATISTICSREQ']._serialized_end=1483
+  _globals['_GETSENTIMENTSTATISTICSRES']._serialized_start=1486
+  _globals['_GETSENTIMENTSTATISTICSRES']._serialized_end=1719
+  _globals['_NLPWORKERSERVICE']._serialized_start=1722
+  _globals['_NLPWORKERSERVICE']._serialized_end=2406
 # @@protoc_insertion_point(module_scope)
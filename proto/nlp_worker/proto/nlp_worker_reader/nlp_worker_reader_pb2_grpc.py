@@ -39,6 +39,31 @@ class NlpWorkerServiceStub(object):
                 request_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.CreateFeedbackAnalysisReq.SerializeToString,
                 response_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.CreateFeedbackAnalysisRes.FromString,
                 _registered_method=True)
+        self.BatchCreateFeedbackAnalysis = channel.unary_unary(
+                '/readerService.NlpWorkerService/BatchCreateFeedbackAnalysis',
+                request_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.BatchCreateFeedbackAnalysisReq.SerializeToString,
+                response_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.BatchCreateFeedbackAnalysisRes.FromString,
+                _registered_method=True)
+        self.StreamFeedbackAnalysis = channel.stream_stream(
+                '/readerService.NlpWorkerService/StreamFeedbackAnalysis',
+                request_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.CreateFeedbackAnalysisReq.SerializeToString,
+                response_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.CreateFeedbackAnalysisRes.FromString,
+                _registered_method=True)
+        self.GetFeedbackAnalysis = channel.unary_unary(
+                '/readerService.NlpWorkerService/GetFeedbackAnalysis',
+                request_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetFeedbackAnalysisReq.SerializeToString,
+                response_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetFeedbackAnalysisRes.FromString,
+                _registered_method=True)
+        self.ListFeedbackAnalyses = channel.unary_stream(
+                '/readerService.NlpWorkerService/ListFeedbackAnalyses',
+                request_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.ListFeedbackAnalysesReq.SerializeToString,
+                response_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.ListFeedbackAnalysesRes.FromString,
+                _registered_method=True)
+        self.GetSentimentStatistics = channel.unary_unary(
+                '/readerService.NlpWorkerService/GetSentimentStatistics',
+                request_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetSentimentStatisticsReq.SerializeToString,
+                response_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetSentimentStatisticsRes.FromString,
+                _registered_method=True)
 
 
 class NlpWorkerServiceServicer(object):
@@ -50,6 +75,36 @@ class NlpWorkerServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def BatchCreateFeedbackAnalysis(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamFeedbackAnalysis(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetFeedbackAnalysis(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ListFeedbackAnalyses(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetSentimentStatistics(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_NlpWorkerServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -58,6 +113,31 @@ def add_NlpWorkerServiceServicer_to_server(servicer, server):
                     request_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.CreateFeedbackAnalysisReq.FromString,
                     response_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.CreateFeedbackAnalysisRes.SerializeToString,
             ),
+            'BatchCreateFeedbackAnalysis': grpc.unary_unary_rpc_method_handler(
+                    servicer.BatchCreateFeedbackAnalysis,
+                    request_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.BatchCreateFeedbackAnalysisReq.FromString,
+                    response_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.BatchCreateFeedbackAnalysisRes.SerializeToString,
+            ),
+            'StreamFeedbackAnalysis': grpc.stream_stream_rpc_method_handler(
+                    servicer.StreamFeedbackAnalysis,
+                    request_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.CreateFeedbackAnalysisReq.FromString,
+                    response_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.CreateFeedbackAnalysisRes.SerializeToString,
+            ),
+            'GetFeedbackAnalysis': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetFeedbackAnalysis,
+                    request_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetFeedbackAnalysisReq.FromString,
+                    response_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetFeedbackAnalysisRes.SerializeToString,
+            ),
+            'ListFeedbackAnalyses': grpc.unary_stream_rpc_method_handler(
+                    servicer.ListFeedbackAnalyses,
+                    request_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.ListFeedbackAnalysesReq.FromString,
+                    response_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.ListFeedbackAnalysesRes.SerializeToString,
+            ),
+            'GetSentimentStatistics': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetSentimentStatistics,
+                    request_deserializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetSentimentStatisticsReq.FromString,
+                    response_serializer=proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetSentimentStatisticsRes.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'readerService.NlpWorkerService', rpc_method_handlers)
@@ -95,3 +175,138 @@ class NlpWorkerService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def BatchCreateFeedbackAnalysis(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/readerService.NlpWorkerService/BatchCreateFeedbackAnalysis',
+            proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.BatchCreateFeedbackAnalysisReq.SerializeToString,
+            proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.BatchCreateFeedbackAnalysisRes.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamFeedbackAnalysis(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_stream(
+            request_iterator,
+            target,
+            '/readerService.NlpWorkerService/StreamFeedbackAnalysis',
+            proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.CreateFeedbackAnalysisReq.SerializeToString,
+            proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.CreateFeedbackAnalysisRes.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetFeedbackAnalysis(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/readerService.NlpWorkerService/GetFeedbackAnalysis',
+            proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetFeedbackAnalysisReq.SerializeToString,
+            proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetFeedbackAnalysisRes.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ListFeedbackAnalyses(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/readerService.NlpWorkerService/ListFeedbackAnalyses',
+            proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.ListFeedbackAnalysesReq.SerializeToString,
+            proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.ListFeedbackAnalysesRes.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetSentimentStatistics(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/readerService.NlpWorkerService/GetSentimentStatistics',
+            proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetSentimentStatisticsReq.SerializeToString,
+            proto_dot_nlp__worker__reader_dot_nlp__worker__reader__pb2.GetSentimentStatisticsRes.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
+# source: proto/nlp_worker_records/nlp_worker_records.proto
+# Protobuf Python Version: 6.31.1
+"""Generated protocol buffer code."""
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    6,
+    31,
+    1,
+    '',
+    'proto/nlp_worker_records/nlp_worker_records.proto'
+)
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+from google.protobuf import timestamp_pb2 as google_dot_protobuf_dot_timestamp__pb2
+
+
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n1proto/nlp_worker_records/nlp_worker_records.proto\x12\x10nlpWorkerRecords\x1a\x1fgoogle/protobuf/timestamp.proto\"\xf6\x01\n\x16\x46\x65\x65\x64\x62\x61\x63kAnalysisRecord\x12\x12\n\nFeedbackID\x18\x01 \x01(\t\x12\x16\n\x0e\x46\x65\x65\x64\x62\x61\x63kSource\x18\x02 \x01(\t\x12\x0c\n\x04Text\x18\x03 \x01(\t\x12\x35\n\x11\x46\x65\x65\x64\x62\x61\x63kTimestamp\x18\x04 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x10\n\x08Keywords\x18\x05 \x03(\t\x12\x11\n\tSentiment\x18\x06 \x01(\t\x12.\n\nAnalyzedAt\x18\x07 \x01(\x0b\x32\x1a.google.protobuf.Timestamp\x12\x16\n\x0e\x43ompressedText\x18\x08 \x01(\x0c\"[\n\x1d\x46\x65\x65\x64\x62\x61\x63kAnalysisRecordCreated\x12:\n\x08\x46\x65\x65\x64\x62\x61\x63k\x18\x01 \x01(\x0b\x32(.nlpWorkerRecords.FeedbackAnalysisRecord\"W\n\x1a\x46\x65\x65\x64\x62\x61\x63kAnalysisRecordList\x12\x39\n\x07Records\x18\x01 \x03(\x0b\x32(.nlpWorkerRecords.FeedbackAnalysisRecordB\x15Z\x13./;nlpWorkerRecordsb\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'proto.nlp_worker_records.nlp_worker_records_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  _globals['DESCRIPTOR']._loaded_options = None
+  _globals['DESCRIPTOR']._serialized_options = b'Z\023./;nlpWorkerRecords'
+  _globals['_FEEDBACKANALYSISRECORD']._serialized_start=105
+  _globals['_FEEDBACKANALYSISRECORD']._serialized_end=351
+  _globals['_FEEDBACKANALYSISRECORDCREATED']._serialized_start=353
+  _globals['_FEEDBACKANALYSISRECORDCREATED']._serialized_end=444
+  _globals['_FEEDBACKANALYSISRECORDLIST']._serialized_start=446
+  _globals['_FEEDBACKANALYSISRECORDLIST']._serialized_end=533
+# @@protoc_insertion_point(module_scope)
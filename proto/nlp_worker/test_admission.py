@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for admission control and load shedding
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from unittest import mock
+
+from config.config import AdmissionConfig, load_config
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.service.async_feedback_analysis_service import AsyncFeedbackAnalysisService
+from internal.feedback_analysis.service.feedback_analysis_service import FeedbackAnalysisService
+from internal.feedback_analysis.service.single_flight import SingleFlight
+from internal.server.admission import AdmissionController, AdmissionRejected, DeadlineExpired
+
+logger = logging.getLogger("test_admission")
+
+
+def _controller(max_queued: int = 4, service_time_ms: float = 100.0, workers: int = 1) -> AdmissionController:
+    config = AdmissionConfig(maxQueuedItems=max_queued, initialServiceTimeMs=service_time_ms, readyQueueRatio=0.5)
+    return AdmissionController(config, workers, mock.Mock(), logger)
+
+
+def _rejection(admission: AdmissionController, time_remaining, cost: int = 1) -> AdmissionRejected:
+    try:
+        admission.admit(time_remaining, cost)
+    except AdmissionRejected as e:
+        return e
+    raise AssertionError("request was admitted")
+
+
+def test_queue_full_is_shed():
+    admission = _controller(max_queued=4)
+    admission.admit(None, 4)
+
+    rejected = _rejection(admission, None)
+    assert rejected.reason == "queue_full"
+    admission.metrics.shed_requests.labels.assert_called_with("queue_full")
+    assert admission.in_flight == 4
+
+
+def test_oversized_request_is_admitted_when_idle():
+    """A batch above the queue limit still runs when nothing else is queued"""
+    admission = _controller(max_queued=4)
+    ticket = admission.admit(None, 10)
+    assert admission.in_flight == 10
+    admission.release(ticket)
+    assert admission.in_flight == 0
+
+
+def test_unmeetable_and_expired_deadlines_are_shed():
+    admission = _controller(service_time_ms=100.0)
+    admission.admit(None, 3)
+
+    # Three items ahead and one worker: about 400ms until this one finishes
+    assert _rejection(admission, 0.3).reason == "deadline_unmeetable"
+    assert isinstance(_rejection(admission, 0.0), DeadlineExpired)
+    admission.admit(0.5)
+    assert admission.in_flight == 4
+
+
+def test_release_counts_work_that_expired_in_the_queue():
+    admission = _controller(service_time_ms=1.0)
+    ticket = admission.admit(0.05)
+    time.sleep(0.06)
+    try:
+        ticket.check_deadline()
+        raise AssertionError("deadline did not expire")
+    except DeadlineExpired:
+        pass
+
+    admission.release(ticket)
+    assert admission.in_flight == 0
+    admission.metrics.shed_requests.labels.assert_called_with("deadline_expired")
+
+
+def test_refund_and_charge():
+    """A refunded ticket frees its capacity once, charge() takes it back without shedding"""
+    admission = _controller(max_queued=1)
+    ticket = admission.admit(None)
+
+    admission.refund(ticket)
+    assert admission.in_flight == 0 and ticket.cost == 0
+    other = admission.admit(None)
+
+    admission.charge(ticket)
+    assert admission.in_flight == 2 and ticket.cost == 1
+    admission.release(ticket)
+    admission.release(other)
+    assert admission.in_flight == 0
+
+
+def test_readiness_fails_near_the_queue_limit():
+    admission = _controller(max_queued=4)
+    tickets = [admission.admit(None) for _ in range(2)]
+    assert admission.check()[0] is False
+    admission.release(tickets.pop())
+    assert admission.check()[0] is True
+
+
+class _SlowService:
+    """The parts of FeedbackAnalysisService the async service uses, with a blocking analysis"""
+
+    feedback_key = FeedbackAnalysisService.feedback_key
+
+    def __init__(self):
+        self.inflight = SingleFlight()
+        self.analyzed = []
+        self.release = threading.Event()
+
+    def analyze(self, feedback_id, feedback_source, text, created_at):
+        self.analyzed.append(feedback_id)
+        if feedback_id == "blocker":
+            self.release.wait(5)
+        return FeedbackAnalysisResult(feedback_id, feedback_source, text, created_at, "kw", "positive", datetime.now())
+
+    def save_analysis_result(self, result):
+        return True
+
+
+def test_follower_retries_when_the_leader_deadline_expires():
+    """A coalesced caller with time left reruns the work under its own ticket after the leader's deadline"""
+    config = load_config("config/config.yaml")
+    config.grpc.analysisWorkers = 1
+    admission = _controller(max_queued=16, service_time_ms=1.0)
+    service = _SlowService()
+    async_service = AsyncFeedbackAnalysisService(config, mock.Mock(), logger, service, admission)
+
+    async def call(feedback_id, time_remaining):
+        ticket = admission.admit(time_remaining)
+        try:
+            return await async_service.analyze_feedback(feedback_id, "app_store", "same text", datetime.now(),
+                                                        ticket=ticket)
+        finally:
+            admission.release(ticket)
+
+    async def main():
+        # Occupy the only analysis worker so the leader's ticket expires while queued
+        blocker = asyncio.ensure_future(call("blocker", None))
+        await asyncio.sleep(0.05)
+        leader = asyncio.ensure_future(call("f-1", 0.1))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(call("f-1", 5.0))
+        await asyncio.sleep(0.01)
+        # The follower waits without holding queue capacity
+        assert admission.in_flight == 2
+
+        await asyncio.sleep(0.15)
+        service.release.set()
+        return await asyncio.gather(blocker, leader, follower, return_exceptions=True)
+
+    try:
+        _, leader, follower = asyncio.run(main())
+    finally:
+        async_service.shutdown()
+
+    assert isinstance(leader, DeadlineExpired)
+    assert follower.feedback_id == "f-1"
+    assert service.analyzed == ["blocker", "f-1"]
+    assert admission.in_flight == 0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
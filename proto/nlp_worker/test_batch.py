@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch analysis RPC: the batch size limit and per-item errors
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from unittest import mock
+
+import grpc
+
+from config.config import load_config
+from internal.feedback_analysis.delivery.grpc.grpc_service import NlpWorkerGrpcService
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.repository.feedback_analysis_repository import create_repository
+from internal.feedback_analysis.service.async_feedback_analysis_service import AsyncFeedbackAnalysisService
+from internal.feedback_analysis.service.feedback_analysis_service import FeedbackAnalysisService
+from proto.nlp_worker_reader import nlp_worker_reader_pb2
+
+logger = logging.getLogger("test_batch")
+
+
+class _Aborted(Exception):
+    def __init__(self, code, details):
+        super().__init__(details)
+        self.code = code
+
+
+def _context():
+    """A servicer context whose abort() raises, as grpc.aio's does"""
+    async def abort(code, details):
+        raise _Aborted(code, details)
+
+    context = mock.Mock()
+    context.abort = abort
+    context.time_remaining.return_value = None
+    return context
+
+
+def _service(config, fail_analysis=(), fail_save=()):
+    """FeedbackAnalysisService over the in-memory repository, with a stub analysis instead of the models"""
+    repository = create_repository(config, logger)
+    save_analysis_results = repository.save_analysis_results
+
+    def save(results):
+        failed = save_analysis_results([result for result in results if result.feedback_id not in fail_save])
+        return list(failed) + [result.feedback_id for result in results if result.feedback_id in fail_save]
+
+    repository.save_analysis_results = save
+
+    def analyze(feedback_id, feedback_source, text, created_at, path="grpc"):
+        if feedback_id in fail_analysis:
+            raise ValueError("model failed")
+        return FeedbackAnalysisResult(feedback_id, feedback_source, text, created_at, "kw", "positive", datetime.now())
+
+    service = FeedbackAnalysisService.__new__(FeedbackAnalysisService)
+    service.repository = repository
+    service.metrics = mock.MagicMock()
+    service.logger = logger
+    service.analyze = analyze
+    return service
+
+
+def _request(*feedback_ids: str, analyze_only: bool = False):
+    return nlp_worker_reader_pb2.BatchCreateFeedbackAnalysisReq(requests=[
+        nlp_worker_reader_pb2.CreateFeedbackAnalysisReq(
+            feedback_id=feedback_id, feedback_source="app_store", text="fast delivery", analyze_only=analyze_only,
+        )
+        for feedback_id in feedback_ids
+    ])
+
+
+def _call(config, service: FeedbackAnalysisService, request):
+    async_service = AsyncFeedbackAnalysisService(config, mock.MagicMock(), logger, service)
+    handler = NlpWorkerGrpcService(logger, config, async_service, mock.MagicMock())
+    try:
+        return asyncio.run(handler.BatchCreateFeedbackAnalysis(request, _context()))
+    finally:
+        async_service.shutdown()
+
+
+def _config():
+    config = load_config("config/config.yaml")
+    config.storage.backend = "memory"
+    config.storage.dropTextFromOutput = False
+    return config
+
+
+def test_batch_over_the_limit_is_rejected():
+    config = _config()
+    config.grpc.maxBatchSize = 2
+    service = _service(config)
+    service.analyze = mock.Mock()
+
+    try:
+        _call(config, service, _request("f-1", "f-2", "f-3"))
+        raise AssertionError("oversized batch was accepted")
+    except _Aborted as e:
+        assert e.code == grpc.StatusCode.INVALID_ARGUMENT
+    service.analyze.assert_not_called()
+
+
+def test_item_errors_keep_their_index():
+    """An analysis or save failure fails only its item, the rest are answered and stored"""
+    config = _config()
+    service = _service(config, fail_analysis={"f-2"}, fail_save={"f-3"})
+
+    response = _call(config, service, _request("f-1", "f-2", "f-3", "f-4"))
+    assert [result.feedback_id for result in response.results] == ["f-1", "f-4"]
+    assert [(error.index, error.feedback_id) for error in response.errors] == [(1, "f-2"), (2, "f-3")]
+    assert response.errors[0].message.startswith("analysis failed")
+    assert response.errors[1].message == "failed to save analysis result"
+    assert service.repository.get_analysis_result("f-1") is not None
+    assert service.repository.get_analysis_result("f-3") is None
+
+
+def test_analyze_only_batch_is_not_stored():
+    config = _config()
+    service = _service(config)
+
+    response = _call(config, service, _request("f-1", "f-2", analyze_only=True))
+    assert [result.feedback_id for result in response.results] == ["f-1", "f-2"]
+    assert list(response.errors) == []
+    assert service.repository.get_analysis_result("f-1") is None
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the repository cache layer
+"""
+
+import logging
+from datetime import datetime
+from unittest import mock
+
+from config.config import load_config
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.repository.feedback_analysis_cache import (
+    CachedFeedbackAnalysisRepository,
+    InMemoryCacheClient,
+)
+from internal.feedback_analysis.repository.feedback_analysis_repository import create_repository
+
+logger = logging.getLogger("test_cache")
+
+
+class UnreachableCacheClient(InMemoryCacheClient):
+    """Cache client failing every call, like Redis behind a connect timeout"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def _fail(self, *args):
+        self.calls += 1
+        raise ConnectionError("connection refused")
+
+    get = set = delete = set_many = delete_many = _fail
+
+
+def _cached(cache=None):
+    config = load_config("config/config.yaml")
+    config.storage.backend = "memory"
+    repository = create_repository(config, logger)
+    return CachedFeedbackAnalysisRepository(repository, cache or InMemoryCacheClient(), config, mock.Mock(), logger)
+
+
+def _result(feedback_id: str, sentiment: str = "positive") -> FeedbackAnalysisResult:
+    return FeedbackAnalysisResult(
+        feedback_id=feedback_id,
+        feedback_source="app_store",
+        text=f"feedback {feedback_id}",
+        created_at=datetime(2026, 10, 18, 9),
+        keywords="fast, cheap",
+        sentiment=sentiment,
+        analyzed_at=datetime(2026, 10, 18, 9, 1),
+    )
+
+
+def test_reads_are_served_from_the_cache():
+    """A second read decodes the cached entry instead of asking the repository"""
+    cached = _cached()
+    cached.save_analysis_result(_result("1"))
+    cached.repository.delete_analysis_result("1")
+
+    result = cached.get_analysis_result("1")
+    assert result == _result("1")
+
+
+def test_failed_cache_is_bypassed_for_the_backoff():
+    """After one failure the cache is not called again until the backoff expires"""
+    cache = UnreachableCacheClient()
+    cached = _cached(cache)
+
+    for index in range(10):
+        assert cached.save_analysis_result(_result(str(index)))
+        assert cached.get_analysis_result(str(index)) == _result(str(index))
+    assert cache.calls == 1
+
+    cached._bypass_until = 0.0
+    cached.get_sentiment_statistics()
+    assert cache.calls == 2
+
+
+def test_statistics_are_dropped_on_save():
+    """Saving results invalidates the per-source and all-sources statistics"""
+    cached = _cached()
+    cached.save_analysis_result(_result("1"))
+    assert cached.get_sentiment_statistics()["total"] == 1
+    assert cached.get_sentiment_statistics("app_store")["total"] == 1
+
+    cached.save_analysis_results([_result("2"), _result("3", "negative")])
+    assert cached.get_sentiment_statistics()["total"] == 3
+    assert cached.get_sentiment_statistics("app_store")["negative"] == 1
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
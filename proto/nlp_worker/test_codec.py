@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the versioned record codec
+"""
+
+from datetime import datetime
+
+from google.protobuf import descriptor_pb2, descriptor_pool, message_factory, timestamp_pb2
+
+from internal.feedback_analysis.models import codec
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.models.text_compression import TextCompressor
+
+
+def _result(feedback_id: str = "f-1", text: str = "Fast delivery, cheap price") -> FeedbackAnalysisResult:
+    return FeedbackAnalysisResult(
+        feedback_id=feedback_id,
+        feedback_source="app_store",
+        text=text,
+        created_at=datetime(2026, 10, 18, 9, 30, 15, 123456),
+        keywords="delivery, price",
+        sentiment="positive",
+        analyzed_at=datetime(2026, 10, 18, 9, 30, 16, 654321),
+    )
+
+
+def _feedback_created_class():
+    """kafkaMessages.FeedbackCreated as declared in proto/kafka/kafka.proto, the topic's reader schema"""
+    pool = descriptor_pool.DescriptorPool()
+    pool.AddSerializedFile(timestamp_pb2.DESCRIPTOR.serialized_pb)
+
+    file = descriptor_pb2.FileDescriptorProto(
+        name="kafka.proto", package="kafkaMessages", syntax="proto3",
+        dependency=["google/protobuf/timestamp.proto"],
+    )
+    field = descriptor_pb2.FieldDescriptorProto
+    feedback = file.message_type.add(name="Feedback")
+    for number, name, kind, label in (
+        (1, "FeedbackID", field.TYPE_STRING, field.LABEL_OPTIONAL),
+        (2, "FeedbackSource", field.TYPE_STRING, field.LABEL_OPTIONAL),
+        (3, "Text", field.TYPE_STRING, field.LABEL_OPTIONAL),
+        (4, "FeedbackTimestamp", field.TYPE_MESSAGE, field.LABEL_OPTIONAL),
+        (5, "Keywords", field.TYPE_STRING, field.LABEL_REPEATED),
+        (6, "Sentiment", field.TYPE_STRING, field.LABEL_OPTIONAL),
+    ):
+        added = feedback.field.add(name=name, number=number, type=kind, label=label)
+        if kind == field.TYPE_MESSAGE:
+            added.type_name = ".google.protobuf.Timestamp"
+    created = file.message_type.add(name="FeedbackCreated")
+    created.field.add(name="Feedback", number=1, type=field.TYPE_MESSAGE, label=field.LABEL_OPTIONAL,
+                      type_name=".kafkaMessages.Feedback")
+
+    pool.Add(file)
+    return message_factory.GetMessageClass(pool.FindMessageTypeByName("kafkaMessages.FeedbackCreated"))
+
+
+def test_result_round_trip():
+    """Every field, microseconds included, survives encode_result/decode_result"""
+    result = _result()
+    data = codec.encode_result(result)
+    assert data[0] == codec.RECORD_FORMAT_VERSION
+    assert codec.decode_result(data) == result
+
+
+def test_result_list_round_trip():
+    results = [_result("f-1"), _result("f-2", text="")]
+    assert codec.decode_results(codec.encode_results(results)) == results
+    assert codec.decode_results(codec.encode_results([])) == []
+
+
+def test_compressed_round_trip_keeps_text_compressed():
+    """Text is stored compressed and only decompressed when read"""
+    compressor = TextCompressor("zlib", min_size=1)
+    result = _result(text="great product " * 40)
+
+    decoded = codec.decode_result(codec.encode_result(result, compressor), compressor)
+    assert decoded.text is None
+    assert decoded.compressed_text is not None
+    assert decoded.get_text() == result.text
+
+
+def test_unknown_version_is_rejected():
+    data = codec.encode_result(_result())
+    for payload in (b"", bytes([codec.RECORD_FORMAT_VERSION + 1]) + data[1:]):
+        try:
+            codec.decode_result(payload)
+        except codec.CodecError:
+            continue
+        raise AssertionError(f"decoded {payload!r}")
+
+
+def test_analyzed_message_reads_as_feedback_created():
+    """Consumers of the feedback_analyzed topic parse the payload with kafkaMessages.FeedbackCreated"""
+    result = _result()
+    message = _feedback_created_class().FromString(codec.encode_analyzed_message(result))
+
+    feedback = message.Feedback
+    assert feedback.FeedbackID == result.feedback_id
+    assert feedback.FeedbackSource == result.feedback_source
+    assert feedback.Text == result.text
+    assert list(feedback.Keywords) == ["delivery", "price"]
+    assert feedback.Sentiment == result.sentiment
+    assert feedback.FeedbackTimestamp.ToDatetime() == result.created_at
+
+
+def test_feedback_created_decodes_as_analyzed_message():
+    """Messages written by producers of kafkaMessages.FeedbackCreated decode with the worker's codec"""
+    message_class = _feedback_created_class()
+    message = message_class()
+    message.Feedback.FeedbackID = "f-9"
+    message.Feedback.FeedbackSource = "website"
+    message.Feedback.Text = "Slow"
+    message.Feedback.Keywords.extend(["slow", "support"])
+    message.Feedback.Sentiment = "negative"
+    message.Feedback.FeedbackTimestamp.FromDatetime(datetime(2026, 10, 18, 9))
+
+    result = codec.decode_analyzed_message(message.SerializeToString())
+    assert (result.feedback_id, result.feedback_source, result.text) == ("f-9", "website", "Slow")
+    assert result.keywords == "slow, support"
+    assert result.created_at == datetime(2026, 10, 18, 9)
+
+
+def test_analyzed_message_without_text():
+    message = _feedback_created_class().FromString(codec.encode_analyzed_message(_result(), include_text=False))
+    assert message.Feedback.Text == ""
+    assert message.Feedback.FeedbackID == "f-1"
+
+
+def test_page_token_round_trip():
+    created_at = datetime(2026, 10, 18, 9, 30)
+    assert codec.decode_page_token(codec.encode_page_token(created_at, "f-1")) == (created_at, "f-1")
+    try:
+        codec.decode_page_token("not a token")
+    except codec.CodecError:
+        return
+    raise AssertionError("decoded an invalid page token")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
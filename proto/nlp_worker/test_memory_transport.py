@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory Kafka transport and the consumer's offset handling on top of it
+"""
+
+import threading
+import time
+from datetime import datetime
+from unittest import mock
+
+from kafka.errors import CommitFailedError
+from kafka.structs import TopicPartition
+
+from config.config import load_config
+from google.protobuf.timestamp_pb2 import Timestamp
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.repository.feedback_analysis_repository import create_repository
+from internal.kafka.consumer import KafkaConsumerService, encode_key, protobuf_deserializer
+from internal.kafka.memory_transport import InMemoryBroker, InMemoryConsumer, InMemoryProducer
+from internal.kafka.offset_tracker import OffsetTracker
+from proto.nlp_worker_reader import nlp_worker_reader_pb2
+
+TOPIC = "feedback"
+GROUP = "workers"
+
+
+def _consumer(broker: InMemoryBroker, **kwargs) -> InMemoryConsumer:
+    kwargs.setdefault("auto_offset_reset", "earliest")
+    kwargs.setdefault("enable_auto_commit", False)
+    return InMemoryConsumer(broker, TOPIC, group_id=GROUP, **kwargs)
+
+
+def _values(records) -> list:
+    return [record.value for batch in records.values() for record in batch]
+
+
+def test_produce_and_consume():
+    broker = InMemoryBroker()
+    producer = InMemoryProducer(broker, key_serializer=encode_key)
+    metadata = producer.send(TOPIC, value=b"first", key="f-1").get()
+    producer.send(TOPIC, value=b"second")
+    assert (metadata.partition, metadata.offset) == (0, 0)
+
+    consumer = _consumer(broker)
+    assert _values(consumer.poll()) == [b"first", b"second"]
+    assert consumer.poll() == {}
+    assert broker.records(TOPIC)[0].key == b"f-1"
+
+
+def test_keys_pick_stable_partitions():
+    broker = InMemoryBroker(default_partitions=4)
+    keys = [f"f-{index}".encode() for index in range(20)]
+    first = [broker.append(TOPIC, b"v", key).partition for key in keys]
+    assert first == [broker.append(TOPIC, b"v", key).partition for key in keys]
+    assert len(set(first)) > 1
+
+
+def test_new_member_resumes_from_the_committed_offset():
+    broker = InMemoryBroker()
+    for index in range(5):
+        broker.append(TOPIC, str(index).encode())
+    partition = TopicPartition(TOPIC, 0)
+
+    consumer = _consumer(broker)
+    assert len(_values(consumer.poll(max_records=3))) == 3
+    consumer.commit({partition: 2})
+    assert broker.committed(GROUP, partition) == 2
+    assert broker.lag(GROUP, TOPIC) == 3
+    consumer.close()
+
+    # Without auto-commit, closing keeps the committed offset rather than the position
+    other = _consumer(broker)
+    assert _values(other.poll()) == [b"2", b"3", b"4"]
+
+
+def test_auto_commit_on_close():
+    broker = InMemoryBroker()
+    broker.append(TOPIC, b"0")
+    consumer = _consumer(broker, enable_auto_commit=True)
+    consumer.poll()
+    consumer.close()
+    assert broker.committed(GROUP, TopicPartition(TOPIC, 0)) == 1
+
+
+def test_rebalance_splits_partitions_and_fences_stale_commits():
+    broker = InMemoryBroker(default_partitions=4)
+    first = _consumer(broker)
+    first.poll()
+    assert len(first.assignment()) == 4
+
+    second = _consumer(broker)
+    # Members hold nothing until every member rejoined on its next poll
+    first.poll()
+    assert first.assignment() == set()
+    second.poll()
+    first.poll()
+    assert first.assignment().isdisjoint(second.assignment())
+    assert len(first.assignment()) == len(second.assignment()) == 2
+    assert broker.rebalances(GROUP) == 2
+
+    broker.rebalance(GROUP)
+    first.poll()
+    try:
+        # A member that rejoined the new generation cannot commit until the assignment is done
+        first.commit({})
+        raise AssertionError("commit from an unassigned member succeeded")
+    except CommitFailedError:
+        pass
+
+
+def test_paused_partitions_are_not_fetched():
+    broker = InMemoryBroker()
+    consumer = _consumer(broker)
+    consumer.poll()
+    partition = TopicPartition(TOPIC, 0)
+    broker.append(TOPIC, b"0")
+
+    consumer.pause(partition)
+    assert consumer.paused() == {partition}
+    assert consumer.poll() == {}
+    consumer.resume(partition)
+    assert _values(consumer.poll()) == [b"0"]
+
+
+def test_offset_tracker_commits_only_contiguous_work():
+    """Out-of-order completions do not move the commit offset past an unfinished record"""
+    partition = TopicPartition(TOPIC, 0)
+    tracker = OffsetTracker(limit=3)
+    epochs = [tracker.start(partition, offset) for offset in (10, 11, 12)]
+    assert tracker.wait_for_capacity(0) == 0
+
+    tracker.done(partition, 11, epochs[1])
+    tracker.done(partition, 12, epochs[2])
+    assert tracker.committable() == {partition: (10, epochs[0])}
+
+    tracker.done(partition, 10, epochs[0])
+    offsets = tracker.committable()
+    assert offsets == {partition: (13, epochs[0])}
+    tracker.committed(offsets)
+    assert tracker.committable() == {}
+    assert tracker.wait_for_capacity(0) == 3
+
+
+def test_offset_tracker_ignores_work_fetched_before_a_rewind():
+    partition = TopicPartition(TOPIC, 0)
+    tracker = OffsetTracker(limit=10)
+    stale = tracker.start(partition, 5)
+    fresh = tracker.start(partition, 3)
+    tracker.done(partition, 5, stale)
+    assert tracker.processed(partition) == 3
+    tracker.done(partition, 3, fresh)
+    assert tracker.processed(partition) == 4
+    assert tracker.running == 0
+
+
+class _BlockingService:
+    """Stands in for FeedbackAnalysisService, holding every analysis until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = []
+
+    def analyze_feedback(self, feedback_id, feedback_source, text, created_at, path=None):
+        self.started.append(feedback_id)
+        self.release.wait(5)
+        return FeedbackAnalysisResult(feedback_id, feedback_source, text, created_at, "kw", "positive",
+                                      datetime.now())
+
+
+def _wait(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+def test_consumer_bounds_in_flight_work_and_commits_after_processing():
+    config = load_config("config/config.yaml")
+    config.storage.backend = "memory"
+    config.kafka.workers = 2
+    config.kafka.maxInFlightMessages = 3
+    config.kafka.commitIntervalMs = 0
+    config.kafka.pollTimeoutMs = 10
+    raw_topic = config.kafka.kafkaTopics.feedbackRaw.topicName
+    analyzed_topic = config.kafka.kafkaTopics.feedbackAnalyzed.topicName
+    partition = TopicPartition(raw_topic, 0)
+
+    broker = InMemoryBroker()
+    created_at = Timestamp()
+    created_at.GetCurrentTime()
+    for index in range(8):
+        broker.append(raw_topic, nlp_worker_reader_pb2.CreateFeedbackAnalysisReq(
+            feedback_id=f"f-{index}", feedback_source="app_store", text="fast delivery", created_at=created_at,
+        ).SerializeToString())
+
+    analysis = _BlockingService()
+    service = KafkaConsumerService(
+        config, mock.MagicMock(),
+        consumer=InMemoryConsumer(broker, group_id=config.kafka.groupID, auto_offset_reset="earliest",
+                                  enable_auto_commit=False, value_deserializer=protobuf_deserializer),
+        producer=InMemoryProducer(broker, key_serializer=encode_key),
+        repository=create_repository(config, mock.Mock()),
+        service=analysis,
+    )
+    thread = threading.Thread(target=service.start_consuming, daemon=True)
+    thread.start()
+    try:
+        _wait(lambda: service.in_flight == 3)
+        time.sleep(0.05)
+        # Fetching stops at the limit and nothing unfinished is committed
+        assert service.in_flight == 3
+        assert not broker.committed(config.kafka.groupID, partition)
+
+        analysis.release.set()
+        _wait(lambda: broker.committed(config.kafka.groupID, partition) == 8)
+    finally:
+        analysis.release.set()
+        service.stop()
+        thread.join(5)
+
+    assert sorted(analysis.started) == [f"f-{index}" for index in range(8)]
+    assert len(broker.records(analyzed_topic)) == 8
+    assert broker.lag(config.kafka.groupID, raw_topic) == 0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Backend parity tests for the feedback analysis repositories
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from unittest import mock
+
+from config.config import load_config
+from internal.feedback_analysis.delivery.grpc.grpc_service import NlpWorkerGrpcService
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.repository.feedback_analysis_cache import (
+    CachedFeedbackAnalysisRepository,
+    InMemoryCacheClient,
+)
+from internal.feedback_analysis.repository.feedback_analysis_repository import (
+    FeedbackAnalysisRepository,
+    create_repository,
+)
+from internal.feedback_analysis.service.feedback_analysis_service import FeedbackAnalysisService
+from proto.nlp_worker_reader import nlp_worker_reader_pb2
+
+# "cached" is the in-memory backend behind the analysis cache, so reads are served from encoded entries
+BACKENDS = ("memory", "sqlite", "cached")
+
+logger = logging.getLogger("test_repository")
+
+
+def _repository(backend: str):
+    config = load_config("config/config.yaml")
+    config.storage.backend = "memory" if backend == "cached" else backend
+    config.storage.sqlitePath = ":memory:"
+    repository = create_repository(config, logger)
+    if backend == "cached":
+        repository = CachedFeedbackAnalysisRepository(repository, InMemoryCacheClient(), config, mock.Mock(), logger)
+    return repository
+
+
+def _result(feedback_id: str, keywords, sentiment: str = "positive", day: int = 18) -> FeedbackAnalysisResult:
+    return FeedbackAnalysisResult(
+        feedback_id=feedback_id,
+        feedback_source="app_store",
+        text=f"feedback {feedback_id}",
+        created_at=datetime(2026, 10, day, 9),
+        keywords=keywords,
+        sentiment=sentiment,
+        analyzed_at=datetime(2026, 10, day, 9, 1),
+    )
+
+
+def test_keywords_shape_is_the_same_for_every_backend():
+    """Results read back carry keywords as the comma-joined string, whatever shape was saved"""
+    for backend in BACKENDS:
+        repository = _repository(backend)
+        repository.save_analysis_result(_result("joined", "fast, cheap"))
+        repository.save_analysis_result(_result("listed", ["fast", "cheap"]))
+
+        for feedback_id in ("joined", "listed"):
+            # The cached backend answers the second read from the cache
+            for _ in range(2):
+                result = repository.get_analysis_result(feedback_id)
+                assert result.keywords == "fast, cheap", (backend, feedback_id, result.keywords)
+        history = repository.get_analysis_history("app_store")
+        assert [result.keywords for result in history] == ["fast, cheap"] * 2, backend
+
+
+def test_mongo_documents_store_keywords_as_a_list():
+    """Mongo stores a real list and restores the same string as the other backends"""
+    from internal.feedback_analysis.repository.mongo_repository import MongoFeedbackAnalysisRepository
+
+    config = load_config("config/config.yaml")
+    # Skip __init__, document conversion does not need a connection
+    repository = MongoFeedbackAnalysisRepository.__new__(MongoFeedbackAnalysisRepository)
+    FeedbackAnalysisRepository.__init__(repository, config, logger)
+
+    for keywords in ("fast, cheap", ["fast", "cheap"], ["fast, cheap"]):
+        document = repository._to_update(_result("doc", keywords))["$set"]
+        assert document["keywords"] == ["fast", "cheap"], keywords
+        assert repository._to_result(dict(document)).keywords == "fast, cheap", keywords
+
+
+def test_sentiment_statistics_agree_across_backends():
+    """Every backend counts the same sentiments for the same results"""
+    expected = None
+    for backend in BACKENDS:
+        repository = _repository(backend)
+        repository.save_analysis_results([
+            _result("1", "fast", "positive"),
+            _result("2", "slow", "negative"),
+            _result("3", "fine", "neutral"),
+            _result("4", "great", "positive"),
+        ])
+        stats = repository.get_sentiment_statistics("app_store")
+        assert stats["total"] == 4, (backend, stats)
+        assert stats["positive"] == 2, (backend, stats)
+        if expected is None:
+            expected = stats
+        assert stats == expected, (backend, stats, expected)
+
+
+def test_top_keywords_agree_across_backends():
+    """The keyword index counts each feedback once per keyword and counts the day containing until"""
+    for backend in BACKENDS:
+        repository = _repository(backend)
+        repository.save_analysis_result(_result("1", "fast, cheap", day=18))
+        repository.save_analysis_result(_result("2", ["fast"], day=19))
+        repository.save_analysis_result(_result("2", ["fast"], day=19))
+
+        top = repository.get_top_keywords(datetime(2026, 10, 18), datetime(2026, 10, 19, 12))
+        assert top == [{"keyword": "fast", "count": 2}, {"keyword": "cheap", "count": 1}], (backend, top)
+        today = repository.get_top_keywords(datetime(2026, 10, 19, 12), datetime(2026, 10, 19, 13))
+        assert today == [{"keyword": "fast", "count": 1}], (backend, today)
+
+
+def test_service_statistics_keep_the_repository_keys():
+    """The service returns the repositories' statistics dict and the RPC maps it to the response"""
+    repository = _repository("memory")
+    repository.save_analysis_results([_result("1", "fast", "positive"), _result("2", "slow", "negative")])
+    service = FeedbackAnalysisService.__new__(FeedbackAnalysisService)
+    service.repository = repository
+
+    stats = service.get_sentiment_statistics("app_store")
+    assert stats == repository.get_sentiment_statistics("app_store")
+    assert (stats["positive"], stats["total"]) == (1, 2)
+
+    async_service = mock.Mock()
+    async_service.get_sentiment_statistics = mock.AsyncMock(return_value=stats)
+    handler = NlpWorkerGrpcService(logger, load_config("config/config.yaml"), async_service, mock.MagicMock())
+    response = asyncio.run(handler.GetSentimentStatistics(
+        nlp_worker_reader_pb2.GetSentimentStatisticsReq(feedback_source="app_store"), mock.Mock()))
+    assert (response.total_feedback, response.positive_count, response.negative_count) == (2, 1, 1)
+    assert response.positive_percentage == 50.0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for SingleFlight request coalescing
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from internal.feedback_analysis.service.single_flight import SingleFlight
+
+
+def test_async_followers_share_result():
+    """Concurrent callers with one key run the function once"""
+    flight = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("key", work) for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert calls == [1]
+    assert [result for result, _ in results] == ["result"] * 3
+    assert [shared for _, shared in results] == [False, True, True]
+
+
+def test_async_leader_cancellation_does_not_fail_followers():
+    """A cancelled leader, e.g. a timed out RPC, leaves the work running for its followers"""
+    flight = SingleFlight()
+
+    async def main():
+        started = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def work():
+            started.set()
+            await finish.wait()
+            return "result"
+
+        leader = asyncio.ensure_future(flight.do_async("key", work))
+        await started.wait()
+        follower = asyncio.ensure_future(flight.do_async("key", work))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        finish.set()
+
+        assert await follower == ("result", True)
+        assert leader.cancelled()
+
+    asyncio.run(main())
+
+
+def test_async_follower_cancellation_does_not_fail_others():
+    """A cancelled follower leaves the leader and the other followers untouched"""
+    flight = SingleFlight()
+
+    async def main():
+        finish = asyncio.Event()
+
+        async def work():
+            await finish.wait()
+            return "result"
+
+        leader = asyncio.ensure_future(flight.do_async("key", work))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flight.do_async("key", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        followers[0].cancel()
+        await asyncio.sleep(0)
+        finish.set()
+
+        assert await leader == ("result", False)
+        assert await followers[1] == ("result", True)
+
+    asyncio.run(main())
+
+
+def test_async_error_is_shared_and_key_released():
+    """Followers get the leader's exception and a later call runs the function again"""
+    flight = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("failed")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do_async("key", fail) for _ in range(2)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        await asyncio.gather(flight.do_async("key", fail), return_exceptions=True)
+
+    asyncio.run(main())
+    assert calls == [1, 1]
+
+
+def test_async_on_join_runs_for_followers_only():
+    """on_join lets a follower give back resources it holds while it waits, e.g. its queue slot"""
+    flight = SingleFlight()
+    joined = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        await asyncio.gather(*(flight.do_async("key", work, on_join=lambda: joined.append(1)) for _ in range(3)))
+
+    asyncio.run(main())
+    assert joined == [1, 1]
+
+
+def test_threads_share_result():
+    """Concurrent threads with one key run the function once"""
+    flight = SingleFlight()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(3) as pool:
+        leader = pool.submit(flight.do, "key", work)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "key", work) for _ in range(2)]
+        # Give the followers time to join before the leader finishes
+        time.sleep(0.05)
+        release.set()
+        results = [leader.result()] + [follower.result() for follower in followers]
+
+    assert calls == [1]
+    assert results == [("result", False), ("result", True), ("result", True)]
+
+
+def test_error_is_shared_and_key_released():
+    """The leader's exception reaches the caller and a later call runs the function again"""
+    flight = SingleFlight()
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("failed")
+
+    for _ in range(2):
+        try:
+            flight.do("key", fail)
+            raise AssertionError("error was swallowed")
+        except ValueError:
+            pass
+    assert calls == [1, 1]
+    assert flight.do("key", lambda: "ok") == ("ok", False)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming analysis RPC: micro-batching, flow control and admission
+"""
+
+import asyncio
+import logging
+from unittest import mock
+
+from config.config import load_config
+from internal.feedback_analysis.delivery.grpc.grpc_service import NlpWorkerGrpcService
+from internal.feedback_analysis.delivery.grpc.stream_batcher import StreamBatcher
+from internal.server.admission import AdmissionController
+from proto.nlp_worker_reader import nlp_worker_reader_pb2
+
+logger = logging.getLogger("test_stream")
+
+
+async def _requests(count: int, interval: float = 0.0, pulled=None, error: Exception = None):
+    for index in range(count):
+        if pulled is not None:
+            pulled.append(index)
+        yield index
+        if interval:
+            await asyncio.sleep(interval)
+    if error is not None:
+        raise error
+
+
+async def _collect(batcher: StreamBatcher):
+    return [batch async for batch in batcher.batches()]
+
+
+def test_batches_are_bounded_by_size():
+    async def main():
+        batcher = StreamBatcher(_requests(10), max_batch_size=4, max_latency_ms=50, queue_depth=16)
+        return await _collect(batcher)
+
+    assert asyncio.run(main()) == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+def test_batches_are_bounded_by_latency():
+    """A slow stream is not held back waiting for a full batch"""
+    async def main():
+        batcher = StreamBatcher(_requests(3, interval=0.05), max_batch_size=10, max_latency_ms=10, queue_depth=16)
+        return await _collect(batcher)
+
+    assert asyncio.run(main()) == [[0], [1], [2]]
+
+
+def test_reader_stops_at_the_queue_depth():
+    """Without a consumer the reader pulls at most queue_depth requests plus the one it is putting"""
+    pulled = []
+
+    async def main():
+        batcher = StreamBatcher(_requests(100, pulled=pulled), max_batch_size=4, max_latency_ms=10, queue_depth=3)
+        await asyncio.sleep(0.05)
+        assert batcher.depth == 3
+        assert len(pulled) == 4
+        batches = batcher.batches()
+        first = await batches.__anext__()
+        await batches.aclose()
+        return first
+
+    assert asyncio.run(main()) == [0, 1, 2, 3]
+
+
+def test_stream_error_ends_batches_after_the_received_items():
+    async def main():
+        batcher = StreamBatcher(_requests(3, error=ConnectionResetError("client went away")),
+                                max_batch_size=10, max_latency_ms=10, queue_depth=16)
+        return await _collect(batcher), batcher.error
+
+    batches, error = asyncio.run(main())
+    assert batches == [[0, 1, 2]]
+    assert isinstance(error, ConnectionResetError)
+
+
+class _BatchService:
+    def __init__(self, admission: AdmissionController):
+        self.admission = admission
+        self.queued = []
+
+    async def analyze_feedback_batch(self, requests, ticket=None):
+        self.queued.append(self.admission.in_flight)
+        return [None] * len(requests), []
+
+
+def _handler(max_queued: int):
+    config = load_config("config/config.yaml")
+    config.grpc.streamBatchSize = 2
+    config.grpc.streamBatchLatencyMs = 10
+    config.admission.maxQueuedItems = max_queued
+    admission = AdmissionController(config.admission, 1, mock.Mock(), logger)
+    service = _BatchService(admission)
+    return NlpWorkerGrpcService(logger, config, service, mock.MagicMock(), admission), service, admission
+
+
+async def _stream(handler: NlpWorkerGrpcService, count: int):
+    async def requests():
+        for index in range(count):
+            yield nlp_worker_reader_pb2.CreateFeedbackAnalysisReq(feedback_id=str(index), text="text")
+
+    context = mock.Mock()
+    context.time_remaining.return_value = None
+    return [response async for response in handler.StreamFeedbackAnalysis(requests(), context)]
+
+
+def test_stream_micro_batches_are_admitted():
+    """Every micro-batch holds queue capacity while it is analyzed and returns it afterwards"""
+    handler, service, admission = _handler(max_queued=8)
+    responses = asyncio.run(_stream(handler, 4))
+
+    assert [response.feedback_id for response in responses] == ["0", "1", "2", "3"]
+    assert service.queued == [2, 2]
+    assert admission.in_flight == 0
+
+
+def test_shed_micro_batch_fails_only_its_items():
+    handler, service, admission = _handler(max_queued=4)
+    admission.admit(None, 4)
+
+    responses = asyncio.run(_stream(handler, 3))
+    assert [response.feedback_id for response in responses] == ["0", "1", "2"]
+    assert all(response.error.startswith("Server overloaded") for response in responses)
+    assert service.queued == []
+    assert admission.in_flight == 4
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for feedback text compression and switching the storage codec
+"""
+
+import importlib.util
+import logging
+import os
+import random
+import tempfile
+from datetime import datetime
+
+from config.config import load_config
+from internal.feedback_analysis.models.feedback_analysis import FeedbackAnalysisResult
+from internal.feedback_analysis.models.text_compression import (
+    CODEC_ZLIB,
+    CODEC_ZSTD,
+    TextCompressor,
+    train_zstd_dictionary,
+)
+from internal.feedback_analysis.repository.feedback_analysis_repository import create_repository
+
+# zstandard is an optional dependency, its cases are skipped without it
+ZSTD = importlib.util.find_spec("zstandard") is not None
+
+WORDS = ("delivery", "price", "support", "quality", "fast", "slow", "broken", "great", "refund", "app")
+TEXT = "The delivery was fast and the support team answered every question about the refund. " * 8
+
+logger = logging.getLogger("test_text_compression")
+
+
+def _samples(count: int = 500):
+    rng = random.Random(7)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))) for _ in range(count)]
+
+
+def _storage_config(codec: str, dictionary_path: str = ""):
+    config = load_config("config/config.yaml")
+    config.storage.textCompression = codec
+    config.storage.zstdDictionaryPath = dictionary_path
+    config.storage.minCompressSize = 1
+    return config
+
+
+def test_round_trip_per_codec():
+    for codec, codec_id in (("zlib", CODEC_ZLIB), ("zstd", CODEC_ZSTD)):
+        if codec == "zstd" and not ZSTD:
+            continue
+        compressor = TextCompressor(codec, min_size=1)
+        blob = compressor.compress(TEXT)
+        assert blob[0] == codec_id and len(blob) < len(TEXT)
+        assert compressor.decompress(blob) == TEXT
+
+
+def test_small_or_incompressible_text_is_left_alone():
+    compressor = TextCompressor("zlib", min_size=64)
+    assert compressor.compress("short") is None
+    rng = random.Random(7)
+    assert compressor.compress("".join(chr(rng.randint(0x21, 0x7e)) for _ in range(64))) is None
+    assert TextCompressor("none").compress(TEXT) is None
+
+
+def test_blobs_stay_readable_after_a_codec_switch():
+    """Blobs carry their codec, so any compressor reads what another one wrote"""
+    writers = [TextCompressor("zlib", min_size=1)]
+    if ZSTD:
+        writers.append(TextCompressor("zstd", min_size=1))
+
+    for writer in writers:
+        blob = writer.compress(TEXT)
+        for reader in (TextCompressor("none"), TextCompressor("zlib"), *writers):
+            assert reader.decompress(blob) == TEXT, (writer.codec, reader.codec)
+
+
+def test_dictionary_blobs_stay_readable_after_switching_to_zlib():
+    """The configured dictionary is loaded for reading even when zstd no longer writes"""
+    if not ZSTD:
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "text.dict")
+        with open(path, "wb") as f:
+            f.write(train_zstd_dictionary(_samples(), dict_size=4096))
+
+        text = _samples(1)[0]
+        blob = TextCompressor.from_config(_storage_config("zstd", path).storage, logger).compress(text)
+        assert blob[0] == CODEC_ZSTD
+
+        switched = TextCompressor.from_config(_storage_config("zlib", path).storage, logger)
+        assert switched.codec == "zlib"
+        assert switched.decompress(blob) == text
+
+
+def test_stored_rows_survive_a_codec_switch():
+    """Rows written under one storage codec are read back after the config moves to another"""
+    codecs = ["zlib", "none"] + (["zstd"] if ZSTD else [])
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "feedback.db")
+        for index, codec in enumerate(codecs):
+            config = _storage_config(codec)
+            config.storage.backend = "sqlite"
+            config.storage.sqlitePath = path
+            repository = create_repository(config, logger)
+            repository.save_analysis_result(FeedbackAnalysisResult(
+                feedback_id=f"f-{codec}",
+                feedback_source="app_store",
+                text=f"{codec} {TEXT}",
+                created_at=datetime(2026, 10, 18, 9, index),
+                keywords="delivery, refund",
+                sentiment="positive",
+                analyzed_at=datetime(2026, 10, 18, 9, index),
+            ))
+            for written in codecs[:index + 1]:
+                result = repository.get_analysis_result(f"f-{written}")
+                assert result.get_text() == f"{written} {TEXT}", (written, codec)
+            repository.close_connection()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"✅ {name}")
@@ -8,11 +8,17 @@ Usage:
     python3 simulate_nlp_worker.py
     python3 simulate_nlp_worker.py --interactive
     python3 simulate_nlp_worker.py --test-messages
+    python3 simulate_nlp_worker.py --load --concurrency 32 --duration 60 --warmup 10
+    python3 simulate_nlp_worker.py --load --rps 200 --duration 60 --slo-p99-ms 250 --json
 """
 
 import sys
 import os
 import time
+import math
+import json
+import uuid
+import asyncio
 import argparse
 from datetime import datetime
 from typing import List, Dict, Any
@@ -299,6 +305,213 @@ class NlpWorkerSimulator:
             self.disconnect()
 
 
+class LatencyHistogram:
+    """Log-linear latency histogram in microseconds, in the spirit of HdrHistogram
+
+    Values below 256µs are exact. Above that each power of two is split into 128
+    buckets, so a recorded value is off by less than 1% at any magnitude while the
+    memory stays a few hundred counters for the whole run.
+    """
+
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value_us: int):
+        value_us = max(0, int(value_us))
+        index = self._index(value_us)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value_us
+        self.max = max(self.max, value_us)
+
+    def merge(self, other: 'LatencyHistogram'):
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, pct: float) -> int:
+        """Highest value equivalent to the nearest-rank percentile, capped at the exact max"""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(pct / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest(index), self.max)
+        return self.max
+
+    def summary_ms(self) -> Dict[str, float]:
+        if not self.count:
+            return {}
+        summary = {name: round(self.percentile(pct) / 1000, 3)
+                   for name, pct in (("p50", 50), ("p90", 90), ("p99", 99), ("p999", 99.9))}
+        summary["max"] = round(self.max / 1000, 3)
+        summary["mean"] = round(self.total / self.count / 1000, 3)
+        return summary
+
+    @classmethod
+    def _index(cls, value: int) -> int:
+        shift = value.bit_length() - cls.SUB_BUCKET_BITS - 1
+        if shift <= 0:
+            return value
+        return (shift << cls.SUB_BUCKET_BITS) + (value >> shift)
+
+    @classmethod
+    def _highest(cls, index: int) -> int:
+        shift = (index >> cls.SUB_BUCKET_BITS) - 1
+        if shift <= 0:
+            return index
+        mantissa = index - (shift << cls.SUB_BUCKET_BITS)
+        return ((mantissa + 1) << shift) - 1
+
+
+class GrpcLoadTester:
+    """Drives CreateFeedbackAnalysis with async stubs for a fixed duration after a warmup
+
+    Without a target rate it is closed loop: `concurrency` callers each send their next
+    request as soon as the previous one returns. With `rps` it is open loop: requests
+    start on a fixed schedule with at most `concurrency` in flight, and latency is
+    measured from the scheduled start, so time spent waiting for a free slot behind
+    slow responses counts against the service instead of being hidden.
+    """
+
+    def __init__(self, host: str, port: int, messages: List[Dict[str, Any]], concurrency: int = 16,
+                 rps: float = 0.0, duration: float = 30.0, warmup: float = 5.0, channels: int = 1,
+                 timeout: float = 10.0, verbose: bool = True):
+        self.address = f"{host}:{port}"
+        self.messages = messages
+        self.concurrency = concurrency
+        self.rps = rps
+        self.duration = duration
+        self.warmup = warmup
+        self.channels = channels
+        self.timeout = timeout
+        self.verbose = verbose
+        self.run_id = uuid.uuid4().hex[:8]
+        self.histogram = LatencyHistogram()
+        self.status_codes: Dict[str, int] = {}
+        self.sent = 0
+        self.warmup_requests = 0
+        self.late_starts = 0
+        self._stubs = []
+        self._measure_from = 0.0
+        self._deadline = 0.0
+
+    async def run(self) -> Dict[str, Any]:
+        channels = [grpc.aio.insecure_channel(self.address) for _ in range(self.channels)]
+        self._stubs = [nlp_worker_reader_pb2_grpc.NlpWorkerServiceStub(channel) for channel in channels]
+        try:
+            start = time.perf_counter()
+            self._measure_from = start + self.warmup
+            self._deadline = self._measure_from + self.duration
+            reporter = asyncio.create_task(self._report(start))
+            try:
+                if self.rps > 0:
+                    await self._open_loop(start)
+                else:
+                    await asyncio.gather(*(self._closed_loop() for _ in range(self.concurrency)))
+            finally:
+                reporter.cancel()
+            return self.summary()
+        finally:
+            for channel in channels:
+                await channel.close()
+
+    async def _closed_loop(self):
+        while True:
+            started = time.perf_counter()
+            if started >= self._deadline:
+                return
+            await self._call(started)
+
+    async def _open_loop(self, start: float):
+        slots = asyncio.Semaphore(self.concurrency)
+        in_flight = set()
+        interval = 1.0 / self.rps
+        intended = start
+        while intended < self._deadline:
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await slots.acquire()
+            if time.perf_counter() - intended > interval:
+                self.late_starts += 1
+            task = asyncio.create_task(self._call(intended))
+            in_flight.add(task)
+            task.add_done_callback(lambda done: (in_flight.discard(done), slots.release()))
+            intended += interval
+        if in_flight:
+            await asyncio.gather(*in_flight)
+
+    async def _call(self, started: float):
+        message = self.messages[self.sent % len(self.messages)]
+        timestamp = Timestamp()
+        timestamp.GetCurrentTime()
+        request = nlp_worker_reader_pb2.CreateFeedbackAnalysisReq(
+            feedback_id=f"load-{self.run_id}-{self.sent:09d}",
+            feedback_source=message['source'],
+            text=message['text'],
+            created_at=timestamp
+        )
+        stub = self._stubs[self.sent % len(self._stubs)]
+        self.sent += 1
+
+        try:
+            await stub.CreateFeedbackAnalysis(request, timeout=self.timeout)
+            code = 'OK'
+        except grpc.RpcError as e:
+            code = e.code().name
+        except Exception as e:
+            code = type(e).__name__
+        latency_us = (time.perf_counter() - started) * 1e6
+
+        # Requests started during the warmup only prime connections, caches and models
+        if started < self._measure_from:
+            self.warmup_requests += 1
+            return
+        self.status_codes[code] = self.status_codes.get(code, 0) + 1
+        if code == 'OK':
+            self.histogram.record(latency_us)
+
+    async def _report(self, start: float):
+        while self.verbose:
+            await asyncio.sleep(1)
+            now = time.perf_counter()
+            phase = "warmup" if now < self._measure_from else "measure"
+            errors = sum(count for code, count in self.status_codes.items() if code != 'OK')
+            print(f"⏱️  {now - start:6.1f}s {phase:7} sent={self.sent} ok={self.histogram.count} "
+                  f"errors={errors} p99={self.histogram.percentile(99) / 1000:.1f}ms", flush=True)
+
+    def summary(self) -> Dict[str, Any]:
+        completed = sum(self.status_codes.values())
+        errors = completed - self.status_codes.get('OK', 0)
+        return {
+            "mode": "open_loop" if self.rps > 0 else "closed_loop",
+            "target_rps": self.rps or None,
+            "concurrency": self.concurrency,
+            "channels": self.channels,
+            "warmup_s": self.warmup,
+            "duration_s": self.duration,
+            "warmup_requests": self.warmup_requests,
+            "requests": completed,
+            "ok": self.status_codes.get('OK', 0),
+            "errors": errors,
+            "error_rate": round(errors / completed, 6) if completed else 0.0,
+            "status_codes": dict(sorted(self.status_codes.items())),
+            "achieved_rps": round(completed / self.duration, 1) if self.duration else 0.0,
+            "late_starts": self.late_starts,
+            "latency_ms": self.histogram.summary_ms(),
+        }
+
+
 def main():
     """Main function"""
     parser = argparse.ArgumentParser(description="NLP Worker Service Simulator")
@@ -311,8 +524,34 @@ def main():
     parser.add_argument('--port', type=int, default=5003,
                        help='NLP Worker service port (default: 5003)')
     
+    parser.add_argument('--load', '-l', action='store_true',
+                       help='Run a concurrent load test and report latency percentiles')
+    parser.add_argument('--concurrency', type=int, default=16,
+                       help='Load test: requests in flight, the cap on in-flight requests with --rps (default: 16)')
+    parser.add_argument('--rps', type=float, default=0.0,
+                       help='Load test: target requests per second, 0 for closed loop (default: 0)')
+    parser.add_argument('--duration', type=float, default=30.0,
+                       help='Load test: measured seconds (default: 30)')
+    parser.add_argument('--warmup', type=float, default=5.0,
+                       help='Load test: unmeasured seconds before the measurement (default: 5)')
+    parser.add_argument('--channels', type=int, default=1,
+                       help='Load test: gRPC channels to spread requests over (default: 1)')
+    parser.add_argument('--timeout', type=float, default=10.0,
+                       help='Load test: per-request deadline in seconds (default: 10)')
+    parser.add_argument('--generated', type=int, default=0,
+                       help='Load test: use this many generated feedback texts instead of the test messages')
+    parser.add_argument('--slo-p99-ms', type=float,
+                       help='Load test: exit with status 1 if the p99 latency exceeds this')
+    parser.add_argument('--slo-error-rate', type=float, default=0.001,
+                       help='Load test: with --slo-p99-ms, the highest acceptable error rate (default: 0.001)')
+    parser.add_argument('--json', action='store_true',
+                       help='Load test: print a machine-readable summary')
+    
     args = parser.parse_args()
     
+    if args.load:
+        sys.exit(run_load_test(args))
+    
     # Determine mode
     if args.interactive:
         mode = 'interactive'
@@ -326,5 +565,51 @@ def main():
     simulator.run(mode)
 
 
+def run_load_test(args) -> int:
+    """Run the load test described by the command line; returns the exit status"""
+    if args.generated:
+        from benchmarks.corpus import generate_corpus
+        messages = [{"source": item.feedback_source, "text": item.text}
+                    for item in generate_corpus(args.generated)]
+    else:
+        messages = NlpWorkerSimulator(host=args.host, port=args.port).test_messages
+    
+    tester = GrpcLoadTester(
+        args.host, args.port, messages,
+        concurrency=args.concurrency,
+        rps=args.rps,
+        duration=args.duration,
+        warmup=args.warmup,
+        channels=args.channels,
+        timeout=args.timeout,
+        verbose=not args.json
+    )
+    if not args.json:
+        target = f"{args.rps:g} req/s, at most {args.concurrency} in flight" if args.rps else f"{args.concurrency} in flight"
+        print(f"🚀 Load testing {tester.address}: {target}, {args.warmup:g}s warmup + {args.duration:g}s")
+    
+    try:
+        summary = asyncio.run(tester.run())
+    except KeyboardInterrupt:
+        print("\n\n👋 Load test interrupted")
+        return 130
+    
+    status = 0
+    if args.slo_p99_ms is not None:
+        p99 = summary["latency_ms"].get("p99")
+        met = p99 is not None and p99 <= args.slo_p99_ms and summary["error_rate"] <= args.slo_error_rate
+        summary["slo"] = {"p99_ms": args.slo_p99_ms, "error_rate": args.slo_error_rate, "met": met}
+        status = 0 if met else 1
+    
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print("📊 Load Test Summary")
+        for key, value in summary.items():
+            print(f"  {key}: {value}")
+        if "slo" in summary:
+            print("✅ SLO met" if summary["slo"]["met"] else "❌ SLO missed")
+    return status
+
 if __name__ == "__main__":
     main()